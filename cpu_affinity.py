@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Thread placement for SONU's whisper service.
+
+Keeps the audio capture thread on a reserved core at raised priority and the
+decoding threads on the remaining cores. On Linux affinity and nice values
+are per-thread (os.sched_setaffinity / os.setpriority) and threads inherit
+them from the thread that starts them. Windows threads do not inherit a
+thread affinity, so the process-wide default goes through CPU sets
+(SetProcessDefaultCpuSets, Windows 10+), which also cover threads that native
+libraries start later, and single threads use SetThreadSelectedCpuSets (or
+SetThreadAffinityMask on older systems) and SetThreadPriority. On other
+platforms the calls report failure and change nothing.
+"""
+
+import os
+import sys
+import struct
+import threading
+
+WINDOWS_PRIORITY_ABOVE_NORMAL = 1
+WINDOWS_PRIORITY_HIGHEST = 2
+WINDOWS_PRIORITY_BELOW_NORMAL = -1
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_cores(spec, cores=None):
+    """Split cores into (capture, decode) sets; spec is "auto" (last core) or a core index.
+
+    Returns (None, all cores) when there is nothing to reserve.
+    """
+    cores = list(cores) if cores is not None else available_cores()
+    if len(cores) < 2:
+        return None, set(cores)
+    capture = cores[-1] if spec == "auto" else int(spec)
+    if capture not in cores:
+        raise ValueError(f"core {capture} is not available (have {cores})")
+    return {capture}, set(cores) - {capture}
+
+
+def _kernel32():
+    import ctypes
+    return ctypes.windll.kernel32
+
+
+def _windows_cpu_set_ids(cores):
+    """CPU set ids of the given logical processors (group 0), or None without CPU set support"""
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = _kernel32()
+    if not hasattr(kernel32, "GetSystemCpuSetInformation"):
+        return None
+    needed = wintypes.ULONG(0)
+    kernel32.GetSystemCpuSetInformation(None, 0, ctypes.byref(needed), None, 0)
+    buf = ctypes.create_string_buffer(needed.value)
+    if not kernel32.GetSystemCpuSetInformation(buf, needed.value, ctypes.byref(needed), None, 0):
+        return None
+    ids = []
+    offset = 0
+    while offset < needed.value:
+        # SYSTEM_CPU_SET_INFORMATION: Size, Type, then CpuSet.Id, Group, LogicalProcessorIndex
+        size, _type, cpu_set_id, group, index = struct.unpack_from("<LLLHB", buf.raw, offset)
+        if group == 0 and index in cores:
+            ids.append(cpu_set_id)
+        offset += size or 1
+    return ids or None
+
+
+def _windows_id_array(ids):
+    import ctypes
+    return (ctypes.c_ulong * len(ids))(*ids), len(ids)
+
+
+def set_thread_affinity(cores):
+    """Restrict the calling thread to cores; True on success.
+
+    Only Linux threads started later by this thread inherit it; see
+    set_default_affinity for the whole process.
+    """
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)  # pid 0 is the calling thread on Linux
+            return True
+        if sys.platform == "win32":
+            kernel32 = _kernel32()
+            ids = _windows_cpu_set_ids(set(cores))
+            if ids is not None and hasattr(kernel32, "SetThreadSelectedCpuSets"):
+                # A thread's own CPU sets override the process default set
+                return kernel32.SetThreadSelectedCpuSets(kernel32.GetCurrentThread(), *_windows_id_array(ids)) != 0
+            mask = sum(1 << core for core in cores)
+            return kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask) != 0
+    except (OSError, ValueError, AttributeError, struct.error):
+        pass
+    return False
+
+
+def set_default_affinity(cores):
+    """Restrict the calling thread and every thread the process starts afterwards; True on success.
+
+    On Windows this is the process default CPU set, which applies to all
+    threads without a selection of their own, native library threads included.
+    """
+    if sys.platform != "win32":
+        return set_thread_affinity(cores)
+    try:
+        kernel32 = _kernel32()
+        ids = _windows_cpu_set_ids(set(cores))
+        if ids is None or not hasattr(kernel32, "SetProcessDefaultCpuSets"):
+            return False
+        return kernel32.SetProcessDefaultCpuSets(kernel32.GetCurrentProcess(), *_windows_id_array(ids)) != 0
+    except (OSError, ValueError, AttributeError, struct.error):
+        return False
+
+
+def can_raise_priority(nice):
+    """Whether this process may move a thread to the given (negative) nice value"""
+    if sys.platform == "win32":
+        return True  # above-normal thread priority needs no privilege
+    if not sys.platform.startswith("linux"):
+        return False
+    if os.geteuid() == 0:
+        return True
+    try:
+        import resource
+        soft, _ = resource.getrlimit(resource.RLIMIT_NICE)
+    except (ImportError, AttributeError, ValueError, OSError):
+        return False
+    # RLIMIT_NICE allows nice values down to 20 - limit
+    return soft == resource.RLIM_INFINITY or 20 - soft <= nice
+
+
+def set_thread_nice(nice):
+    """Give the calling thread a nice value (-20 highest .. 19 lowest); True on success"""
+    try:
+        if sys.platform.startswith("linux"):
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+            return True
+        if sys.platform == "win32":
+            if nice <= -10:
+                level = WINDOWS_PRIORITY_HIGHEST
+            elif nice < 0:
+                level = WINDOWS_PRIORITY_ABOVE_NORMAL
+            elif nice > 0:
+                level = WINDOWS_PRIORITY_BELOW_NORMAL
+            else:
+                level = 0
+            kernel32 = _kernel32()
+            return kernel32.SetThreadPriority(kernel32.GetCurrentThread(), level) != 0
+    except (OSError, AttributeError):
+        pass
+    return False
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Decode scheduling for SONU's whisper service.
+
+One resident model can only run one decode at a time. DecodeScheduler owns
+the thread that calls it: callers submit jobs and get a
+concurrent.futures.Future back. Every job has a priority class (FINAL before
+PARTIAL before BACKGROUND); within a class jobs wait in per-client queues
+that are served round-robin, so one busy client cannot starve the others.
+A job submitted with supersede=True replaces the client's queued jobs of the
+same class, which is how obsolete partials are dropped.
+
+With a batch_fn, jobs submitted through submit_batched() are gathered for up
+to max_wait seconds (or until max_batch are queued) and run as one
+batch_fn(items) call. Plain submit() jobs are interactive: they never wait
+for a batch to fill and run before any queued batchable work of their class.
+"""
+
+import time
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+FINAL = 0
+PARTIAL = 1
+BACKGROUND = 2
+CLASS_NAMES = {FINAL: "final", PARTIAL: "partial", BACKGROUND: "background"}
+
+
+class DecodeJob:
+    __slots__ = ("client", "fn", "args", "priority", "future", "submitted")
+
+    def __init__(self, client, fn, args, priority):
+        self.client = client
+        self.fn = fn  # None for batchable jobs; args is then (item,)
+        self.args = args
+        self.priority = priority
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+class DecodeScheduler:
+    """Single decode thread fed by prioritised, per-client FIFO queues"""
+
+    def __init__(self, name="decode-scheduler", batch_fn=None, max_batch=1, max_wait=0.0, on_start=None):
+        # priority -> OrderedDict(client -> deque of jobs); dict order is the round-robin rotation
+        self._queues = {priority: OrderedDict() for priority in CLASS_NAMES}
+        self._cond = threading.Condition()
+        self._clients = {}
+        self._classes = {priority: {"jobs": 0, "dropped": 0, "wait_ms": 0.0, "max_wait_ms": 0.0}
+                         for priority in CLASS_NAMES}
+        self._stopped = False
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait))
+        self.on_start = on_start  # run once on the decode thread, e.g. to set its affinity
+        self._totals = {"jobs": 0, "batches": 0, "batched_jobs": 0, "bypassed": 0,
+                        "largest_batch": 0, "busy_s": 0.0, "latency_ms": 0.0}
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, client, fn, *args, priority=BACKGROUND, supersede=False):
+        """Queue fn(*args) for client; returns a Future with its result"""
+        return self._enqueue(DecodeJob(client, fn, args, priority), supersede)
+
+    def submit_batched(self, client, item, priority=BACKGROUND):
+        """Queue item for the next batch_fn call; returns a Future with its own result"""
+        if self.batch_fn is None:
+            raise RuntimeError("decode scheduler has no batch function")
+        return self._enqueue(DecodeJob(client, None, (item,), priority), False)
+
+    def _enqueue(self, job, supersede):
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("decode scheduler is stopped")
+            queue = self._queues[job.priority].setdefault(job.client, deque())
+            if supersede:
+                self._cancel_queued(queue, job.priority)
+            queue.append(job)
+            self._client(job.client)["submitted"] += 1
+            self._cond.notify()
+        return job.future
+
+    def _cancel_queued(self, queue, priority):
+        while queue:
+            queue.popleft().future.cancel()
+            self._classes[priority]["dropped"] += 1
+
+    def drop(self, priority, client=None):
+        """Cancel queued (not running) jobs of a class, for one client or all"""
+        with self._cond:
+            for queued_client, queue in self._queues[priority].items():
+                if client is None or queued_client == client:
+                    self._cancel_queued(queue, priority)
+
+    def forget(self, client):
+        """Drop a disconnected client's queued jobs and stats"""
+        with self._cond:
+            for queues in self._queues.values():
+                for job in queues.pop(client, ()):
+                    job.future.cancel()
+            self._clients.pop(client, None)
+
+    def pending(self):
+        with self._cond:
+            return sum(len(q) for queues in self._queues.values() for q in queues.values())
+
+    def client_stats(self):
+        with self._cond:
+            report = {}
+            for client, s in self._clients.items():
+                done = s["completed"] + s["failed"]
+                report[str(client)] = {
+                    "submitted": s["submitted"],
+                    "completed": s["completed"],
+                    "failed": s["failed"],
+                    "pending": sum(len(queues.get(client, ())) for queues in self._queues.values()),
+                    "avg_queue_ms": round(s["queue_ms"] / done, 1) if done else None,
+                    "decode_ms": round(s["decode_ms"], 1),
+                }
+            return report
+
+    def class_stats(self):
+        """Queue wait per priority class, plus how many of its jobs were dropped unrun"""
+        with self._cond:
+            report = {}
+            for priority, c in self._classes.items():
+                report[CLASS_NAMES[priority]] = {
+                    "jobs": c["jobs"],
+                    "dropped": c["dropped"],
+                    "pending": sum(len(q) for q in self._queues[priority].values()),
+                    "avg_wait_ms": round(c["wait_ms"] / c["jobs"], 1) if c["jobs"] else None,
+                    "max_wait_ms": round(c["max_wait_ms"], 1),
+                }
+            return report
+
+    def batch_stats(self):
+        """Throughput against latency: jobs per busy second and mean submit-to-result time"""
+        with self._cond:
+            t = self._totals
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": round(self.max_wait * 1000, 1),
+                "jobs": t["jobs"],
+                "batches": t["batches"],
+                "avg_batch_size": round(t["batched_jobs"] / t["batches"], 2) if t["batches"] else None,
+                "largest_batch": t["largest_batch"],
+                "bypassed": t["bypassed"],
+                "jobs_per_busy_s": round(t["jobs"] / t["busy_s"], 2) if t["busy_s"] else None,
+                "avg_latency_ms": round(t["latency_ms"] / t["jobs"], 1) if t["jobs"] else None,
+            }
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+
+    def _client(self, client):
+        return self._clients.setdefault(
+            client, {"submitted": 0, "completed": 0, "failed": 0, "queue_ms": 0.0, "decode_ms": 0.0}
+        )
+
+    def _queued(self, priority, batchable):
+        return sum(1 for q in self._queues[priority].values() for job in q if (job.fn is None) == batchable)
+
+    def _urgent_class(self):
+        """Most urgent class with queued work, or None"""
+        for priority in sorted(self._queues):
+            if any(self._queues[priority].values()):
+                return priority
+        return None
+
+    def _head(self, priority):
+        for queue in self._queues[priority].values():
+            if queue:
+                return queue[0]
+        return None
+
+    def _take_interactive(self, priority):
+        """Remove the first interactive job of a class in round-robin order, wherever it is queued"""
+        queues = self._queues[priority]
+        for client, queue in queues.items():
+            for job in queue:
+                if job.fn is not None:
+                    queue.remove(job)
+                    queues.move_to_end(client)
+                    return job
+        return None
+
+    def _take_batch(self, priority):
+        """Pop up to max_batch batchable queue heads of a class, one per client per pass"""
+        queues = self._queues[priority]
+        batch = []
+        while len(batch) < self.max_batch:
+            taken = False
+            for client, queue in list(queues.items()):
+                if len(batch) == self.max_batch:
+                    break
+                if queue and queue[0].fn is None:
+                    batch.append(queue.popleft())
+                    queues.move_to_end(client)
+                    taken = True
+            if not taken:
+                break
+        return batch
+
+    def _next_jobs(self):
+        """Wait for work, then return an interactive job alone or a batch; [] once stopped"""
+        while True:
+            priority = self._urgent_class()
+            if priority is not None:
+                break
+            if self._stopped:
+                return []
+            self._cond.wait()
+        head = self._head(priority)
+        if head.fn is None and self.max_batch > 1:
+            # Gather more items, but never hold the first one past its max_wait,
+            # and stop early for interactive or more urgent work
+            deadline = head.submitted + self.max_wait
+            while (not self._stopped and self._urgent_class() == priority
+                   and self._queued(priority, True) < self.max_batch and not self._queued(priority, False)):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            priority = self._urgent_class()
+            if priority is None:
+                return self._next_jobs()  # everything queued was dropped while waiting
+        job = self._take_interactive(priority)
+        if job is not None:
+            if self._queued(priority, True):
+                self._totals["bypassed"] += 1
+            return [job]
+        return self._take_batch(priority)
+
+    def _run(self):
+        if self.on_start is not None:
+            self.on_start()
+        while True:
+            with self._cond:
+                jobs = self._next_jobs()
+                if not jobs:
+                    return
+            jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]
+            if not jobs:
+                continue
+            started = time.perf_counter()
+            error = None
+            try:
+                if jobs[0].fn is not None:
+                    results = [jobs[0].fn(*jobs[0].args)]
+                else:
+                    results = list(self.batch_fn([job.args[0] for job in jobs]))
+            except BaseException as e:
+                error = e
+            finished = time.perf_counter()
+            # Account before resolving, so a caller reading stats after its result sees it
+            with self._cond:
+                t = self._totals
+                t["jobs"] += len(jobs)
+                t["busy_s"] += finished - started
+                if jobs[0].fn is None:
+                    t["batches"] += 1
+                    t["batched_jobs"] += len(jobs)
+                    t["largest_batch"] = max(t["largest_batch"], len(jobs))
+                for job in jobs:
+                    wait_ms = (started - job.submitted) * 1000
+                    c = self._classes[job.priority]
+                    c["jobs"] += 1
+                    c["wait_ms"] += wait_ms
+                    c["max_wait_ms"] = max(c["max_wait_ms"], wait_ms)
+                    t["latency_ms"] += (finished - job.submitted) * 1000
+                    if job.client in self._clients:
+                        s = self._clients[job.client]
+                        s["failed" if error is not None else "completed"] += 1
+                        s["queue_ms"] += wait_ms
+                        s["decode_ms"] += (finished - started) * 1000 / len(jobs)
+            for i, job in enumerate(jobs):
+                if error is not None:
+                    job.future.set_exception(error)
+                else:
+                    job.future.set_result(results[i])
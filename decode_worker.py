@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Out-of-process decoding for SONU's whisper service.
+
+The capture process writes 16-bit PCM into a shared-memory ring buffer and
+asks a worker process (JSON lines over stdin/stdout) to decode sample spans
+of it. The worker owns the Whisper model (any whisper_backends backend), so
+the Python-side segment generator never competes for the GIL with the audio
+capture thread.
+
+A decode already running in the worker is cancelled through the ring's
+header: the client stores the id of the decode to abort, and the worker
+checks it between segments and replies "cancelled" instead of a result.
+
+A span that has already been overwritten in the ring (a recording longer
+than the ring) is sent inline as base64 PCM instead, so nothing is dropped.
+
+If the worker dies (native crash, OOM kill), the next decode restarts it
+against the same ring, so no captured audio is lost, and retries once.
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import threading
+import subprocess
+from multiprocessing import shared_memory
+
+import numpy as np
+
+HEADER_BYTES = 16  # int64 write position (total samples ever written), int64 cancelled decode id
+
+
+class WorkerExited(RuntimeError):
+    """The decode process is gone (crashed, killed) or could not be restarted"""
+
+
+def _attach_shared_memory(name):
+    """Attach to an existing segment without letting this process unlink it on exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class AudioRing:
+    """Single-writer ring of int16 samples living in shared memory"""
+
+    def __init__(self, capacity=None, name=None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + capacity * 2)
+            self.owner = True
+        else:
+            self.shm = _attach_shared_memory(name)
+            self.owner = False
+            capacity = (self.shm.size - HEADER_BYTES) // 2
+        self.capacity = capacity
+        self._pos = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self._cancel = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=8)
+        self._data = np.ndarray((capacity,), dtype=np.int16, buffer=self.shm.buf, offset=HEADER_BYTES)
+        if self.owner:
+            self._pos[0] = 0
+            self._cancel[0] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def position(self):
+        return int(self._pos[0])
+
+    def cancel(self, decode_id):
+        """Ask the worker to abandon decode_id (and any earlier decode still running)"""
+        self._cancel[0] = max(int(self._cancel[0]), decode_id)
+
+    def cancelled(self, decode_id):
+        return int(self._cancel[0]) >= decode_id
+
+    def write(self, pcm):
+        """Append raw int16 PCM bytes; oldest samples are overwritten when full"""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        pos = int(self._pos[0])
+        if len(samples) > self.capacity:
+            pos += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+        start = pos % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < len(samples):
+            self._data[:len(samples) - first] = samples[first:]
+        # Publish the new position only after the samples are in place
+        self._pos[0] = pos + len(samples)
+
+    def read(self, start, end):
+        """Copy samples [start, end) out of the ring, clamped to what is still held"""
+        end = min(end, self.position)
+        start = max(start, end - self.capacity, 0)
+        if end <= start:
+            return np.zeros(0, dtype=np.int16)
+        a, b = start % self.capacity, end % self.capacity
+        if a < b:
+            return self._data[a:b].copy()
+        return np.concatenate((self._data[a:], self._data[:b]))
+
+    def close(self):
+        # Drop numpy views before releasing the mapping
+        self._pos = None
+        self._cancel = None
+        self._data = None
+        try:
+            self.shm.close()
+            if self.owner:
+                self.shm.unlink()
+        except Exception:
+            pass
+
+
+def worker_main(ring_name, model_size):
+    """Entry point of the decode process: load the model, then serve spans"""
+    cores = os.environ.get("WHISPER_DECODE_CORES")
+    if cores:
+        # Windows processes do not inherit the parent's default CPU set
+        import cpu_affinity
+        cpu_affinity.set_default_affinity({int(core) for core in cores.split(",")})
+    ring = AudioRing(name=ring_name)
+    try:
+        from whisper_backends import load_backend
+        model = load_backend(model_size)
+    except Exception as e:
+        send_message({"op": "error", "error": str(e)})
+        ring.close()
+        return
+    send_message({"op": "ready", "backend": model.name, "model_ref": model.model_ref})
+
+    for line in sys.stdin:
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            continue
+        if msg.get("op") == "stop":
+            break
+        if msg.get("op") == "decode":
+            t0 = time.perf_counter()
+            decode_id = msg.get("id", 0)
+            try:
+                if "audio" in msg:
+                    pcm = np.frombuffer(base64.b64decode(msg["audio"]), dtype=np.int16)
+                else:
+                    pcm = ring.read(msg["start"], msg["end"])
+                texts = []
+                cancelled = ring.cancelled(decode_id)
+                if len(pcm) and not cancelled:
+                    samples = pcm.astype(np.float32) / 32768.0
+                    segments, _ = model.transcribe(samples)
+                    try:
+                        for seg in segments:
+                            texts.append(seg.text)
+                            if ring.cancelled(decode_id):
+                                cancelled = True
+                                break
+                    finally:
+                        close = getattr(segments, "close", None)
+                        if close is not None:
+                            close()
+                if cancelled:
+                    send_message({"op": "cancelled", "seconds": time.perf_counter() - t0})
+                else:
+                    send_message({"op": "result", "text": "".join(texts).strip(), "seconds": time.perf_counter() - t0})
+            except Exception as e:
+                send_message({"op": "error", "error": str(e)})
+    ring.close()
+
+
+def send_message(msg):
+    sys.stdout.write(json.dumps(msg) + "\n")
+    sys.stdout.flush()
+
+
+class DecodeWorkerClient:
+    """Capture-side handle: owns the ring and talks to the decode process.
+
+    The ring outlives the worker process, so the model can be unloaded
+    (stop_worker) and reloaded (start_worker) without losing captured audio.
+    """
+
+    def __init__(self, model_size, rate=16000, ring_seconds=300):
+        self.model_size = model_size
+        self.rate = rate
+        self.ring = AudioRing(capacity=int(rate * ring_seconds))
+        self.process = None
+        self.backend = (None, None)  # (backend name, model reference) reported by the worker
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._running = None  # (decode id, session, partial) of the decode in the worker
+        self.restarts = 0  # worker processes respawned after dying
+        self.overruns = 0  # decodes whose span the ring no longer held, sent inline
+        self.start_worker()
+
+    def start_worker(self):
+        # A plain subprocess (rather than multiprocessing spawn) keeps the
+        # worker from re-importing whisper_service and its audio/keyboard setup
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), self.ring.name, self.model_size],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1,
+        )
+
+    def _request(self, msg):
+        if self.process is None:
+            raise WorkerExited("decode worker is not running")
+        try:
+            self.process.stdin.write(json.dumps(msg) + "\n")
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise WorkerExited(f"decode worker pipe broken: {e}")
+        return self._response()
+
+    def _response(self):
+        try:
+            line = self.process.stdout.readline()
+        except (OSError, ValueError):
+            line = ""
+        if not line:
+            raise WorkerExited(f"decode worker exited (code {self.process.poll()})")
+        return json.loads(line)
+
+    def _restart(self):
+        """Replace a dead worker with a fresh one on the same ring"""
+        old, self.process = self.process, None
+        if old is not None:
+            try:
+                old.kill()
+                old.wait(timeout=2)
+            except Exception:
+                pass
+        self.restarts += 1
+        sys.stderr.write("Decode worker died, restarting it\n")
+        sys.stderr.flush()
+        self.start_worker()
+        try:
+            self.wait_ready()
+        except Exception as e:
+            self.process.kill()
+            self.process = None
+            raise WorkerExited(f"decode worker could not be restarted: {e}")
+
+    def wait_ready(self):
+        """Block until the worker has loaded its model; raises on load failure"""
+        msg = self._response()
+        if msg.get("op") != "ready":
+            raise RuntimeError(msg.get("error", "decode worker failed to start"))
+        self.backend = (msg.get("backend"), msg.get("model_ref"))
+
+    @property
+    def position(self):
+        return self.ring.position
+
+    def write(self, pcm):
+        self.ring.write(pcm)
+
+    def decode(self, start, end, session=None, partial=False, pcm=None):
+        """Decode samples [start, end) in the worker; returns (text, seconds), text None if cancelled.
+
+        pcm, the span's raw bytes, is sent inline when the ring has already
+        overwritten the start of the span.
+        """
+        request = {"op": "decode", "start": start, "end": end}
+        if start < self.ring.position - self.ring.capacity:
+            self.overruns += 1
+            sys.stderr.write(f"Decode span of {(end - start) / self.rate:.0f} s is longer than the ring")
+            sys.stderr.write(", sending it inline\n" if pcm is not None else ", its start is lost\n")
+            sys.stderr.flush()
+            if pcm is not None:
+                request["audio"] = base64.b64encode(pcm).decode("ascii")
+        with self._lock:
+            for attempt in range(2):
+                self._next_id += 1
+                self._running = (self._next_id, session, partial)
+                try:
+                    msg = self._request({**request, "id": self._next_id})
+                    break
+                except WorkerExited:
+                    if attempt:
+                        raise
+                    self._restart()
+                finally:
+                    self._running = None
+        if msg.get("op") == "cancelled":
+            return None, msg["seconds"]
+        if msg.get("op") != "result":
+            raise RuntimeError(msg.get("error", "decode failed"))
+        return msg["text"], msg["seconds"]
+
+    def cancel(self, session=None, partial_only=False):
+        """Abort the worker's running decode if it belongs to session (any session when None)"""
+        running = self._running
+        if running is None:
+            return False
+        decode_id, running_session, partial = running
+        if (session is not None and running_session != session) or (partial_only and not partial):
+            return False
+        self.ring.cancel(decode_id)
+        return True
+
+    def stop_worker(self):
+        """Terminate the decode process (and its model) but keep the ring"""
+        if self.process is None:
+            return
+        with self._lock:
+            try:
+                self.process.stdin.write(json.dumps({"op": "stop"}) + "\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=2)
+            except Exception:
+                try:
+                    self.process.kill()
+                except Exception:
+                    pass
+            self.process = None
+
+    def close(self):
+        self.stop_worker()
+        self.ring.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.stderr.write("Usage: decode_worker.py <ring_name> <model>\n")
+        sys.exit(1)
+    worker_main(sys.argv[1], sys.argv[2])
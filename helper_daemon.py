@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Long-lived Python helper for SONU.
+
+Serves the utility functions that main.js used to reach by spawning a fresh
+interpreter per call (system_utils.py, model_manager.py, translation_service.py)
+over a JSON-RPC 2.0 channel on stdin/stdout. Modules are imported once and
+stay warm; requests run concurrently and responses are matched by id.
+
+Request:  {"jsonrpc": "2.0", "id": 1, "method": "system.info", "params": {}}
+Response: {"jsonrpc": "2.0", "id": 1, "result": {...}}
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import inspect
+import importlib
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+protocol_out = sys.stdout
+out_lock = threading.Lock()
+started_at = time.time()
+
+WARM_MODULES = ("system_utils", "model_manager", "translation_service")
+
+
+class ModuleFunction:
+    """A method living in another module, imported on first use"""
+
+    def __init__(self, module, func):
+        self.module = module
+        self.func = func
+
+    def target(self):
+        """The real function, called (and its params checked) by handle_request"""
+        return getattr(importlib.import_module(self.module), self.func)
+
+
+def ping():
+    return {
+        "pong": True,
+        "pid": os.getpid(),
+        "uptime_s": round(time.time() - started_at, 1),
+        "warm_modules": [m for m in WARM_MODULES if m in sys.modules],
+    }
+
+
+METHODS = {
+    "helper.ping": ping,
+    "system.info": ModuleFunction("system_utils", "get_system_info"),
+    "system.profile": ModuleFunction("system_utils", "get_system_profile"),
+    "system.suggest_model": ModuleFunction("system_utils", "suggest_model"),
+    "system.list_microphones": ModuleFunction("system_utils", "list_microphones"),
+    "models.space": ModuleFunction("model_manager", "space_info"),
+    "translation.translate": ModuleFunction("translation_service", "translate_text"),
+    "translation.translate_batch": ModuleFunction("translation_service", "translate_batch"),
+    "translation.translate_dict": ModuleFunction("translation_service", "translate_dict"),
+    "translation.check": ModuleFunction("translation_service", "check_available"),
+}
+
+
+def send(message):
+    line = json.dumps(message)
+    with out_lock:
+        protocol_out.write(line + "\n")
+        protocol_out.flush()
+
+
+def error_response(req_id, code, message, data=None):
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": req_id, "error": error}
+
+
+def handle_request(request):
+    """Run one request and build its JSON-RPC response"""
+    req_id = request.get("id")
+    method = METHODS.get(request.get("method"))
+    if method is None:
+        return error_response(req_id, METHOD_NOT_FOUND, f"Method not found: {request.get('method')}")
+    params = request.get("params") or {}
+    if not isinstance(params, (list, dict)):
+        return error_response(req_id, INVALID_PARAMS, "params must be an object or array")
+    t0 = time.perf_counter()
+    try:
+        func = method.target() if isinstance(method, ModuleFunction) else method
+        # Check params before the call, so a TypeError raised inside the method is an internal error
+        args, kwargs = (params, {}) if isinstance(params, list) else ([], params)
+        try:
+            inspect.signature(func).bind(*args, **kwargs)
+        except TypeError as e:
+            return error_response(req_id, INVALID_PARAMS, str(e))
+        result = func(*args, **kwargs)
+    except Exception as e:
+        return error_response(req_id, INTERNAL_ERROR, str(e), traceback.format_exc())
+    return {
+        "jsonrpc": "2.0",
+        "id": req_id,
+        "result": result,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2),
+    }
+
+
+def dispatch(request):
+    response = handle_request(request)
+    # Requests without an id are notifications and get no reply
+    if "id" in request:
+        send(response)
+
+
+def warm_up():
+    """Import the helper modules in the background so the first call is already warm"""
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            sys.stderr.write(f"Helper warm-up could not import {name}: {e}\n")
+            sys.stderr.flush()
+
+
+def main():
+    global protocol_out
+    # Protocol lines go to the real stdout; anything the helpers print lands on stderr
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    workers = int(os.environ.get("SONU_HELPER_WORKERS", "4"))
+    threading.Thread(target=warm_up, daemon=True).start()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                send(error_response(None, PARSE_ERROR, f"Parse error: {e}"))
+                continue
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                send(error_response(request.get("id") if isinstance(request, dict) else None,
+                                    INVALID_REQUEST, "Invalid request"))
+                continue
+            pool.submit(dispatch, request)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -39,6 +39,7 @@ let mainWindow;
 let tray;
 let whisperProcess;
 let whisperStdoutBuffer = ''; // Buffer for incomplete stdout lines
+let streamedFinalText = ''; // Segments of a streaming final received before its COMMIT
 let isRecording = false;
 let robot;
 let robotType = null; // 'robot-js' or 'robotjs'
@@ -51,6 +52,7 @@ let indicatorWindow;
 let fadeTimer = null;
 let indicatorState = 'hidden';
 let typedSoFar = '';
+let typedHypothesis = ''; // Text typed so far from EDIT operations (delta partials)
 let settings = {
   holdHotkey: 'CommandOrControl+Super+Space',
   toggleHotkey: 'CommandOrControl+Shift+Space',
@@ -449,6 +451,60 @@ function hideIndicator() {
   }
 }
 
+// Every keystroke batch (backspaces, typed text, paste) runs through one queue,
+// so an edit's backspaces can never interleave with the text typed after them
+let keystrokeQueue = Promise.resolve();
+
+function enqueueKeystrokes(action, delayMs = 5) {
+  keystrokeQueue = keystrokeQueue
+    .then(() => new Promise((resolve) => setTimeout(resolve, delayMs)))
+    .then(action)
+    .catch((e) => {
+      if (logger) logger.typingError('Queued keystrokes failed', e);
+    });
+  return keystrokeQueue;
+}
+
+function pressBackspaces(count) {
+  if (!count || !robot || !robot.keyTap) return;
+  enqueueKeystrokes(() => {
+    try {
+      for (let i = 0; i < count; i++) {
+        robot.keyTap('backspace');
+      }
+    } catch (e) {
+      if (logger) logger.typingError('Backspace failed', e);
+    }
+  });
+}
+
+// Apply an EDIT from the whisper service: erase `bs` characters, then type `text`.
+// Keystrokes scale with the change rather than with the whole hypothesis.
+function applyTextEdit(edit) {
+  const backspaces = Math.min(edit.bs || 0, typedHypothesis.length);
+  pressBackspaces(backspaces);
+  if (edit.text) {
+    typeStringRobot(edit.text);
+  }
+  typedHypothesis = typedHypothesis.slice(0, typedHypothesis.length - backspaces) + (edit.text || '');
+  return typedHypothesis;
+}
+
+// Reset recording UI state once final text starts arriving (covers HOLD release)
+function endRecordingUi() {
+  try { 
+    mainWindow.webContents.send('recording-stop');
+    mainWindow.webContents.send('play-sound', 'stop');
+  } catch (e) {}
+  hideIndicator();
+  isRecording = false;
+  isHoldKeyPressed = false;
+  if (holdRecordingTimeout) {
+    clearTimeout(holdRecordingTimeout);
+    holdRecordingTimeout = null;
+  }
+}
+
 // Incremental typing: type only new words that haven't been typed yet
 function typeIncrementalText(newText, isPartial = false) {
   if (!newText || !newText.trim()) return '';
@@ -511,8 +567,9 @@ function typeStringRobot(text) {
     mainWindow.blur();
   }
   
-  // Also hide indicator window to prevent focus stealing
-  if (indicatorWindow && !indicatorWindow.isDestroyed()) {
+  // Also hide indicator window to prevent focus stealing, except while
+  // partials are typed mid-recording: it is shown inactive and carries the level meter
+  if (indicatorWindow && !indicatorWindow.isDestroyed() && !isRecording) {
     indicatorWindow.hide();
   }
   
@@ -521,23 +578,20 @@ function typeStringRobot(text) {
   const useRobotjsFirst = true;
   
   if (useRobotjsFirst && robot && robotType === 'robotjs' && robot.typeString) {
-    // INSTANT METHOD: Direct robotjs.typeString with minimal delay (5ms for focus)
-    // Using setImmediate for fastest possible execution
-    setImmediate(() => {
-      // Absolute minimum delay - just enough for Windows focus switch
-      setTimeout(() => {
-        try {
-          robot.typeString(text);
-          const totalTime = Date.now() - startTime;
-          if (logger) logger.typing('✓ Typed with robotjs.typeString', { total_duration_ms: totalTime });
-          console.log(`✓ Typed successfully in ${totalTime}ms`);
-          return;
-        } catch (e) {
-          if (logger) logger.typingError('robotjs.typeString failed, falling back to clipboard', e);
-          // Fall through to clipboard method
-        }
-      }, 5); // Reduced to 5ms - absolute minimum for Windows focus
-    });
+    // INSTANT METHOD: Direct robotjs.typeString, queued behind earlier keystrokes
+    // with the 5ms minimum delay for the Windows focus switch
+    enqueueKeystrokes(() => {
+      try {
+        robot.typeString(text);
+        const totalTime = Date.now() - startTime;
+        if (logger) logger.typing('✓ Typed with robotjs.typeString', { total_duration_ms: totalTime });
+        console.log(`✓ Typed successfully in ${totalTime}ms`);
+        return;
+      } catch (e) {
+        if (logger) logger.typingError('robotjs.typeString failed, falling back to clipboard', e);
+        // Fall through to clipboard method
+      }
+    }, 5);
     
     // Also set up clipboard fallback in parallel (in case robotjs fails)
     if (robot && robot.keyTap) {
@@ -554,48 +608,46 @@ function typeStringRobot(text) {
       });
     }
   } else if (useRobotjsFirst && robotType === 'robot-js' && robot && robot.Keyboard && robot.Keyboard.typeString) {
-    // FASTEST METHOD: Direct robot-js typing
-    process.nextTick(() => {
+    // FASTEST METHOD: Direct robot-js typing, queued behind earlier keystrokes
+    enqueueKeystrokes(() => {
+      try {
+        robot.Keyboard.typeString(text);
+        const totalTime = Date.now() - startTime;
+        if (logger) logger.typing('✓ Typed with robot-js', { total_duration_ms: totalTime });
+        console.log(`✓ Typed successfully in ${totalTime}ms`);
+        return;
+      } catch (e) {
+        if (logger) logger.typingError('robot-js.Keyboard.typeString failed, falling back to clipboard', e);
+        // Fall through to clipboard method
+      }
+    }, 10); // Reduced to 10ms for faster response
+  } else if (robot && robot.keyTap) {
+    // FALLBACK: Clipboard + Ctrl+V (slower but reliable); the paste holds the
+    // keystroke queue until it is done. Minimal delay for focus switching (15ms)
+    enqueueKeystrokes(() => new Promise((resolve) => {
+      try {
+        clipboard.writeText(text);
+        if (logger) logger.typing('Text copied to clipboard', { duration_ms: Date.now() - startTime });
+      } catch (clipErr) {
+        if (logger) logger.typingError('Clipboard failed', clipErr);
+        console.error('Failed to copy to clipboard:', clipErr);
+        resolve();
+        return;
+      }
+      // Immediate paste with minimal delay
       setTimeout(() => {
         try {
-          robot.Keyboard.typeString(text);
+          robot.keyTap('v', 'control');
           const totalTime = Date.now() - startTime;
-          if (logger) logger.typing('✓ Typed with robot-js', { total_duration_ms: totalTime });
+          if (logger) logger.typing('✓ Pasted successfully with Ctrl+V', { total_duration_ms: totalTime });
           console.log(`✓ Typed successfully in ${totalTime}ms`);
-          return;
-        } catch (e) {
-          if (logger) logger.typingError('robot-js.Keyboard.typeString failed, falling back to clipboard', e);
-          // Fall through to clipboard method
-        }
-      }, 10); // Reduced to 10ms for faster response
-    });
-  } else if (robot && robot.keyTap) {
-    // FALLBACK: Clipboard + Ctrl+V (slower but reliable)
-    setImmediate(() => {
-      // Minimal delay for focus switching (reduced from 50ms to 15ms)
-      setTimeout(() => {
-        try {
-          clipboard.writeText(text);
-          if (logger) logger.typing('Text copied to clipboard', { duration_ms: Date.now() - startTime });
-          
-          // Immediate paste with minimal delay
-          setTimeout(() => {
-            try {
-              robot.keyTap('v', 'control');
-              const totalTime = Date.now() - startTime;
-              if (logger) logger.typing('✓ Pasted successfully with Ctrl+V', { total_duration_ms: totalTime });
-              console.log(`✓ Typed successfully in ${totalTime}ms`);
-            } catch (pasteErr) {
-              if (logger) logger.typingError('Paste failed', pasteErr);
-              console.warn('Text is in clipboard, use Ctrl+V manually');
-            }
-          }, 10); // Reduced from 20ms to 10ms
-        } catch (clipErr) {
-          if (logger) logger.typingError('Clipboard failed', clipErr);
-          console.error('Failed to copy to clipboard:', clipErr);
+        } catch (pasteErr) {
+          if (logger) logger.typingError('Paste failed', pasteErr);
+          console.warn('Text is in clipboard, use Ctrl+V manually');
         }
-      }, 15); // Reduced from 50ms to 15ms
-    });
+        resolve();
+      }, 10); // Reduced from 20ms to 10ms
+    }), 15);
   } else {
     // FINAL FALLBACK: Clipboard only (no robotjs available)
     setImmediate(() => {
@@ -890,8 +942,47 @@ function ensureWhisperService() {
   // Set WHISPER_MODEL environment variable
   const env = { ...process.env };
   env.WHISPER_MODEL = settings.activeModel || 'tiny';
+  // Replacement/casing rules are applied inside the service to partials and finals alike
+  env.WHISPER_DICTIONARY = path.join(__dirname, 'data', 'dictionary.json');
+  // Host the model in a separate decode process (shared-memory audio) when enabled
+  env.WHISPER_DECODE_WORKER = settings.decodeWorker ? '1' : '0';
+  // Partials as edit operations (backspace N, then type) need key taps for backspace
+  env.WHISPER_PARTIAL_DELTAS = (settings.partialDeltas !== false && robot && robot.keyTap) ? '1' : '0';
+  // Stream the final transcript segment by segment (SEGMENT: lines + EVENT: COMMIT)
+  env.WHISPER_STREAM_FINAL = settings.streamFinal ? '1' : '0';
+  // Translate each committed segment as it arrives (TRANSLATION: lines); '' turns it off
+  env.WHISPER_TRANSLATE_TO = dictationTranslateTo();
+  // Input level events for the widget waveform (0 turns them off, as does waveform_animation: false)
+  env.WHISPER_LEVEL_HZ = String(whisperLevelHz());
+  // Reserve a core ('auto' or an index) and raised priority for audio capture
+  if (settings.captureCore !== undefined && settings.captureCore !== null && settings.captureCore !== '') {
+    env.WHISPER_CAPTURE_CORE = String(settings.captureCore);
+  }
+  env.WHISPER_CAPTURE_PRIORITY = settings.captureHighPriority ? '1' : '0';
+  // GGML models (.bin/.gguf) run on whisper.cpp, everything else on faster-whisper
+  env.WHISPER_BACKEND = settings.whisperBackend || 'auto';
+  try {
+    const downloadSettings = JSON.parse(fs.readFileSync(path.join(__dirname, 'data', 'settings.json'), 'utf8'));
+    if (downloadSettings.model_download_path) {
+      env.WHISPER_MODEL_DIRS = [
+        downloadSettings.model_download_path,
+        modelDownloader.getDefaultDownloadPath(),
+        path.join(__dirname, 'models')
+      ].join(path.delimiter);
+    }
+  } catch (e) {}
+  // Unload the model after this many idle minutes (0 keeps it resident)
+  env.WHISPER_IDLE_UNLOAD = String(Math.max(0, Number(settings.idleUnloadMinutes) || 0) * 60);
+  // Also unload early (after 30s idle) when available RAM drops below this many MB
+  env.WHISPER_MIN_AVAILABLE_MB = String(Math.max(0, Number(settings.unloadBelowAvailableMB) || 0));
   
-  whisperProcess = spawn(pythonCmd, [pythonScript], { 
+  // SONU_PROFILE_STARTUP=1 makes the service report a per-phase startup timeline
+  const whisperArgs = [pythonScript];
+  if (settings.profileStartup || process.env.SONU_PROFILE_STARTUP) {
+    whisperArgs.push('--profile-startup');
+  }
+
+  whisperProcess = spawn(pythonCmd, whisperArgs, { 
     stdio: ['pipe', 'pipe', 'pipe'],
     shell: process.platform === 'win32',
     env: env
@@ -934,12 +1025,69 @@ function ensureWhisperService() {
             mainWindow.minimize();
             mainWindow.blur();
           }
-          if (indicatorWindow && !indicatorWindow.isDestroyed()) {
-            indicatorWindow.hide();
-          }
+          // The indicator stays up while recording: it is never focusable
+          // (shown inactive), and it carries the live level meter
           
-          // Type only the NEW words from this partial
-          typeIncrementalText(partial, true); // true = isPartial
+          // Type only the NEW words from this partial. A streaming final types
+          // the whole transcript itself, so typed partials would duplicate it
+          if (!settings.streamFinal) {
+            typeIncrementalText(partial, true); // true = isPartial
+          }
+        }
+        continue;
+      }
+      // Delta partials/finals: apply the edit instead of diffing full strings
+      if (raw.startsWith('EDIT:')) {
+        const edit = parseWhisperEventPayload(raw);
+        if (!edit) continue;
+        let text = typedHypothesis;
+        try {
+          text = applyTextEdit(edit);
+        } catch (e) {
+          console.error('Failed to apply edit:', e);
+        }
+        if (!edit.final) {
+          try { mainWindow.webContents.send('transcription-partial', text); } catch (e) {}
+          continue;
+        }
+        typedHypothesis = '';
+        lastTypedText = '';
+        if (text) {
+          console.log('Received transcription text:', text);
+          try { clipboard.writeText(text); } catch (e) {}
+          appendHistory(text);
+          mainWindow.webContents.send('transcription', text);
+        }
+        endRecordingUi();
+        continue;
+      }
+      // Pipeline translation of a committed segment: shown, never typed
+      if (raw.startsWith('TRANSLATION:')) {
+        const translation = parseWhisperEventPayload(raw);
+        if (translation && mainWindow && !mainWindow.isDestroyed()) {
+          mainWindow.webContents.send('transcription-translation', translation);
+        }
+        continue;
+      }
+      // Streaming final: type each segment as soon as the service decodes it
+      if (raw.startsWith('SEGMENT:')) {
+        const segment = raw.slice(8).trim();
+        if (!segment) continue;
+        if (!streamedFinalText) {
+          endRecordingUi();
+          // Delta partials already typed a hypothesis of this recording: take it
+          // back (queued before the segment's keystrokes) so the final is not typed twice
+          if (typedHypothesis) {
+            pressBackspaces(typedHypothesis.length);
+            typedHypothesis = '';
+          }
+        }
+        const toType = streamedFinalText ? ` ${segment}` : segment;
+        streamedFinalText += toType;
+        try {
+          typeStringRobot(toType);
+        } catch (e) {
+          console.error('Failed to type segment:', e);
         }
         continue;
       }
@@ -994,6 +1142,89 @@ function ensureWhisperService() {
           isRecording = false;
           continue;
         }
+        if (evt.startsWith('COMMIT')) {
+          // Streaming final complete: the joined segments are the transcription
+          const info = parseWhisperEventPayload(raw);
+          const text = streamedFinalText;
+          streamedFinalText = '';
+          lastTypedText = '';
+          if (logger) logger.whisper('Streaming final committed', info);
+          if (text) {
+            try { clipboard.writeText(text); } catch (e) {}
+            appendHistory(text);
+            mainWindow.webContents.send('transcription', text);
+          }
+          continue;
+        }
+        if (evt.startsWith('FINAL_FAILED')) {
+          // The final decode raised; any text the partials typed was committed above
+          const info = parseWhisperEventPayload(raw);
+          if (logger) logger.whisperError('Final transcription failed', info);
+          streamedFinalText = '';
+          typedHypothesis = '';
+          lastTypedText = '';
+          endRecordingUi();
+          if (mainWindow && !mainWindow.isDestroyed()) {
+            mainWindow.webContents.send('show-message', {
+              type: 'warning',
+              message: 'Transcription failed for this recording.',
+              duration: 3000
+            });
+          }
+          continue;
+        }
+        if (evt.startsWith('CANCELLED')) {
+          // Recording discarded; in-flight decodes were abandoned by the service
+          streamedFinalText = '';
+          typedHypothesis = '';
+          const info = parseWhisperEventPayload(raw);
+          if (logger) logger.whisper('Recording cancelled', info);
+          continue;
+        }
+        if (evt.startsWith('MODEL_UNLOADED')) {
+          // Idle policy released the model; the next START reloads it, so
+          // whisperModelReady stays true and dictation is not blocked
+          const info = parseWhisperEventPayload(raw);
+          if (logger) logger.whisper('Whisper model unloaded', info);
+          continue;
+        }
+        if (evt.startsWith('MODEL_RELOADED')) {
+          const info = parseWhisperEventPayload(raw);
+          if (logger) logger.whisper('Whisper model reloaded', info);
+          continue;
+        }
+        if (evt.startsWith('LEVEL')) {
+          // Live input level for the widget waveform (~20 Hz while recording);
+          // sent while the widget is shown, even if typing hid its window for a moment
+          if (indicatorWindow && !indicatorWindow.isDestroyed() && indicatorState === 'visible') {
+            const levels = parseWhisperEventPayload(raw);
+            if (levels) indicatorWindow.webContents.send('audio-level', levels);
+          }
+          continue;
+        }
+        if (evt.startsWith('CAPTURE')) {
+          // Per-recording capture accounting (overflows, read errors, late reads)
+          const report = parseWhisperEventPayload(raw);
+          if (report && (report.overflows || report.read_errors) && logger) {
+            logger.whisper('Audio lost during recording', report);
+          }
+          if (report && mainWindow && !mainWindow.isDestroyed()) {
+            mainWindow.webContents.send('whisper-capture', report);
+          }
+          continue;
+        }
+        if (evt.startsWith('STARTUP')) {
+          const timeline = parseWhisperEventPayload(raw);
+          if (logger) logger.whisper('Whisper service startup timeline', timeline);
+          continue;
+        }
+        if (evt.startsWith('STATS')) {
+          const whisperStats = parseWhisperEventPayload(raw);
+          if (whisperStats && mainWindow && !mainWindow.isDestroyed()) {
+            mainWindow.webContents.send('whisper-stats', whisperStats);
+          }
+          continue;
+        }
         if (evt === 'RELEASE') {
           // CRITICAL: Hide indicator FIRST, before any other operations
           // This must be synchronous and immediate - no async operations
@@ -1028,17 +1259,7 @@ function ensureWhisperService() {
         appendHistory(text);
         mainWindow.webContents.send('transcription', text);
         // Update UI state after a transcription completes (covers HOLD release)
-        try { 
-          mainWindow.webContents.send('recording-stop');
-          mainWindow.webContents.send('play-sound', 'stop');
-        } catch (e) {}
-        hideIndicator();
-        isRecording = false;
-        isHoldKeyPressed = false;
-        if (holdRecordingTimeout) {
-          clearTimeout(holdRecordingTimeout);
-          holdRecordingTimeout = null;
-        }
+        endRecordingUi();
         // INSTANT TYPING: Type only the delta (new words not in last partial)
         // This ensures we don't retype what we already typed from partials
         try {
@@ -1096,6 +1317,112 @@ function ensureWhisperService() {
   });
 }
 
+// Long-lived Python helper (helper_daemon.py): JSON-RPC over stdin/stdout so
+// system info, disk space and translation calls reuse one warm interpreter
+let pythonHelperProcess = null;
+let pythonHelperBuffer = '';
+let pythonHelperNextId = 1;
+const pythonHelperPending = new Map();
+
+function ensurePythonHelper() {
+  if (pythonHelperProcess && !pythonHelperProcess.killed) return pythonHelperProcess;
+  const pythonCmd = findPythonExecutable();
+  if (!pythonCmd) throw new Error('Python not found');
+
+  pythonHelperProcess = spawn(pythonCmd, [path.join(__dirname, 'helper_daemon.py')], {
+    stdio: ['pipe', 'pipe', 'pipe'],
+    shell: process.platform === 'win32'
+  });
+  pythonHelperBuffer = '';
+
+  pythonHelperProcess.stdout.on('data', (data) => {
+    pythonHelperBuffer += data.toString();
+    const lines = pythonHelperBuffer.split('\n');
+    pythonHelperBuffer = lines.pop() || '';
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      let response;
+      try {
+        response = JSON.parse(line);
+      } catch (e) {
+        console.error('Invalid helper response:', line);
+        continue;
+      }
+      const pending = pythonHelperPending.get(response.id);
+      if (!pending) continue;
+      pythonHelperPending.delete(response.id);
+      clearTimeout(pending.timer);
+      if (response.error) {
+        pending.reject(new Error(response.error.message));
+      } else {
+        pending.resolve(response.result);
+      }
+    }
+  });
+
+  pythonHelperProcess.stderr.on('data', (data) => {
+    console.log('Python helper:', data.toString().trim());
+  });
+
+  const onGone = () => {
+    pythonHelperProcess = null;
+    pythonHelperBuffer = '';
+    for (const pending of pythonHelperPending.values()) {
+      clearTimeout(pending.timer);
+      pending.reject(new Error('Python helper exited'));
+    }
+    pythonHelperPending.clear();
+  };
+  pythonHelperProcess.on('exit', onGone);
+  pythonHelperProcess.on('error', onGone);
+  return pythonHelperProcess;
+}
+
+// A cold system.info/profile imports torch and probes GPUs, and a locale
+// translation makes many network calls: both can take well over 15 s
+const PYTHON_HELPER_TIMEOUTS = {
+  'system.info': 90000,
+  'system.profile': 90000,
+  'translation.translate_dict': 180000,
+};
+const PYTHON_HELPER_DEFAULT_TIMEOUT = 30000;
+
+function callPythonHelper(method, params = {}, timeoutMs = PYTHON_HELPER_TIMEOUTS[method] || PYTHON_HELPER_DEFAULT_TIMEOUT) {
+  return new Promise((resolve, reject) => {
+    let helper;
+    try {
+      helper = ensurePythonHelper();
+    } catch (e) {
+      reject(e);
+      return;
+    }
+    const id = pythonHelperNextId++;
+    const timer = setTimeout(() => {
+      pythonHelperPending.delete(id);
+      reject(new Error(`Python helper timed out on ${method}`));
+    }, timeoutMs);
+    pythonHelperPending.set(id, { resolve, reject, timer });
+    try {
+      helper.stdin.write(JSON.stringify({ jsonrpc: '2.0', id, method, params }) + '\n');
+    } catch (e) {
+      clearTimeout(timer);
+      pythonHelperPending.delete(id);
+      reject(e);
+    }
+  });
+}
+
+// Events like `EVENT: STATS {...}` carry a JSON payload after the event name
+function parseWhisperEventPayload(raw) {
+  const start = raw.indexOf('{');
+  if (start === -1) return null;
+  try {
+    return JSON.parse(raw.slice(start));
+  } catch (e) {
+    return null;
+  }
+}
+
 function writeToWhisper(command) {
   if (!whisperProcess || whisperProcess.killed) {
     console.error('Whisper process not available, ensuring service...');
@@ -1126,6 +1453,41 @@ function writeToWhisper(command) {
   }
 }
 
+function preloadWhisperModel() {
+  // Hotkey-down pre-signal: if the service unloaded the model while idle it
+  // starts reloading (and reopens the mic) before START arrives
+  if (whisperProcess && !whisperProcess.killed) {
+    writeToWhisper('PRELOAD\n');
+  }
+}
+
+// Level events drive the widget waveform; none are computed when the
+// waveform_animation app setting (data/settings.json) is off
+function whisperLevelHz() {
+  try {
+    const appSettings = JSON.parse(fs.readFileSync(path.join(__dirname, 'data', 'settings.json'), 'utf8'));
+    if (appSettings.waveform_animation === false) return 0;
+  } catch (e) {}
+  return settings.levelMeterHz === undefined ? 20 : Number(settings.levelMeterHz) || 0;
+}
+
+// Language committed dictation is translated into (dictation_translate_to app
+// setting, data/settings.json); '' leaves pipeline translation off
+function dictationTranslateTo() {
+  try {
+    const appSettings = JSON.parse(fs.readFileSync(path.join(__dirname, 'data', 'settings.json'), 'utf8'));
+    if (appSettings.dictation_translate_to !== undefined) return appSettings.dictation_translate_to || '';
+  } catch (e) {}
+  return settings.dictationTranslateTo || '';
+}
+
+// Ask the whisper service to recompile its replacement table after dictionary edits
+function reloadWhisperDictionary() {
+  if (whisperProcess && !whisperProcess.killed) {
+    writeToWhisper('RELOAD_DICTIONARY\n');
+  }
+}
+
 function registerHotkeys() {
   globalShortcut.unregisterAll();
   const holdAcc = settings.holdHotkey || 'CommandOrControl+Super+Space';
@@ -1218,6 +1580,8 @@ function startHoldRecording() {
   if (isHoldKeyPressed || isRecording) {
     return;
   }
+
+  preloadWhisperModel();
   
   // If model not ready, queue this action and show subtle indicator
   if (!whisperModelReady) {
@@ -1232,6 +1596,7 @@ function startHoldRecording() {
       isHoldKeyPressed = true;
       isRecording = true;
   lastTypedText = ''; // Reset typing state for new recording
+  typedHypothesis = '';
       typedSoFar = '';
       
       mainWindow.hide();
@@ -1272,6 +1637,7 @@ function startHoldRecording() {
   isHoldKeyPressed = true;
   isRecording = true;
   lastTypedText = ''; // Reset typing state for new recording
+  typedHypothesis = '';
   typedSoFar = '';
   
   // Hide window FIRST for ultra-fast response
@@ -1331,6 +1697,7 @@ function startHoldRecording() {
 }
 
 function startToggleRecording() {
+  preloadWhisperModel();
   // If model not ready, queue this action and show indicator
   if (!whisperModelReady) {
     console.log('⚡ Model loading... queuing toggle recording');
@@ -1342,6 +1709,7 @@ function startToggleRecording() {
     pendingRecordingAction = () => {
       isRecording = true;
   lastTypedText = ''; // Reset typing state for new recording
+  typedHypothesis = '';
       typedSoFar = '';
       
       mainWindow.hide();
@@ -1361,6 +1729,7 @@ function startToggleRecording() {
   
   isRecording = true;
   lastTypedText = ''; // Reset typing state for new recording
+  typedHypothesis = '';
   typedSoFar = '';
   
   // Hide window FIRST for ultra-fast response
@@ -1482,13 +1851,16 @@ function appendHistory(text) {
     });
     
     ipcMain.on('widget-cancel-recording', () => {
+      // Always cancel: a final decode may still be running after a hold release
+      writeToWhisper('CANCEL\n');
+      lastTypedText = '';
+      typedHypothesis = '';
       if (isRecording) {
         if (holdRecordingTimeout) {
           clearTimeout(holdRecordingTimeout);
           holdRecordingTimeout = null;
         }
         isRecording = false;
-        writeToWhisper('STOP\n');
         hideIndicator();
         try { 
           mainWindow.webContents.send('recording-stop');
@@ -1506,6 +1878,13 @@ function appendHistory(text) {
       registerHotkeys();
     });
 
+    // Decode/cancel statistics come back asynchronously as 'whisper-stats'
+    ipcMain.on('whisper-request-stats', () => {
+      if (whisperProcess && !whisperProcess.killed) {
+        writeToWhisper('STATS\n');
+      }
+    });
+
   ipcMain.handle('settings:get', async () => settings);
   ipcMain.handle('settings:set', async (_evt, newSettings) => {
     const incoming = { ...newSettings };
@@ -1650,7 +2029,13 @@ function appendHistory(text) {
       }
     }
     
-    // Try Python script first
+    // Warm helper process first, then a one-shot script, then Node.js
+    try {
+      return await callPythonHelper('system.info');
+    } catch (e) {
+      console.log('Python helper unavailable for system info:', e.message);
+    }
+
     try {
       const systemUtilsPath = path.join(__dirname, 'system_utils.py');
       const pythonCommands = ['python3', 'python'];
@@ -1746,6 +2131,12 @@ function appendHistory(text) {
 
   // System profile handler - returns detailed system info with recommendations
   ipcMain.handle('system:get-profile', async () => {
+    try {
+      return await callPythonHelper('system.profile');
+    } catch (e) {
+      console.log('Python helper unavailable for system profile:', e.message);
+    }
+
     try {
       const systemUtilsPath = path.join(__dirname, 'system_utils.py');
       const pythonExecutable = findPythonExecutable();
@@ -1846,7 +2237,16 @@ function appendHistory(text) {
 
   // Get available disk space - with Node.js fallback
   ipcMain.handle('model:get-space', async () => {
-    // First try Python script
+    try {
+      const result = await callPythonHelper('models.space');
+      if (result && result.success) {
+        return { success: true, space_gb: result.space_gb || 0, path: result.path || '' };
+      }
+    } catch (e) {
+      console.log('Python helper unavailable for disk space:', e.message);
+    }
+
+    // Then try a one-shot Python script
     try {
       const modelManagerPath = path.join(__dirname, 'model_manager.py');
       
@@ -3256,6 +3656,14 @@ function appendHistory(text) {
         return { error: 'Translation service not found', translated: text };
       }
 
+      try {
+        return await callPythonHelper('translation.translate', {
+          text, target_lang: targetLang, source_lang: sourceLang
+        });
+      } catch (e) {
+        console.log('Python helper unavailable for translation:', e.message);
+      }
+
       // Call Python translation service
       const result = execSync(
         `python "${translationServicePath}" translate "${text.replace(/"/g, '\\"')}" ${sourceLang} ${targetLang}`,
@@ -3279,6 +3687,14 @@ function appendHistory(text) {
         return { error: 'Translation service not found', translated: translationsJson };
       }
 
+      try {
+        return await callPythonHelper('translation.translate_dict', {
+          translations_dict: translationsJson, target_lang: targetLang, source_lang: sourceLang
+        });
+      } catch (e) {
+        console.log('Python helper unavailable for translation:', e.message);
+      }
+
       // Escape JSON for command line
       const escapedJson = JSON.stringify(translationsJson).replace(/"/g, '\\"');
       
@@ -3305,6 +3721,12 @@ function appendHistory(text) {
         return { available: false, error: 'Translation service not found' };
       }
 
+      try {
+        return await callPythonHelper('translation.check');
+      } catch (e) {
+        console.log('Python helper unavailable for translation check:', e.message);
+      }
+
       const result = execSync(
         `python "${translationServicePath}" check`,
         { encoding: 'utf8', maxBuffer: 1024 * 1024 }
@@ -3377,6 +3799,12 @@ function appendHistory(text) {
       }
       const updated = { ...currentSettings, ...newSettings };
       fs.writeFileSync(appSettingsPath, JSON.stringify(updated, null, 2));
+      if ('waveform_animation' in newSettings && whisperProcess && !whisperProcess.killed) {
+        writeToWhisper(`SET_LEVEL_HZ ${whisperLevelHz()}\n`);
+      }
+      if ('dictation_translate_to' in newSettings && whisperProcess && !whisperProcess.killed) {
+        writeToWhisper(`SET_TRANSLATE ${dictationTranslateTo() || 'OFF'}\n`);
+      }
       return updated;
     } catch (e) {
       console.error('Error saving app settings:', e);
@@ -3472,13 +3900,42 @@ function appendHistory(text) {
   // Dictionary handlers
   const dictionaryPath = path.join(__dirname, 'data', 'dictionary.json');
   
+  // Entries are plain words ("vocabulary"), casing rules ("iPhone") or
+  // replacements ("btw => by the way", or {"from": ..., "to": ...} in the file).
+  // Only the match side is case-insensitive; words and targets keep their case.
+  const dictionaryEntryText = (entry) => {
+    if (entry && typeof entry === 'object') {
+      return `${String(entry.from || '').trim()} => ${String(entry.to || '').trim()}`;
+    }
+    return String(entry).trim();
+  };
+  const normalizeDictionaryEntry = (entry) => {
+    const text = dictionaryEntryText(entry);
+    const arrow = text.indexOf('=>');
+    if (arrow === -1) return text;
+    const source = text.slice(0, arrow).trim().toLowerCase();
+    const target = text.slice(arrow + 2).trim();
+    return source && target ? `${source} => ${target}` : '';
+  };
+  const dictionaryEntryKey = (entry) => {
+    const text = dictionaryEntryText(entry);
+    const arrow = text.indexOf('=>');
+    return (arrow === -1 ? text : text.slice(0, arrow)).trim().toLowerCase();
+  };
+  const readDictionary = () => {
+    if (!fs.existsSync(dictionaryPath)) return [];
+    const entries = JSON.parse(fs.readFileSync(dictionaryPath, 'utf8'));
+    return Array.isArray(entries) ? entries.map(dictionaryEntryText).filter(w => w) : [];
+  };
+  const writeDictionary = (words) => {
+    words.sort((a, b) => dictionaryEntryKey(a).localeCompare(dictionaryEntryKey(b)));
+    fs.writeFileSync(dictionaryPath, JSON.stringify(words, null, 2));
+    reloadWhisperDictionary();
+  };
+  
   ipcMain.handle('dictionary:get', async () => {
     try {
-      if (fs.existsSync(dictionaryPath)) {
-        const raw = fs.readFileSync(dictionaryPath, 'utf8');
-        return JSON.parse(raw);
-      }
-      return [];
+      return readDictionary();
     } catch (e) {
       console.error('Error loading dictionary:', e);
       return [];
@@ -3487,46 +3944,29 @@ function appendHistory(text) {
 
   ipcMain.handle('dictionary:add', async (_evt, word) => {
     try {
-      let words = [];
-      if (fs.existsSync(dictionaryPath)) {
-        const raw = fs.readFileSync(dictionaryPath, 'utf8');
-        words = JSON.parse(raw);
-      }
+      const words = readDictionary();
       
-      // Normalize the input word
-      const normalizedWord = word.toLowerCase().trim();
+      // Normalize the input: lowercase match key, original casing for the word or target
+      const normalizedWord = normalizeDictionaryEntry(word);
       
       // Validate input
       if (!normalizedWord) {
-        return { success: false, words, error: 'Please enter a valid word' };
+        return { success: false, words, error: 'Please enter a word, a casing like "iPhone" or "btw => by the way"' };
       }
       
-      // Check for duplicates (case-insensitive)
-      // Normalize all existing words for comparison
-      const normalizedWords = words.map(w => {
-        const str = String(w);
-        return str.toLowerCase().trim();
-      }).filter(w => w);
-      
-      // Check if word already exists (case-insensitive)
-      if (normalizedWords.includes(normalizedWord)) {
-        // Find the original casing if it exists to show in error message
-        const existingWord = words.find(w => {
-          const str = String(w);
-          return str.toLowerCase().trim() === normalizedWord;
-        });
-        const displayWord = existingWord || normalizedWord;
+      // Check for duplicates (case-insensitive on the match key)
+      const key = dictionaryEntryKey(normalizedWord);
+      const existingWord = words.find(w => dictionaryEntryKey(w) === key);
+      if (existingWord) {
         return { 
           success: false, 
           words, 
-          error: `"${displayWord}" already exists in the dictionary` 
+          error: `"${existingWord}" already exists in the dictionary` 
         };
       }
       
-      // Add the word (store in original casing but check duplicates case-insensitively)
       words.push(normalizedWord);
-      words.sort();
-      fs.writeFileSync(dictionaryPath, JSON.stringify(words, null, 2));
+      writeDictionary(words);
       return { success: true, words };
     } catch (e) {
       console.error('Error adding to dictionary:', e);
@@ -3536,31 +3976,21 @@ function appendHistory(text) {
 
   ipcMain.handle('dictionary:update', async (_evt, oldWord, newWord) => {
     try {
-      let words = [];
-      if (fs.existsSync(dictionaryPath)) {
-        const raw = fs.readFileSync(dictionaryPath, 'utf8');
-        words = JSON.parse(raw);
-      }
-      const normalizedOldWord = oldWord.toLowerCase().trim();
-      const normalizedNewWord = newWord.toLowerCase().trim();
-      
-      // Normalize all existing words for comparison
-      const normalizedWords = words.map(w => {
-        const str = String(w);
-        return str.toLowerCase().trim();
-      }).filter(w => w);
+      const words = readDictionary();
+      const oldKey = dictionaryEntryKey(oldWord);
+      const normalizedNewWord = normalizeDictionaryEntry(newWord);
+      const newKey = dictionaryEntryKey(normalizedNewWord);
       
       // Check if new word already exists (and it's not the same as old word)
-      if (normalizedNewWord && normalizedNewWord !== normalizedOldWord && normalizedWords.includes(normalizedNewWord)) {
+      if (normalizedNewWord && newKey !== oldKey && words.some(w => dictionaryEntryKey(w) === newKey)) {
         return { success: false, words, error: 'Word already exists' };
       }
       
       // Update the word
-      const index = normalizedWords.indexOf(normalizedOldWord);
-      if (index !== -1) {
+      const index = words.findIndex(w => dictionaryEntryKey(w) === oldKey);
+      if (index !== -1 && normalizedNewWord) {
         words[index] = normalizedNewWord;
-        words.sort();
-        fs.writeFileSync(dictionaryPath, JSON.stringify(words, null, 2));
+        writeDictionary(words);
         return { success: true, words };
       }
       return { success: false, words, error: 'Word not found' };
@@ -3572,13 +4002,9 @@ function appendHistory(text) {
 
   ipcMain.handle('dictionary:delete', async (_evt, word) => {
     try {
-      let words = [];
-      if (fs.existsSync(dictionaryPath)) {
-        const raw = fs.readFileSync(dictionaryPath, 'utf8');
-        words = JSON.parse(raw);
-      }
-      words = words.filter(w => w !== word.toLowerCase().trim());
-      fs.writeFileSync(dictionaryPath, JSON.stringify(words, null, 2));
+      const key = dictionaryEntryKey(word);
+      const words = readDictionary().filter(w => dictionaryEntryKey(w) !== key);
+      writeDictionary(words);
       return words;
     } catch (e) {
       console.error('Error deleting from dictionary:', e);
@@ -3913,6 +4339,9 @@ function wait(ms) {
   if (whisperProcess && !whisperProcess.killed) {
     whisperProcess.kill();
   }
+  if (pythonHelperProcess && !pythonHelperProcess.killed) {
+    pythonHelperProcess.kill();
+  }
   if (indicatorWindow && !indicatorWindow.isDestroyed()) {
     try { indicatorWindow.destroy(); } catch (e) {}
   }
@@ -76,8 +76,8 @@ def get_model_path(model, download_root=None):
     model_dir = f"models--openai--whisper-{model}"
     return cache_base / model_dir
 
-def get_space():
-    """Get available disk space and cache path."""
+def space_info():
+    """Return available disk space and cache path."""
     try:
         cache_dir = get_model_path("tiny").parent  # Use parent of any model path
         cache_dir.mkdir(parents=True, exist_ok=True)
@@ -85,22 +85,23 @@ def get_space():
         total, used, free = shutil.disk_usage(str(cache_dir))
         space_gb = round(free / (1024 ** 3), 2)
         
-        result = {
+        return {
             "success": True,
             "space_gb": space_gb,
             "path": str(cache_dir)
         }
-        print(json.dumps(result))
-        sys.stdout.flush()
     except Exception as e:
-        result = {
+        return {
             "success": False,
             "error": str(e),
             "space_gb": 0,
             "path": str(CACHE_DIR)
         }
-        print(json.dumps(result))
-        sys.stdout.flush()
+
+def get_space():
+    """Print available disk space and cache path as JSON."""
+    print(json.dumps(space_info()))
+    sys.stdout.flush()
 
 def is_downloaded(model, download_root=None):
     """Check if a model is already downloaded."""
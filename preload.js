@@ -3,6 +3,7 @@ const { contextBridge, ipcRenderer, clipboard } = require('electron');
 contextBridge.exposeInMainWorld('voiceApp', {
   onTranscription: (callback) => ipcRenderer.on('transcription', (_, text) => callback(text)),
   onTranscriptionPartial: (callback) => ipcRenderer.on('transcription-partial', (_, text) => callback(text)),
+  onTranscriptionTranslation: (callback) => ipcRenderer.on('transcription-translation', (_, translation) => callback(translation)),
   onRecordingStart: (callback) => ipcRenderer.on('recording-start', callback),
   onRecordingStop: (callback) => ipcRenderer.on('recording-stop', callback),
   toggleRecording: () => ipcRenderer.send('toggle-recording'),
@@ -52,6 +53,9 @@ contextBridge.exposeInMainWorld('voiceApp', {
   cancelDownload: () => ipcRenderer.invoke('model:cancel-download'),
   onWhisperReady: (callback) => ipcRenderer.on('whisper-ready', (_, data) => callback(data)),
   onWhisperError: (callback) => ipcRenderer.on('whisper-error', (_, error) => callback(error)),
+  requestWhisperStats: () => ipcRenderer.send('whisper-request-stats'),
+  onWhisperStats: (callback) => ipcRenderer.on('whisper-stats', (_, stats) => callback(stats)),
+  onWhisperCapture: (callback) => ipcRenderer.on('whisper-capture', (_, report) => callback(report)),
   getAppSettings: () => ipcRenderer.invoke('app-settings:get'),
   saveAppSettings: (settings) => ipcRenderer.invoke('app-settings:set', settings),
   clearCache: () => ipcRenderer.invoke('cache:clear'),
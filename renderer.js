@@ -31,6 +31,16 @@ document.addEventListener('click', (event) => {
       }
 });
 
+// Audio loss reported by the whisper service after each recording (the only
+// path into recordCaptureSession, so each session is counted once)
+if (window.voiceApp && window.voiceApp.onWhisperCapture) {
+  window.voiceApp.onWhisperCapture((report) => {
+    if (performanceMonitor) {
+      performanceMonitor.recordCaptureSession(report);
+    }
+  });
+}
+
 // Error handling with performance monitoring
 window.addEventListener('error', (event) => {
       if (performanceMonitor) {
@@ -152,6 +162,7 @@ window.accessibilityManager = accessibilityManager;
     onFocusHoldHotkey: () => {},
     onFocusToggleHotkey: () => {},
     onTranscriptionPartial: () => {},
+    onTranscriptionTranslation: () => {},
     getSystemInfo: async () => null,
     getSuggestedModel: async () => 'base',
     downloadModel: async () => ({ success: false }),
@@ -939,6 +950,27 @@ window.accessibilityManager = accessibilityManager;
     });
   }
 
+  // Pipeline translation: segments of one recording arrive in any order, keyed by seq
+  const translationPreview = document.getElementById('translation-preview');
+  const translationPreviewText = document.getElementById('translation-preview-text');
+  let translationSession = null;
+  let translationSegments = new Map();
+  if (ipc.onTranscriptionTranslation && translationPreview && translationPreviewText) {
+    ipc.onTranscriptionTranslation((translation) => {
+      if (!translation || !translation.text) return;
+      if (translation.session !== translationSession) {
+        translationSession = translation.session;
+        translationSegments = new Map();
+      }
+      translationSegments.set(translation.seq, translation.text);
+      translationPreviewText.textContent = [...translationSegments.keys()]
+        .sort((a, b) => a - b)
+        .map((seq) => translationSegments.get(seq))
+        .join(' ');
+      translationPreview.style.display = 'block';
+    });
+  }
+
   // Final transcription
   ipc.onTranscription((text) => {
     if (!text) return;
@@ -2095,6 +2127,9 @@ window.accessibilityManager = accessibilityManager;
       if (langSelect) langSelect.value = appSettings.language;
     }
 
+    const translateSelect = document.getElementById('dictation-translate-select');
+    if (translateSelect) translateSelect.value = appSettings.dictation_translate_to || '';
+
     // Apply theme selection
     if (appSettings.theme) {
       document.querySelectorAll('.theme-option').forEach(option => {
@@ -3073,6 +3108,17 @@ window.accessibilityManager = accessibilityManager;
     });
   }
 
+  const dictationTranslateSelect = document.getElementById('dictation-translate-select');
+  if (dictationTranslateSelect) {
+    dictationTranslateSelect.addEventListener('change', (e) => {
+      saveAppSettings({ dictation_translate_to: e.target.value });
+      if (!e.target.value) {
+        const preview = document.getElementById('translation-preview');
+        if (preview) preview.style.display = 'none';
+      }
+    });
+  }
+
   const soundFeedbackToggle = document.getElementById('sound-feedback-toggle');
   if (soundFeedbackToggle) {
     soundFeedbackToggle.addEventListener('change', (e) => {
@@ -3523,7 +3569,7 @@ window.accessibilityManager = accessibilityManager;
             
             // Save on Enter or blur
             const saveEdit = async () => {
-              const newWord = newInput.value.trim().toLowerCase();
+              const newWord = newInput.value.trim(); // casing is kept: "iPhone" is a casing rule
               if (newWord && newWord !== word) {
                 // Check if word already exists
                 const allWords = await ipc.getDictionary();
@@ -24,6 +24,10 @@ class PerformanceMonitor {
       },
       audio: {
         bufferUnderruns: 0,
+        droppedMs: 0,
+        readErrors: 0,
+        lateReads: 0,
+        lastSession: null,
         sampleRate: 16000,
         channels: 1
       },
@@ -252,6 +256,18 @@ class PerformanceMonitor {
     this.metrics.audio.bufferUnderruns++;
   }
 
+  // Capture report the whisper service sends after every recording
+  recordCaptureSession(report) {
+    if (!report) return;
+    const audio = this.metrics.audio;
+    audio.bufferUnderruns = (audio.bufferUnderruns || 0) + (report.overflows || 0) + (report.read_errors || 0);
+    audio.droppedMs = (audio.droppedMs || 0) + (report.dropped_ms || 0);
+    audio.readErrors = (audio.readErrors || 0) + (report.read_errors || 0);
+    audio.lateReads = (audio.lateReads || 0) + (report.late_reads || 0);
+    audio.lastSession = report;
+    this.saveMetrics();
+  }
+
   updateAudioConfig(sampleRate, channels) {
     this.metrics.audio.sampleRate = sampleRate;
     this.metrics.audio.channels = channels;
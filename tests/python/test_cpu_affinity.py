@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Unit tests for cpu_affinity.py
+"""
+
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import cpu_affinity
+from cpu_affinity import plan_cores
+
+
+class TestPlanCores:
+    """Test splitting cores between capture and decoding"""
+
+    def test_auto_reserves_last_core(self):
+        """Test auto gives capture the last core and decoding the rest"""
+        assert plan_cores("auto", [0, 1, 2, 3]) == ({3}, {0, 1, 2})
+
+    def test_explicit_core(self):
+        """Test an explicit core index is reserved"""
+        assert plan_cores("0", [0, 1]) == ({0}, {1})
+
+    def test_single_core_reserves_nothing(self):
+        """Test a single-core machine keeps everything together"""
+        assert plan_cores("auto", [0]) == (None, {0})
+
+    def test_unavailable_core_rejected(self):
+        """Test asking for a core outside the allowed set fails"""
+        with pytest.raises(ValueError):
+            plan_cores("7", [0, 1])
+
+
+class TestDefaultAffinity:
+    """Test process-wide placement for threads started later"""
+
+    def test_linux_pins_calling_thread(self):
+        """Test Linux relies on thread inheritance from the calling thread"""
+        with patch.object(cpu_affinity.sys, 'platform', 'linux'), \
+             patch.object(cpu_affinity, 'set_thread_affinity', return_value=True) as pin:
+            assert cpu_affinity.set_default_affinity({0, 1})
+        pin.assert_called_once_with({0, 1})
+
+    def test_windows_without_cpu_sets_reports_failure(self):
+        """Test Windows never claims success with a thread mask that later threads ignore"""
+        with patch.object(cpu_affinity.sys, 'platform', 'win32'), \
+             patch.object(cpu_affinity, '_kernel32', return_value=SimpleNamespace()):
+            assert cpu_affinity.set_default_affinity({0, 1}) is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
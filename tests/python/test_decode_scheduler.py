@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Unit tests for decode_scheduler.py
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from decode_scheduler import DecodeScheduler, FINAL, PARTIAL, BACKGROUND
+
+
+class TestDecodeScheduler:
+    """Test the shared decode thread and its per-client queues"""
+
+    def setup_method(self):
+        self.scheduler = DecodeScheduler()
+
+    def teardown_method(self):
+        self.scheduler.stop()
+
+    def test_result_and_stats(self):
+        """Test a job's result is delivered and accounted to its client"""
+        assert self.scheduler.submit("a", lambda x: x * 2, 21).result(timeout=5) == 42
+        stats = self.scheduler.client_stats()["a"]
+        assert stats["completed"] == 1 and stats["pending"] == 0
+
+    def test_errors_reach_the_caller(self):
+        """Test an exception inside a job is raised from its future"""
+        future = self.scheduler.submit("a", lambda: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            future.result(timeout=5)
+        assert self.scheduler.client_stats()["a"]["failed"] == 1
+
+    def test_clients_served_round_robin(self):
+        """Test a client with a long queue does not starve another"""
+        gate = threading.Event()
+        order = []
+        self.scheduler.submit("busy", gate.wait)
+        futures = [self.scheduler.submit("busy", order.append, f"busy{i}") for i in range(3)]
+        futures.append(self.scheduler.submit("quiet", order.append, "quiet0"))
+        gate.set()
+        for f in futures:
+            f.result(timeout=5)
+        assert order.index("quiet0") < order.index("busy1")
+
+    def test_forget_cancels_queued_jobs(self):
+        """Test a disconnected client's waiting jobs are dropped"""
+        gate = threading.Event()
+        self.scheduler.submit("other", gate.wait)
+        queued = self.scheduler.submit("gone", lambda: "never")
+        self.scheduler.forget("gone")
+        gate.set()
+        assert queued.cancelled()
+
+
+class TestDynamicBatching:
+    """Test gathering batchable jobs into one batch_fn call"""
+
+    def setup_method(self):
+        self.batches = []
+
+        def batch_fn(items):
+            self.batches.append(list(items))
+            return [item.upper() for item in items]
+
+        self.scheduler = DecodeScheduler(batch_fn=batch_fn, max_batch=3, max_wait=0.2)
+
+    def teardown_method(self):
+        self.scheduler.stop()
+
+    def test_jobs_in_window_share_a_batch(self):
+        """Test jobs submitted within max_wait run together and get their own results"""
+        futures = [self.scheduler.submit_batched(f"c{i}", f"clip{i}") for i in range(3)]
+        assert [f.result(timeout=5) for f in futures] == ["CLIP0", "CLIP1", "CLIP2"]
+        assert self.batches == [["clip0", "clip1", "clip2"]]
+        stats = self.scheduler.batch_stats()
+        assert stats["batches"] == 1 and stats["avg_batch_size"] == 3
+
+    def test_lone_job_waits_at_most_max_wait(self):
+        """Test a single batchable job runs once its window closes"""
+        start = time.perf_counter()
+        assert self.scheduler.submit_batched("a", "solo").result(timeout=5) == "SOLO"
+        assert time.perf_counter() - start < 1.0
+        assert self.batches == [["solo"]]
+
+    def test_interactive_job_bypasses_window(self):
+        """Test a plain submit does not wait behind a filling batch"""
+        self.scheduler.submit_batched("a", "clip")
+        start = time.perf_counter()
+        assert self.scheduler.submit("b", lambda: "final").result(timeout=5) == "final"
+        assert time.perf_counter() - start < 0.15
+        assert self.scheduler.batch_stats()["bypassed"] == 1
+
+
+class TestPriorityClasses:
+    """Test finals before partials before background work"""
+
+    def setup_method(self):
+        self.scheduler = DecodeScheduler()
+        self.gate = threading.Event()
+        self.scheduler.submit("busy", self.gate.wait)  # hold the decode thread
+
+    def teardown_method(self):
+        self.gate.set()
+        self.scheduler.stop()
+
+    def test_final_runs_before_earlier_work(self):
+        """Test queued jobs run in class order regardless of submission order"""
+        order = []
+        futures = [
+            self.scheduler.submit("a", order.append, "background", priority=BACKGROUND),
+            self.scheduler.submit("a", order.append, "partial", priority=PARTIAL),
+            self.scheduler.submit("b", order.append, "final", priority=FINAL),
+        ]
+        self.gate.set()
+        for f in futures:
+            f.result(timeout=5)
+        assert order == ["final", "partial", "background"]
+
+    def test_newer_partial_supersedes_queued_one(self):
+        """Test supersede drops the client's waiting partial"""
+        old = self.scheduler.submit("a", lambda: "old", priority=PARTIAL, supersede=True)
+        new = self.scheduler.submit("a", lambda: "new", priority=PARTIAL, supersede=True)
+        self.gate.set()
+        assert new.result(timeout=5) == "new"
+        assert old.cancelled()
+        assert self.scheduler.class_stats()["partial"]["dropped"] == 1
+
+    def test_drop_cancels_a_class(self):
+        """Test drop() removes queued partials but leaves other classes alone"""
+        partial = self.scheduler.submit("a", lambda: "p", priority=PARTIAL)
+        final = self.scheduler.submit("a", lambda: "f", priority=FINAL)
+        self.scheduler.drop(PARTIAL, "a")
+        self.gate.set()
+        assert final.result(timeout=5) == "f"
+        assert partial.cancelled()
+        stats = self.scheduler.class_stats()
+        assert stats["final"]["jobs"] == 1 and stats["final"]["avg_wait_ms"] is not None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Unit tests for decode_worker.py
+"""
+
+import pytest
+import sys
+import os
+import io
+import json
+import base64
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import decode_worker
+from decode_worker import AudioRing, DecodeWorkerClient
+
+
+def pcm(values):
+    return np.asarray(values, dtype=np.int16).tobytes()
+
+
+class TestAudioRing:
+    """Test the shared-memory audio ring"""
+
+    def setup_method(self):
+        self.ring = AudioRing(capacity=10)
+
+    def teardown_method(self):
+        self.ring.close()
+
+    def test_write_and_read_span(self):
+        """Test reading back an exact sample span"""
+        self.ring.write(pcm(range(6)))
+        assert self.ring.position == 6
+        assert list(self.ring.read(2, 5)) == [2, 3, 4]
+
+    def test_wraparound_keeps_latest_samples(self):
+        """Test spans across the wrap point and clamping of overwritten samples"""
+        self.ring.write(pcm(range(7)))
+        self.ring.write(pcm(range(7, 14)))
+        assert list(self.ring.read(8, 12)) == [8, 9, 10, 11]
+        assert list(self.ring.read(0, 14)) == list(range(4, 14))
+
+    def test_oversized_write_advances_position(self):
+        """Test a write larger than the ring keeps only its tail"""
+        self.ring.write(pcm(range(25)))
+        assert self.ring.position == 25
+        assert list(self.ring.read(20, 25)) == [20, 21, 22, 23, 24]
+
+    def test_attach_by_name(self):
+        """Test a second handle sees the writer's samples"""
+        self.ring.write(pcm([1, 2, 3]))
+        reader = AudioRing(name=self.ring.name)
+        try:
+            assert reader.position == 3
+            assert list(reader.read(0, 3)) == [1, 2, 3]
+        finally:
+            reader.close()
+
+
+class TestWorkerCancel:
+    """Test abandoning a decode that is already running in the worker"""
+
+    def run_worker(self, ring, transcribe):
+        model = SimpleNamespace(name="fake", model_ref="tiny", transcribe=transcribe)
+        stdin = io.StringIO(json.dumps({"op": "decode", "id": 3, "start": 0, "end": 4}) + "\n")
+        sent = []
+        with patch('whisper_backends.load_backend', return_value=model), \
+             patch.object(sys, 'stdin', stdin), \
+             patch.object(decode_worker, 'send_message', side_effect=sent.append):
+            decode_worker.worker_main(ring.name, "tiny")
+        return sent
+
+    def test_cancel_flag_stops_between_segments(self):
+        """Test the worker stops iterating segments once its decode id is cancelled"""
+        ring = AudioRing(capacity=10)
+        ring.write(pcm([1, 2, 3, 4]))
+        yielded = []
+
+        def transcribe(samples):
+            def segments():
+                for text in ("one", "two", "three"):
+                    yielded.append(text)
+                    ring.cancel(3)  # CANCEL arrives while this segment is decoded
+                    yield SimpleNamespace(text=text)
+            return segments(), None
+
+        try:
+            sent = self.run_worker(ring, transcribe)
+        finally:
+            ring.close()
+        assert sent[-1]["op"] == "cancelled"
+        assert yielded == ["one"]
+
+    def test_client_cancels_only_matching_session(self):
+        """Test cancel() flags the running decode only for its own session or a partial"""
+        client = DecodeWorkerClient.__new__(DecodeWorkerClient)
+        client.ring = AudioRing(capacity=10)
+        try:
+            client._running = (5, 2, True)
+            assert not client.cancel(1)
+            assert not client.ring.cancelled(5)
+            assert client.cancel(2, partial_only=True)
+            assert client.ring.cancelled(5) and not client.ring.cancelled(6)
+        finally:
+            client.ring.close()
+
+
+
+class FakeProcess:
+    """Popen stand-in: replies with the queued lines, or behaves as a dead process"""
+
+    def __init__(self, replies=None, dead=False):
+        self.dead = dead
+        self.stdin = self
+        self.stdout = self
+        self.replies = list(replies or [])
+        self.killed = False
+
+    def write(self, data):
+        if self.dead:
+            raise BrokenPipeError(32, "Broken pipe")
+
+    def flush(self):
+        pass
+
+    def readline(self):
+        return json.dumps(self.replies.pop(0)) + "\n" if self.replies and not self.dead else ""
+
+    def poll(self):
+        return -9 if self.dead else None
+
+    def kill(self):
+        self.killed = True
+
+    def wait(self, timeout=None):
+        return -9
+
+
+def make_client(process):
+    """DecodeWorkerClient on a small ring without spawning a worker"""
+    client = DecodeWorkerClient.__new__(DecodeWorkerClient)
+    client.ring = AudioRing(capacity=10)
+    client.process = process
+    client.backend = (None, None)
+    client._lock = threading.Lock()
+    client._next_id = 0
+    client._running = None
+    client.restarts = 0
+    client.overruns = 0
+    client.rate = 16000
+    return client
+
+
+class TestWorkerRestart:
+    """Test recovering from a decode process that died"""
+
+    def test_dead_worker_is_restarted_and_decode_retried(self):
+        """Test a broken pipe respawns the worker on the same ring and the decode succeeds"""
+        dead = FakeProcess(dead=True)
+        fresh = FakeProcess([{"op": "ready", "backend": "fake", "model_ref": "tiny"},
+                             {"op": "result", "text": "hello", "seconds": 0.1}])
+        client = make_client(dead)
+        ring = client.ring
+        try:
+            with patch.object(client, 'start_worker', side_effect=lambda: setattr(client, 'process', fresh)):
+                assert client.decode(0, 4) == ("hello", 0.1)
+            assert dead.killed and client.process is fresh and client.ring is ring
+            assert client.restarts == 1
+        finally:
+            ring.close()
+
+    def test_failed_restart_raises_worker_exited(self):
+        """Test a worker that cannot come back is reported instead of looking ready"""
+        client = make_client(FakeProcess(dead=True))
+        try:
+            with patch.object(client, 'start_worker',
+                              side_effect=lambda: setattr(client, 'process', FakeProcess(dead=True))):
+                with pytest.raises(decode_worker.WorkerExited):
+                    client.decode(0, 4)
+            assert client.process is None
+        finally:
+            client.ring.close()
+
+
+
+class TestRingOverrun:
+    """Test recordings longer than the ring"""
+
+    def test_overwritten_span_is_sent_inline(self):
+        """Test a span whose start left the ring is decoded from the caller's PCM"""
+        ring = AudioRing(capacity=4)
+        ring.write(pcm([1, 2, 3, 4, 5, 6]))
+        requests = []
+        client = make_client(None)
+        client.ring.close()
+        client.ring = ring
+
+        def request(msg):
+            requests.append(msg)
+            return {"op": "result", "text": "ok", "seconds": 0.0}
+
+        try:
+            with patch.object(client, '_request', side_effect=request):
+                client.decode(2, 6)
+                assert "audio" not in requests[-1]
+                client.decode(0, 6, pcm=pcm([1, 2, 3, 4, 5, 6]))
+            assert np.frombuffer(base64.b64decode(requests[-1]["audio"]), dtype=np.int16).tolist() == [1, 2, 3, 4, 5, 6]
+            assert client.overruns == 1
+        finally:
+            ring.close()
+
+    def test_worker_decodes_inline_audio(self):
+        """Test the worker decodes audio sent with the request instead of reading the ring"""
+        ring = AudioRing(capacity=4)
+        decoded = []
+
+        def transcribe(samples):
+            decoded.append(len(samples))
+            return iter([SimpleNamespace(text="ok")]), None
+
+        model = SimpleNamespace(name="fake", model_ref="tiny", transcribe=transcribe)
+        request = {"op": "decode", "id": 1, "start": 0, "end": 6,
+                   "audio": base64.b64encode(pcm([1, 2, 3, 4, 5, 6])).decode("ascii")}
+        sent = []
+        try:
+            with patch('whisper_backends.load_backend', return_value=model), \
+                 patch.object(sys, 'stdin', io.StringIO(json.dumps(request) + "\n")), \
+                 patch.object(decode_worker, 'send_message', side_effect=sent.append):
+                decode_worker.worker_main(ring.name, "tiny")
+        finally:
+            ring.close()
+        assert decoded == [6]
+        assert sent[-1]["text"] == "ok"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Unit tests for helper_daemon.py
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import helper_daemon
+from helper_daemon import handle_request, METHOD_NOT_FOUND, INVALID_PARAMS, INTERNAL_ERROR
+
+
+class TestRequestHandling:
+    """Test JSON-RPC request dispatch"""
+
+    def test_ping(self):
+        """Test the ping method echoes the request id"""
+        response = handle_request({"jsonrpc": "2.0", "id": 3, "method": "helper.ping"})
+        assert response["id"] == 3
+        assert response["result"]["pong"] is True
+
+    def test_unknown_method(self):
+        """Test unknown methods return a JSON-RPC error"""
+        response = handle_request({"jsonrpc": "2.0", "id": 4, "method": "nope"})
+        assert response["error"]["code"] == METHOD_NOT_FOUND
+
+    def test_params_are_passed_through(self):
+        """Test named and positional params reach the method"""
+        with patch.dict(helper_daemon.METHODS, {"test.add": lambda a, b: a + b}):
+            assert handle_request({"id": 1, "method": "test.add", "params": {"a": 1, "b": 2}})["result"] == 3
+            assert handle_request({"id": 2, "method": "test.add", "params": [4, 5]})["result"] == 9
+            assert handle_request({"id": 3, "method": "test.add", "params": {"a": 1}})["error"]["code"] == INVALID_PARAMS
+
+    def test_method_exception(self):
+        """Test exceptions become internal errors instead of killing the helper"""
+        def boom():
+            raise RuntimeError("boom")
+        with patch.dict(helper_daemon.METHODS, {"test.boom": boom}):
+            response = handle_request({"id": 5, "method": "test.boom"})
+        assert response["error"]["code"] == INTERNAL_ERROR
+        assert response["error"]["message"] == "boom"
+
+    def test_type_error_inside_method_is_internal(self):
+        """Test a TypeError raised by the method body is not reported as bad params"""
+        def broken(a):
+            return a + "x"
+        with patch.dict(helper_daemon.METHODS, {"test.broken": broken}):
+            response = handle_request({"id": 6, "method": "test.broken", "params": {"a": 1}})
+        assert response["error"]["code"] == INTERNAL_ERROR
+
+    def test_module_method_params_checked_against_target(self):
+        """Test params of a lazily imported method are bound to the real function's signature"""
+        response = handle_request({"id": 7, "method": "system.suggest_model", "params": {"bogus": 1}})
+        assert response["error"]["code"] == INVALID_PARAMS
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
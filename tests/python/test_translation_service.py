@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Unit tests for translation_service.py
+"""
+
+import pytest
+import sys
+import os
+import io
+import json
+from unittest.mock import patch, MagicMock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import translation_service
+import translation_backends
+
+
+class FakeTranslator:
+    """GoogleTranslator stand-in that tags text with the target language"""
+
+    def __init__(self, source='auto', target='en'):
+        self.source = source
+        self.target = target
+
+    def translate(self, text):
+        return f"[{self.target}] {text}"
+
+    def translate_batch(self, texts):
+        return [self.translate(t) for t in texts]
+
+
+@pytest.fixture
+def fake_google():
+    factory = MagicMock(side_effect=FakeTranslator)
+    with patch.object(translation_backends, 'GoogleTranslator', factory, create=True), \
+         patch.object(translation_backends, 'GOOGLE_AVAILABLE', True), \
+         patch.object(translation_backends, '_local', translation_backends.threading.local()), \
+         patch.object(translation_backends.BACKENDS["google"], '_http_pooled', True), \
+         patch.object(translation_service, '_cache', translation_service.TranslationCache(None)):
+        yield factory
+
+
+class TestWarmTranslators:
+    """Test translators are reused per language pair"""
+
+    def test_pair_reuses_translator(self, fake_google):
+        """Test repeated calls for a pair build one translator"""
+        assert translation_service.translate_text("Hello", "es")["translated"] == "[es] Hello"
+        translation_service.translate_text("Bye", "es")
+        translation_service.translate_batch(["a"], "fr")
+        assert fake_google.call_count == 2
+
+
+class TestServeMode:
+    """Test the JSON-lines serve loop"""
+
+    def test_replies_tagged_with_ids(self, fake_google):
+        """Test each request gets one reply carrying its id, bad lines included"""
+        requests = [
+            {"id": 1, "op": "translate", "text": "Hello", "source_lang": "en", "target_lang": "de"},
+            {"id": 2, "op": "nope"},
+        ]
+        stdin = io.StringIO("\n".join(json.dumps(r) for r in requests) + "\nnot json\n")
+        stdout = io.StringIO()
+        translation_service.serve(workers=2, stdin=stdin, stdout=stdout)
+        replies = {r["id"]: r for r in map(json.loads, stdout.getvalue().splitlines())}
+        assert replies[1]["result"]["translated"] == "[de] Hello"
+        assert "Unknown op" in replies[2]["error"]
+        assert "Bad request" in replies[None]["error"]
+
+
+class TestTranslationCache:
+    """Test the SQLite-backed translation cache"""
+
+    def test_repeated_text_skips_backend(self, fake_google):
+        """Test a repeated string is answered from memory without a translator call"""
+        first = translation_service.translate_text("Save  settings ", "es")
+        second = translation_service.translate_text("Save settings", "es")
+        assert second["cached"] is True
+        assert second["translated"] == first["translated"]
+        assert translation_service.get_stats()["cache"]["memory_hits"] == 1
+
+    def test_batch_only_translates_misses(self, fake_google):
+        """Test a batch sends only the uncached strings to the backend, a single miss as one call"""
+        translation_service.translate_text("one", "fr")
+        with patch.object(FakeTranslator, 'translate_batch', autospec=True,
+                          side_effect=lambda self, texts: [f"[fr] {t}" for t in texts]) as batch, \
+             patch.object(FakeTranslator, 'translate', autospec=True,
+                          side_effect=lambda self, text: f"[fr] {text}") as single:
+            result = translation_service.translate_batch(["one", "two"], "fr")
+        assert result["translated"] == ["[fr] one", "[fr] two"]
+        batch.assert_not_called()
+        assert single.call_args[0][1] == "two"
+
+    def test_batch_sends_misses_together(self, fake_google):
+        """Test several uncached strings go to the backend in one batch call"""
+        translation_service.translate_text("one", "fr")
+        with patch.object(FakeTranslator, 'translate_batch', autospec=True,
+                          side_effect=lambda self, texts: [f"[fr] {t}" for t in texts]) as batch:
+            result = translation_service.translate_batch(["one", "two", "three"], "fr")
+        assert result["translated"] == ["[fr] one", "[fr] two", "[fr] three"]
+        assert batch.call_args[0][1] == ["two", "three"]
+
+    def test_disk_entries_survive_restart(self, tmp_path):
+        """Test a new cache on the same database serves earlier entries, then from memory"""
+        path = str(tmp_path / "cache.sqlite3")
+        translation_service.TranslationCache(path).put("en", "de", "google", "Hello", "Hallo")
+        cache = translation_service.TranslationCache(path)
+        assert cache.get("en", "de", "google", "Hello") == "Hallo"
+        assert cache.get("en", "de", "google", "Hello") == "Hallo"
+        assert cache.get("en", "de", "stub", "Hello") is None
+        stats = cache.stats()
+        assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+
+    def test_memory_lru_is_bounded(self):
+        """Test the in-memory layer evicts the least recently used entry"""
+        cache = translation_service.TranslationCache(None, memory_entries=2)
+        cache.put_many("en", "es", "google", [("a", "A"), ("b", "B")])
+        cache.get("en", "es", "google", "a")
+        cache.put("en", "es", "google", "c", "C")
+        assert cache.get("en", "es", "google", "b") is None
+        assert cache.get("en", "es", "google", "a") == "A"
+
+
+class TestTranslateDict:
+    """Test flattened, deduplicated and batched dictionary translation"""
+
+    def test_nested_structure_rebuilt(self, fake_google):
+        """Test nested string leaves are translated and other values kept"""
+        source = {"app": {"name": "Save", "count": 3}, "menu": {"file": {"save": "Save"}}, "quit": "Quit"}
+        result = translation_service.translate_dict(source, "es", "en", batch_size=1, workers=2)
+        assert result["translated"] == {
+            "app": {"name": "[es] Save", "count": 3},
+            "menu": {"file": {"save": "[es] Save"}},
+            "quit": "[es] Quit",
+        }
+        assert (result["strings"], result["unique"], result["requests"]) == (3, 2, 2)
+
+    def test_failed_batch_falls_back_per_string(self, fake_google):
+        """Test a failing batch call retries its strings and keeps the source for failures"""
+        def translate(self, text):
+            if text == "bad":
+                raise RuntimeError("rejected")
+            return f"[{self.target}] {text}"
+        with patch.object(FakeTranslator, 'translate_batch', side_effect=RuntimeError("batch down")), \
+             patch.object(FakeTranslator, 'translate', translate):
+            result = translation_service.translate_dict({"a": "good", "b": "bad"}, "de", "en")
+        assert result["translated"] == {"a": "[de] good", "b": "bad"}
+
+
+class TestIncrementalLocale:
+    """Test manifest-driven locale regeneration"""
+
+    def write(self, path, data):
+        path.write_text(json.dumps(data), encoding="utf-8")
+
+    def test_only_changed_keys_retranslated(self, fake_google, tmp_path):
+        """Test a second run translates added/changed keys, keeps the rest and drops removed ones"""
+        source = tmp_path / "en.json"
+        self.write(source, {"nav": {"home": "Home", "notes": "Notes"}, "title": "SONU"})
+        first = translation_service.translate_locale(str(source), "es")
+        assert first["translated_keys"] == 3
+
+        # Hand-edit a kept translation: an incremental run must not overwrite it
+        target = tmp_path / "es.json"
+        data = json.loads(target.read_text(encoding="utf-8"))
+        data["nav"]["home"] = "Inicio"
+        self.write(target, data)
+        self.write(source, {"nav": {"home": "Home"}, "title": "SONU 2", "new": "Added"})
+        second = translation_service.translate_locale(str(source), "es")
+
+        assert (second["translated_keys"], second["reused_keys"], second["removed_keys"]) == (2, 1, 1)
+        assert json.loads(target.read_text(encoding="utf-8")) == {
+            "nav": {"home": "Inicio"}, "title": "[es] SONU 2", "new": "[es] Added"
+        }
+
+    def test_existing_target_without_manifest_is_adopted(self, fake_google, tmp_path):
+        """Test a hand-made locale file is kept, only missing keys are translated"""
+        source = tmp_path / "en.json"
+        self.write(source, {"a": "One", "b": "Two"})
+        self.write(tmp_path / "de.json", {"a": "Eins"})
+        result = translation_service.translate_locale(str(source), "de")
+        assert result["translated_keys"] == 1
+        assert json.loads((tmp_path / "de.json").read_text(encoding="utf-8")) == {"a": "Eins", "b": "[de] Two"}
+
+
+    def test_failed_keys_are_retried(self, fake_google, tmp_path):
+        """Test a key whose translation failed gets no manifest hash and is retried next run"""
+        def translate(self, text):
+            if text == "Two":
+                raise RuntimeError("rejected")
+            return f"[{self.target}] {text}"
+        source = tmp_path / "en.json"
+        self.write(source, {"a": "One", "b": "Two"})
+        with patch.object(FakeTranslator, 'translate_batch', side_effect=RuntimeError("batch down")), \
+             patch.object(FakeTranslator, 'translate', translate):
+            first = translation_service.translate_locale(str(source), "fr")
+        manifest = json.loads((tmp_path / ".manifests" / "fr.json").read_text(encoding="utf-8"))
+        assert (first["translated_keys"], first["failed_keys"]) == (1, 1)
+        assert list(manifest["keys"]) == [json.dumps(["a"])]
+        assert json.loads((tmp_path / "fr.json").read_text(encoding="utf-8")) == {"a": "[fr] One", "b": "Two"}
+
+        second = translation_service.translate_locale(str(source), "fr")
+        assert (second["translated_keys"], second["failed_keys"], second["reused_keys"]) == (1, 0, 1)
+        assert json.loads((tmp_path / "fr.json").read_text(encoding="utf-8")) == {"a": "[fr] One", "b": "[fr] Two"}
+
+
+class TestBackends:
+    """Test backend selection and per-backend stats"""
+
+    def test_backend_chosen_per_call(self, fake_google):
+        """Test a call can name its backend, and cached results stay per backend"""
+        with patch.dict(translation_backends.BACKENDS, {"stub": translation_backends.StubBackend()}):
+            stub = translation_service.translate_text("Hello", "fr", backend="stub")
+            google = translation_service.translate_text("Hello", "fr")
+            stats = translation_service.get_stats()["backends"]
+        assert stub["translated"] == google["translated"] == "[fr] Hello"
+        assert google.get("cached") is not True
+        assert (stats["stub"]["calls"], stats["stub"]["strings"]) == (1, 1)
+        assert fake_google.call_count == 1
+
+    def test_local_only_excludes_google(self):
+        """Test local_only defaults to the offline engine and refuses google"""
+        assert translation_backends.get_backend(local_only=True).name == "marian"
+        with pytest.raises(ValueError):
+            translation_backends.get_backend("google", local_only=True)
+
+    def test_marian_without_model_is_unavailable(self, tmp_path):
+        """Test the offline engine reports unavailable when no model directory matches"""
+        backend = translation_backends.MarianBackend(model_dirs=[str(tmp_path)])
+        assert backend.model_path("en", "de") is None
+        assert not backend.available("en", "de")
+        with patch.object(translation_service, '_cache', translation_service.TranslationCache(None)), \
+             patch.dict(translation_backends.BACKENDS, {"marian": backend}):
+            result = translation_service.translate_text("Hello", "de", "en", local_only=True)
+        assert "error" in result
+
+
+class TestSegmentTranslator:
+    """Test the warm worker for committed dictation segments"""
+
+    def translate_all(self, segments, **kwargs):
+        results = []
+        translator = translation_service.SegmentTranslator("es", on_result=results.append, backend="stub", **kwargs)
+        for session, text in segments:
+            translator.submit(text, session)
+        translator.close()
+        return results, translator.stats()
+
+    def test_results_in_order(self):
+        """Test every segment comes back once, in submission order, with its session"""
+        with patch.object(translation_service, '_cache', translation_service.TranslationCache(None)):
+            results, stats = self.translate_all([(1, "one"), (1, "two"), (2, "three")])
+        assert [(r["seq"], r["session"], r["text"]) for r in results] == [
+            (0, 1, "[es] one"), (1, 1, "[es] two"), (2, 2, "[es] three")
+        ]
+        assert stats["segments"] == 3 and stats["pending"] == 0
+
+    def test_repeated_segment_deduplicated(self):
+        """Test a segment already translated (whitespace aside) needs no backend call"""
+        stub = translation_backends.StubBackend()
+        with patch.object(translation_service, '_cache', translation_service.TranslationCache(None)), \
+             patch.dict(translation_backends.BACKENDS, {"stub": stub}):
+            results, stats = self.translate_all([(1, "Hello there"), (2, "Hello  there "), (2, "Hello there")], max_batch=1)
+        assert [r["text"] for r in results] == ["[es] Hello there"] * 3
+        assert [r["deduplicated"] for r in results] == [False, True, True]
+        assert (stats["translated"], stats["deduplicated"]) == (1, 2)
+        assert stub.report()["strings"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Unit tests for whisper_backends.py
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import whisper_backends
+from whisper_backends import (
+    FasterWhisperBackend, WhisperCppBackend, find_ggml_model, resolve_backend
+)
+
+
+class TestBackendSelection:
+    """Test picking a backend from the model reference"""
+
+    def test_ggml_file_uses_whisper_cpp(self, tmp_path):
+        """Test a .gguf path is routed to whisper.cpp"""
+        model_file = tmp_path / "ggml-tiny-q5_0.gguf"
+        model_file.write_bytes(b"\0")
+        assert resolve_backend(str(model_file)) == (WhisperCppBackend, str(model_file))
+
+    def test_size_name_uses_faster_whisper_without_bindings(self):
+        """Test a plain size name stays on faster-whisper when pywhispercpp is missing"""
+        with patch.object(whisper_backends, 'whisper_cpp_available', return_value=False):
+            assert resolve_backend("base") == (FasterWhisperBackend, "base")
+
+    def test_downloaded_ggml_preferred_when_available(self, tmp_path):
+        """Test auto mode picks a downloaded quantized file over the plain one"""
+        (tmp_path / "ggml-base.bin").write_bytes(b"\0")
+        (tmp_path / "ggml-base-q5_0.gguf").write_bytes(b"\0")
+        with patch.dict(os.environ, {"WHISPER_MODEL_DIRS": str(tmp_path)}), \
+             patch.object(whisper_backends, 'whisper_cpp_available', return_value=True):
+            assert resolve_backend("base") == (WhisperCppBackend, str(tmp_path / "ggml-base-q5_0.gguf"))
+
+    def test_forced_whisper_cpp_without_file_raises(self, tmp_path):
+        """Test asking for whisper.cpp without a GGML file fails loudly"""
+        with patch.dict(os.environ, {"WHISPER_MODEL_DIRS": str(tmp_path)}):
+            with pytest.raises(FileNotFoundError):
+                resolve_backend("small", "whisper.cpp")
+
+    def test_forced_faster_whisper_ignores_ggml(self, tmp_path):
+        """Test the faster-whisper preference wins over a downloaded GGML file"""
+        (tmp_path / "ggml-base.bin").write_bytes(b"\0")
+        assert find_ggml_model("base", [str(tmp_path)]) == str(tmp_path / "ggml-base.bin")
+        with patch.dict(os.environ, {"WHISPER_MODEL_DIRS": str(tmp_path)}):
+            assert resolve_backend("base", "faster-whisper") == (FasterWhisperBackend, "base")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+
+class FakeExtractor:
+    """faster-whisper 1.1 style extractor: one frame per hop plus one, no 30 s padding"""
+
+    mel_filters = [[0.0] * 201] * 80
+    n_fft = 400
+    hop_length = 160
+    n_samples = 480000
+
+    def __call__(self, waveform, padding=160, chunk_length=None):
+        return "computed"
+
+
+class TestPrecomputedFeatures:
+    """Test handing cached log-mel frames to faster-whisper"""
+
+    def test_matching_shape_is_used(self):
+        """Test features shaped like the extractor's output replace it"""
+        import numpy as np
+        features = np.zeros((80, 16000 // 160 + 1), dtype=np.float32)
+        stand_in = whisper_backends.PrecomputedFeatures(FakeExtractor(), features)
+        assert stand_in(np.zeros(16000, dtype=np.float32), chunk_length=30) is features
+
+    def test_mismatched_shape_falls_back(self):
+        """Test features the model would misread are replaced by the normal extractor"""
+        import numpy as np
+        features = np.zeros((80, 16000 // 160 + 1), dtype=np.float32)
+        stand_in = whisper_backends.PrecomputedFeatures(FakeExtractor(), features)
+        # faster-whisper 1.0.x asks for 30 s of padding
+        assert stand_in(np.zeros(16000, dtype=np.float32), padding=True) == "computed"
+
+    def test_old_faster_whisper_has_no_feature_params(self):
+        """Test the mel cache is refused for faster-whisper before 1.1"""
+        backend = FasterWhisperBackend.__new__(FasterWhisperBackend)
+        backend.model = type("Model", (), {"feature_extractor": FakeExtractor()})()
+        with patch.dict(sys.modules, {"faster_whisper": type(sys)("faster_whisper")}):
+            sys.modules["faster_whisper"].__version__ = "1.0.3"
+            with pytest.raises(RuntimeError):
+                backend.feature_params()
+            sys.modules["faster_whisper"].__version__ = "1.1.0"
+            assert backend.feature_params()[2] == 160
+
+    def test_cached_features_match_extractor(self):
+        """Test MelCache frames equal faster-whisper's own extractor for the same span"""
+        np = pytest.importorskip("numpy")
+        feature_extractor = pytest.importorskip("faster_whisper.feature_extractor")
+        import whisper_service
+        extractor = feature_extractor.FeatureExtractor()
+        t = np.arange(16000 * 4) / 16000.0
+        pcm = (np.sin(2 * np.pi * 440 * t) * np.linspace(500, 8000, len(t))).astype(np.int16)
+        chunks = [pcm[i:i + 1024].tobytes() for i in range(0, len(pcm), 1024)]
+        cache = whisper_service.MelCache(extractor.mel_filters, extractor.n_fft, extractor.hop_length)
+        end = whisper_service.samples_in(chunks)
+        audio = pcm.astype(np.float32) / 32768.0
+        with patch.dict(whisper_service.stats, {"mel_frames_computed": 0, "mel_frames_reused": 0}):
+            whole = cache.features(chunks, 1, 0, end)
+            start = 160 * 100
+            tail = cache.features(chunks, 1, start, end)
+        expected = extractor(audio)
+        assert whole.shape == expected.shape
+        assert np.allclose(whole[:, :-2], expected[:, :-2], atol=1e-3)
+        expected_tail = extractor(audio[start:])
+        assert tail.shape == expected_tail.shape
+        # The first two frames reach before the span: the cache uses the real audio
+        # there, the extractor reflect-pads
+        assert np.allclose(tail[:, 2:-2], expected_tail[:, 2:-2], atol=1e-3)
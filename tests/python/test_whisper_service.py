@@ -8,8 +8,10 @@ import sys
 import os
 import tempfile
 import threading
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, call
 import time
+import json
+import re
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -22,7 +24,15 @@ sys.modules['faster_whisper'] = Mock()
 from whisper_service import (
     parse_combo, combo_pressed, start_stream, stop_stream,
     audio_capture_loop, transcribe_frames, transcribe_recent_seconds,
-    main
+    main, TextPostProcessor, parse_dictionary_rules,
+    collect_segments, DecodeCancelled, cancel_recording, plan_partial
+)
+import whisper_service
+
+
+# 0.64 s of loud noise: long and energetic enough to pass the speech gate
+SPEECH_LIKE = b''.join(
+    int(v).to_bytes(2, 'little', signed=True) for v in ((i * 7919) % 16000 - 8000 for i in range(1024))
 )
 
 
@@ -46,6 +56,571 @@ class TestComboParsing:
         assert parse_combo("   ") == []
 
 
+class TestTextPostProcessing:
+    """Test dictionary replacement and casing rules"""
+
+    def test_parse_dictionary_rules(self):
+        """Test rule extraction from dictionary entries"""
+        rules = parse_dictionary_rules([
+            "btw => by the way", {"from": "asap", "to": "as soon as possible"},
+            "iPhone", "vocabulary", 42
+        ])
+        assert rules == {"btw": "by the way", "asap": "as soon as possible", "iPhone": "iPhone"}
+
+    def test_replacements_whole_word_case_insensitive(self):
+        """Test whole-word replacement with capitalisation kept"""
+        processor = TextPostProcessor({"btw": "by the way", "b": "bee", "iPhone": "iPhone"})
+        result = processor.apply("Btw my IPHONE broke btwx b")
+        assert result == "By the way my iPhone broke btwx bee"
+
+    def test_longest_match_wins(self):
+        """Test overlapping keys prefer the longest match"""
+        processor = TextPostProcessor({"new": "NEW", "new york": "New York"})
+        assert processor.apply("new york is new") == "New York is NEW"
+
+    def test_no_rules_is_identity(self):
+        """Test empty rule table leaves text untouched"""
+        assert TextPostProcessor().apply("hello world") == "hello world"
+
+    def test_dictionary_compiled_on_first_use(self, tmp_path):
+        """Test the dictionary is compiled by the first post-processed text, not at import"""
+        dictionary = tmp_path / "dictionary.json"
+        dictionary.write_text(json.dumps(["btw => by the way"]), encoding="utf-8")
+        with patch.object(whisper_service, 'dictionary_path', str(dictionary)), \
+             patch.object(whisper_service, 'text_postprocessor', None):
+            assert whisper_service.postprocess_text("btw hi") == "by the way hi"
+            assert whisper_service.text_postprocessor is not None
+
+
+class TestCancellation:
+    """Test CANCEL handling and abandoned decodes"""
+
+    def test_collect_segments_stops_generator(self):
+        """Test a cancelled session stops pulling segments"""
+        pulled = []
+
+        def segments():
+            for text in ["one", "two", "three"]:
+                pulled.append(text)
+                if text == "one":
+                    whisper_service.cancelled_session = 7
+                yield Mock(text=text)
+
+        whisper_service.cancelled_session = None
+        with pytest.raises(DecodeCancelled):
+            collect_segments(segments(), session=7)
+        # The abort check runs after every yielded segment, so nothing past "one" is decoded
+        assert pulled == ["one"]
+        whisper_service.cancelled_session = None
+
+    def test_collect_segments_other_session_unaffected(self):
+        """Test cancelling one session leaves other decodes alone"""
+        whisper_service.cancelled_session = 3
+        assert collect_segments(iter([Mock(text=" a"), Mock(text=" b")]), session=4) == "a b"
+        whisper_service.cancelled_session = None
+
+    @patch('whisper_service.emit_event')
+    def test_cancel_recording_discards_buffer(self, mock_emit):
+        """Test CANCEL drops audio and credits the skipped final decode"""
+        whisper_service.recording_flag = True
+        whisper_service.session_id = 5
+        whisper_service.frames = [b'\x00\x00' * 16000]
+        whisper_service.stats["rtf"] = 0.5
+        saved_before = whisper_service.stats["decode_seconds_saved"]
+
+        cancel_recording()
+
+        assert whisper_service.recording_flag is False
+        assert whisper_service.frames == []
+        assert whisper_service.cancelled_session == 5
+        assert whisper_service.stats["decode_seconds_saved"] == pytest.approx(saved_before + 0.5)
+        mock_emit.assert_called_once_with("CANCELLED", {"audio_ms": 1000, "saved_ms": 500})
+        whisper_service.cancelled_session = None
+        whisper_service.stats["rtf"] = None
+
+
+class TestDecodeCache:
+    """Test the content-hash decode cache"""
+
+    def test_lru_evicts_oldest(self):
+        """Test the least recently used entry is dropped first"""
+        cache = whisper_service.DecodeCache(capacity=2)
+        keys = [cache.key(bytes([i]) * 4, ("base",)) for i in range(3)]
+        cache.put(keys[0], "a")
+        cache.put(keys[1], "b")
+        assert cache.get(keys[0]) == "a"
+        cache.put(keys[2], "c")
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == "a"
+
+    def test_key_depends_on_options(self):
+        """Test the same audio decoded with other options is a different entry"""
+        pcm = b'\x01\x00' * 100
+        assert whisper_service.DecodeCache.key(pcm, ("base",)) != whisper_service.DecodeCache.key(pcm, ("small",))
+
+    def test_identical_span_skips_decode(self):
+        """Test a repeated span is served from the cache"""
+        chunks = [b'\x05\x00' * 1024, b'\x07\x00' * 1024]
+        mock_model = Mock()
+        mock_model.transcribe.return_value = (iter([Mock(text=" cached words")]), {})
+        with patch.object(whisper_service, 'model', mock_model), \
+             patch.object(whisper_service, 'decode_worker', None), \
+             patch.object(whisper_service, 'decode_cache', whisper_service.DecodeCache()):
+            hits = whisper_service.stats["cache_hits"]
+            assert whisper_service.run_decode(chunks, partial=True) == "cached words"
+            assert whisper_service.run_decode(list(chunks)) == "cached words"
+        mock_model.transcribe.assert_called_once()
+        assert whisper_service.stats["cache_hits"] == hits + 1
+        assert whisper_service.get_stats()["cache_hit_rate"] is not None
+
+
+class TestBatchedDecode:
+    """Test decoding several independent spans in one backend call"""
+
+    def test_misses_share_one_batched_pass(self):
+        """Test uncached spans go to transcribe_batch together and cached ones do not"""
+        spans = [[b'\x01\x00' * 1600], [b'\x02\x00' * 1600], [b'\x03\x00' * 1600]]
+        mock_model = Mock()
+        mock_model.transcribe_batch.return_value = ["first", "third"]
+        cache = whisper_service.DecodeCache()
+        with patch.object(whisper_service, 'model', mock_model), \
+             patch.object(whisper_service, 'decode_worker', None), \
+             patch.object(whisper_service, 'decode_cache', cache):
+            cache.put(cache.key(b''.join(spans[1]), whisper_service.decode_options()), "second")
+            assert whisper_service.run_decode_batch(spans) == ["first", "second", "third"]
+        clips = mock_model.transcribe_batch.call_args[0][0]
+        assert len(clips) == 2
+        mock_model.transcribe.assert_not_called()
+
+    def test_backend_without_batching_decodes_one_by_one(self):
+        """Test whisper.cpp style backends fall back to run_decode per span"""
+        with patch.object(whisper_service, 'model', Mock(spec=["transcribe"])), \
+             patch.object(whisper_service, 'run_decode', side_effect=["a", "b"]) as mock_decode:
+            assert whisper_service.run_decode_batch([[b'\x01\x00'], [b'\x02\x00']]) == ["a", "b"]
+        assert mock_decode.call_count == 2
+
+
+class TestMelCache:
+    """Test incremental log-mel features against a full recomputation"""
+
+    @staticmethod
+    def reference(samples, filters):
+        """Whisper's centred-STFT log-mel of one window, computed from scratch"""
+        import numpy as np
+        padded = np.pad(np.pad(samples, (0, 160)), (200, 200), mode='reflect')
+        frames = 1 + (len(padded) - 400) // 160
+        windows = padded[np.arange(frames)[:, None] * 160 + np.arange(400)] * np.hanning(401)[:-1]
+        power = (np.abs(np.fft.rfft(windows, axis=1)) ** 2)[:-1]
+        log_spec = np.log10(np.maximum(filters @ power.T, 1e-10))
+        return (np.maximum(log_spec, log_spec.max() - 8.0) + 4.0) / 4.0
+
+    def test_overlapping_windows_reuse_frames(self):
+        """Test a growing recording matches recomputed features and reuses stored frames"""
+        import numpy as np
+        rng = np.random.default_rng(0)
+        filters = rng.random((80, 201)).astype(np.float32)
+        pcm = (rng.standard_normal(16000 * 3) * 3000).astype(np.int16)
+        chunks = [pcm[i:i + 1024].tobytes() for i in range(0, len(pcm), 1024)]
+        cache = whisper_service.MelCache(filters)
+        with patch.dict(whisper_service.stats, {"mel_frames_computed": 0, "mel_frames_reused": 0}):
+            for n in (20, len(chunks)):
+                recording = chunks[:n]
+                features = cache.features(recording, 1, 0, whisper_service.samples_in(recording))
+                samples = np.frombuffer(b''.join(recording), dtype=np.int16).astype(np.float32) / 32768.0
+                expected = self.reference(samples, filters)
+                assert features.shape == expected.shape
+                # Only the last frames differ: past the captured audio both sides pad differently
+                assert np.allclose(features[:, :-2], expected[:, :-2], atol=1e-4)
+            assert whisper_service.stats["mel_frames_reused"] > 0
+
+    def test_unaligned_window_has_no_features(self):
+        """Test a window not starting on a hop boundary falls back to the backend's extractor"""
+        import numpy as np
+        chunks = [b'\x01\x00' * 1024] * 4
+        cache = whisper_service.MelCache(np.ones((80, 201), dtype=np.float32))
+        with patch.object(whisper_service, 'mel_cache', cache):
+            assert whisper_service.window_features(chunks, chunks[1:], 1) is None
+            assert whisper_service.window_features(chunks, chunks, 1) is not None
+
+
+class TestStreamingFinal:
+    """Test segment-by-segment finals"""
+
+    def test_segments_emitted_before_commit(self):
+        """Test each segment is written as it is decoded and COMMIT closes the final"""
+        lines = []
+        mock_model = Mock()
+        mock_model.transcribe.return_value = (iter([Mock(text=" Hello"), Mock(text=" world.")]), {})
+        with patch.object(whisper_service, 'model', mock_model), \
+             patch.object(whisper_service, 'model_ready', True), \
+             patch.object(whisper_service, 'decode_worker', None), \
+             patch.object(whisper_service, 'decode_cache', whisper_service.DecodeCache()), \
+             patch.object(whisper_service, 'emit_line', side_effect=lines.append), \
+             patch.object(whisper_service, 'cancelled_session', None):
+            whisper_service.stream_final_recording([SPEECH_LIKE] * 10, 0, session=1)
+        assert lines[:2] == ["SEGMENT: Hello", "SEGMENT: world."]
+        assert lines[2].startswith("EVENT: COMMIT ")
+        assert json.loads(lines[2].split(" ", 2)[2])["segments"] == 2
+
+    def test_segments_feed_translator(self):
+        """Test each streamed segment is queued for translation with its session"""
+        translator = Mock()
+        mock_model = Mock()
+        mock_model.transcribe.return_value = (iter([Mock(text=" Hello"), Mock(text=" world.")]), {})
+        with patch.object(whisper_service, 'model', mock_model), \
+             patch.object(whisper_service, 'model_ready', True), \
+             patch.object(whisper_service, 'decode_worker', None), \
+             patch.object(whisper_service, 'decode_cache', whisper_service.DecodeCache()), \
+             patch.object(whisper_service, 'emit_line'), \
+             patch.object(whisper_service, 'segment_translator', translator), \
+             patch.object(whisper_service, 'cancelled_session', None):
+            whisper_service.stream_final_recording([SPEECH_LIKE] * 10, 0, session=4)
+        assert translator.submit.call_args_list == [call("Hello", 4), call("world.", 4)]
+
+    def test_rules_see_previous_segments(self):
+        """Test a rule spanning a segment boundary types and translates the whole-final text"""
+        translator = Mock()
+        lines = []
+        mock_model = Mock()
+        mock_model.transcribe.return_value = (iter([Mock(text=" Hello there."), Mock(text=" how are you")]), {})
+        capitalize = lambda text: re.sub(r'([.!?] )([a-z])', lambda m: m.group(1) + m.group(2).upper(), text)
+        with patch.object(whisper_service, 'model', mock_model), \
+             patch.object(whisper_service, 'model_ready', True), \
+             patch.object(whisper_service, 'decode_worker', None), \
+             patch.object(whisper_service, 'decode_cache', whisper_service.DecodeCache()), \
+             patch.object(whisper_service, 'postprocess_text', side_effect=capitalize), \
+             patch.object(whisper_service, 'emit_line', side_effect=lines.append), \
+             patch.object(whisper_service, 'segment_translator', translator), \
+             patch.object(whisper_service, 'cancelled_session', None):
+            whisper_service.stream_final_recording([SPEECH_LIKE] * 10, 0, session=4)
+        assert lines[:2] == ["SEGMENT: Hello there.", "SEGMENT: How are you"]
+        assert translator.submit.call_args_list == [call("Hello there.", 4), call("How are you", 4)]
+
+    def test_cancelled_session_translation_dropped(self):
+        """Test a translation arriving after CANCEL is not emitted"""
+        with patch.object(whisper_service, 'emit_line') as emit, \
+             patch.object(whisper_service, 'cancelled_session', 4):
+            whisper_service.emit_translation({"session": 4, "text": "Hola"})
+            whisper_service.emit_translation({"session": 5, "text": "Hola"})
+        assert emit.call_count == 1
+        assert emit.call_args[0][0].startswith("TRANSLATION: ")
+
+
+class TestCaptureMonitor:
+    """Test dropped-audio accounting in the capture path"""
+
+    def test_paced_reads_drop_nothing(self):
+        """Test reads keeping up with the wall clock report no loss"""
+        monitor = whisper_service.CaptureMonitor(rate=1000, chunk=100)
+        monitor.start(1, now=0.0)
+        for i in range(1, 11):
+            monitor.on_read(100, now=i * 0.1)
+        assert monitor.overflows == 0 and monitor.dropped == 0
+
+    def test_backlog_then_gap_counts_drop(self):
+        """Test a buffered backlog is ignored but a later stall is counted"""
+        monitor = whisper_service.CaptureMonitor(rate=1000, chunk=100)
+        monitor.start(1, now=0.0)
+        for _ in range(5):
+            monitor.on_read(100, now=0.0)  # stale backlog reads back instantly
+        monitor.on_read(100, now=0.1)
+        monitor.on_read(100, now=0.6)  # 400 ms of audio never arrived
+        assert monitor.overflows == 1
+        assert monitor.dropped == 300  # 400 ms deficit less one chunk of slack
+        with patch.dict(whisper_service.stats, {"capture_overflows": 0, "capture_dropped_ms": 0.0}):
+            report = monitor.finish(now=0.6)
+            assert report["overflows"] == 1 and report["dropped_ms"] == 300.0
+            assert whisper_service.stats["capture_overflows"] == 1
+            assert whisper_service.stats["last_capture"] is report
+
+    def test_late_reads_and_errors(self):
+        """Test stalled reads and read errors are counted per session"""
+        monitor = whisper_service.CaptureMonitor(rate=1000, chunk=100)
+        monitor.start(2, now=0.0)
+        monitor.on_read(100, now=0.1)
+        monitor.on_error()
+        monitor.on_read(100, now=0.5)  # 400 ms gap, four chunk periods
+        with patch.dict(whisper_service.stats):
+            report = monitor.finish(now=0.5)
+        assert report["late_reads"] == 1
+        assert report["read_errors"] == 1
+        assert report["max_gap_ms"] == 400.0
+        assert report["captured_samples"] == 200 and report["expected_samples"] == 500
+
+
+class TestSpeechGate:
+    """Test the pre-decode duration/energy gate"""
+
+    def test_short_press_skipped(self):
+        """Test a tap shorter than the minimum is not decoded"""
+        assert whisper_service.speech_gate([SPEECH_LIKE]) == "too_short"
+
+    def test_silence_skipped(self):
+        """Test a long but silent hold is not decoded"""
+        assert whisper_service.speech_gate([b'\x02\x00' * 1024] * 10) == "silent"
+
+    def test_speech_passes(self):
+        """Test loud audio of sufficient length goes to the model"""
+        assert whisper_service.speech_gate([SPEECH_LIKE] * 10) is None
+
+    def test_gated_final_never_calls_model(self):
+        """Test a silent final returns empty without touching the model and counts savings"""
+        mock_model = Mock()
+        with patch.object(whisper_service, 'model', mock_model), \
+             patch.object(whisper_service, 'model_ready', True), \
+             patch.dict(whisper_service.stats, {"gated_decodes": 0, "gate_seconds_saved": 0.0, "rtf": 0.5}):
+            assert whisper_service.transcribe_frames([b'\x00\x00' * 1024] * 10, 0, session=1) == ""
+            assert whisper_service.stats["gated_decodes"] == 1
+            assert whisper_service.stats["gate_seconds_saved"] == pytest.approx(0.32)
+        mock_model.transcribe.assert_not_called()
+
+
+class TestPartialDeltas:
+    """Test edit operations between successive hypotheses"""
+
+    def test_extension_is_append(self):
+        """Test a grown hypothesis only appends the new characters"""
+        assert whisper_service.text_edit("hello wor", "hello world") == (0, "ld")
+
+    def test_change_inside_word_retypes_word(self):
+        """Test a revised word is erased and retyped whole"""
+        assert whisper_service.text_edit("one two three", "one too three") == (10, " too three")
+
+    def test_truncation_at_word_boundary(self):
+        """Test dropping trailing words only erases them"""
+        assert whisper_service.text_edit("hello world", "hello") == (6, "")
+
+    def test_window_partials_build_whole_recording(self):
+        """Test partials of a recording longer than the window extend the hypothesis"""
+        windows = ["the quick brown", "quick brown fox jumps", "ick fox jumps over the", "over the lazy dog"]
+        hypothesis = whisper_service.anchor_partial("", windows[0], True)
+        edits = []
+        for text in windows[1:]:
+            new = whisper_service.anchor_partial(hypothesis, text, False)
+            edits.append(whisper_service.text_edit(hypothesis, new))
+            hypothesis = new
+        assert hypothesis == "the quick brown fox jumps over the lazy dog"
+        # Words that slid out of the window are never erased
+        assert all(bs == 0 for bs, _ in edits)
+
+    def test_unaligned_window_keeps_hypothesis(self):
+        """Test a window sharing no words with the hypothesis changes nothing"""
+        assert whisper_service.anchor_partial("hello there", "completely different", False) == "hello there"
+
+    def test_short_recording_uses_window(self):
+        """Test a window covering the whole recording replaces the hypothesis"""
+        assert whisper_service.anchor_partial("hello wor", "hello world", True) == "hello world"
+
+    def test_final_edit_emitted(self):
+        """Test a final in delta mode is sent as an edit against the typed partial"""
+        lines = []
+        with patch.object(whisper_service, 'partial_deltas', True), \
+             patch.object(whisper_service, 'transcribe_frames', return_value="hello world"), \
+             patch.object(whisper_service, 'emit_line', side_effect=lines.append), \
+             patch.object(whisper_service, 'cancelled_session', None), \
+             patch.object(whisper_service, 'session_id', 4), \
+             patch.object(whisper_service, 'last_partial_text', "hello wor"), \
+             patch.object(whisper_service, 'finals_pending', 1):
+            whisper_service.finalize_recording([b'\x00\x00'], 0, session=4)
+        assert lines == ['EDIT: {"bs":0,"text":"ld","final":true}']
+
+    def test_failed_final_keeps_partial(self):
+        """Test a final decode that raises still closes the recording with the typed partial"""
+        lines = []
+        with patch.object(whisper_service, 'partial_deltas', True), \
+             patch.object(whisper_service, 'stream_final', False), \
+             patch.object(whisper_service, 'transcribe_frames', side_effect=RuntimeError("decoder crashed")), \
+             patch.object(whisper_service, 'emit_line', side_effect=lines.append), \
+             patch.object(whisper_service, 'cancelled_session', None), \
+             patch.object(whisper_service, 'session_id', 4), \
+             patch.object(whisper_service, 'last_partial_text', "hello wor"), \
+             patch.object(whisper_service, 'finals_pending', 1), \
+             patch.dict(whisper_service.stats, {"final_errors": 0}):
+            whisper_service.finalize_recording([b'\x00\x00'], 0, session=4)
+            assert whisper_service.stats["final_errors"] == 1
+        assert lines[0] == 'EDIT: {"bs":0,"text":"","final":true}'
+        assert lines[1].startswith("EVENT: FINAL_FAILED ")
+        assert json.loads(lines[1].split(" ", 2)[2]) == {"session": 4, "error": "decoder crashed"}
+
+    def test_failed_streaming_final_commits_partial(self):
+        """Test a streaming final that raises sends the last partial as its segment"""
+        lines = []
+        with patch.object(whisper_service, 'transcribe_frames', side_effect=RuntimeError("decoder crashed")), \
+             patch.object(whisper_service, 'emit_line', side_effect=lines.append), \
+             patch.object(whisper_service, 'cancelled_session', None), \
+             patch.object(whisper_service, 'session_id', 4), \
+             patch.object(whisper_service, 'last_partial_text', "hello world"), \
+             patch.dict(whisper_service.stats, {"final_errors": 0}):
+            whisper_service.stream_final_recording([b'\x00\x00'], 0, session=4)
+        assert lines[0] == "SEGMENT: hello world"
+        assert lines[1].startswith("EVENT: COMMIT ")
+        assert lines[2].startswith("EVENT: FINAL_FAILED ")
+
+
+class TestLevelMeter:
+    """Test input level measurement for the widget"""
+
+    def test_silence_and_full_scale(self):
+        """Test silence maps to 0 and a full-scale square wave to 1"""
+        import numpy as np
+        assert whisper_service.measure_levels(np.zeros(1024, dtype=np.int16).tobytes())["peak"] == 0.0
+        loud = whisper_service.measure_levels((np.tile([32767, -32767], 512)).astype(np.int16).tobytes())
+        assert loud["rms"] == pytest.approx(1.0, abs=1e-3)
+        assert len(loud["bars"]) == whisper_service.LEVEL_BARS
+
+    def test_bars_follow_loudness_over_time(self):
+        """Test later bars are louder when the block gets louder"""
+        import numpy as np
+        ramp = (np.linspace(0, 1, 1024) * 20000 * np.sign(np.sin(np.arange(1024)))).astype(np.int16)
+        bars = whisper_service.measure_levels(ramp.tobytes())["bars"]
+        assert bars[-1] > bars[0]
+
+    def test_empty_block(self):
+        """Test no samples yields no level"""
+        assert whisper_service.measure_levels(b"") is None
+
+    def test_loop_survives_measurement_error(self):
+        """Test one failing tick is skipped and later ticks still emit levels"""
+        class StopLoop(Exception):
+            pass
+        frames = []
+        ticks = []
+
+        def sleep(_):
+            ticks.append(1)
+            if len(ticks) > 3:
+                raise StopLoop()
+            frames.append(b"\x00\x01" * 64)
+
+        with patch.object(whisper_service, 'level_hz', 20.0), \
+             patch.object(whisper_service, 'recording_flag', True), \
+             patch.object(whisper_service, 'frames', frames), \
+             patch.object(whisper_service.time, 'sleep', side_effect=sleep), \
+             patch.object(whisper_service, 'measure_levels', side_effect=[ValueError("bad block"), {"rms": 0.1}, {"rms": 0.2}]), \
+             patch.object(whisper_service, 'emit_event') as emit:
+            with pytest.raises(StopLoop):
+                whisper_service.level_meter_loop()
+        assert [c.args[1]["rms"] for c in emit.call_args_list] == [0.1, 0.2]
+
+
+class TestFinalClaim:
+    """Test STOP and hold release cannot both finalize one recording"""
+
+    def test_only_first_claim_wins(self):
+        """Test the second claimer sees the recording already finalized"""
+        with patch.object(whisper_service, 'recording_flag', True), \
+             patch.object(whisper_service, 'finals_pending', 0):
+            assert whisper_service.claim_final() is True
+            assert whisper_service.claim_final() is False
+            assert whisper_service.finals_pending == 1
+            assert whisper_service.recording_flag is False
+
+
+class TestPartialScheduling:
+    """Test the RTF-driven partial scheduler"""
+
+    def test_default_schedule_before_measurement(self):
+        """Test the fixed schedule is used until a partial has been timed"""
+        assert plan_partial(None) == (3.0, 0.8)
+
+    def test_slow_decoder_shrinks_window_and_backs_off(self):
+        """Test slow machines get short windows and long intervals"""
+        window, interval = plan_partial(0.8)
+        assert window == 1.5
+        assert interval == pytest.approx(1.8)
+
+    def test_fast_decoder_polls_quickly(self):
+        """Test fast machines get more context and quicker updates"""
+        window, interval = plan_partial(0.02)
+        assert window == 5.0
+        assert interval == 0.25
+
+    def test_pending_final_preempts_partials(self):
+        """Test partial decodes abort while a final is pending"""
+        whisper_service.finals_pending = 1
+        try:
+            with pytest.raises(DecodeCancelled):
+                collect_segments(iter([Mock(text="x")]), session=1, partial=True)
+            assert collect_segments(iter([Mock(text="x")]), session=1) == "x"
+        finally:
+            whisper_service.finals_pending = 0
+
+
+class TestStartupProfiling:
+    """Test lazy imports and the startup timeline"""
+
+    def test_import_does_not_open_devices_or_load_model(self):
+        """Test importing the module leaves audio and model untouched"""
+        assert whisper_service.audio is None
+        assert whisper_service.keyboard is None
+        assert whisper_service.model is None
+        assert any(p["phase"] == "import" for p in whisper_service.startup.report()["phases"])
+
+    def test_profiler_orders_phases(self):
+        """Test phases are reported in start order with durations"""
+        profiler = whisper_service.StartupProfiler(origin=0.0)
+        profiler.add("model_load", 0.010, 0.500)
+        profiler.add("audio_init", 0.002, 0.030)
+        report = profiler.report()
+        assert [p["phase"] for p in report["phases"]] == ["audio_init", "model_load"]
+        assert report["phases"][1]["duration_ms"] == 490.0
+        assert report["total_ms"] == 500.0
+
+
+class TestIdleUnload:
+    """Test the idle unload / reload policy"""
+
+    def test_unload_skipped_while_recently_active(self):
+        """Test a model used within the idle period stays loaded"""
+        with patch.object(whisper_service, 'model_ready', True), \
+             patch.object(whisper_service, 'model', Mock()), \
+             patch.object(whisper_service, 'last_activity', time.monotonic()):
+            assert whisper_service.unload_model("idle", 60) is False
+            assert whisper_service.model is not None
+
+    def test_unload_then_start_triggers_reload(self):
+        """Test unloading frees the model and the next trigger reloads it"""
+        with patch.object(whisper_service, 'model_ready', True), \
+             patch.object(whisper_service, 'model', Mock()), \
+             patch.object(whisper_service, 'last_activity', time.monotonic() - 120), \
+             patch.object(whisper_service, 'model_unloaded', False), \
+             patch.object(whisper_service, 'stop_stream'), \
+             patch.object(whisper_service, 'emit_event') as mock_emit, \
+             patch.object(whisper_service, 'load_model') as mock_load:
+            assert whisper_service.unload_model("idle", 60) is True
+            assert whisper_service.model is None
+            assert not whisper_service.decoder_ready()
+            assert mock_emit.call_args[0][0] == "MODEL_UNLOADED"
+
+            whisper_service.ensure_model_loaded("preload")
+            for _ in range(100):
+                if not whisper_service.model_reloading:
+                    break
+                time.sleep(0.01)
+            mock_load.assert_called_once_with("preload")
+            assert whisper_service.model_unloaded is False
+
+
+    def test_final_waits_for_reload_off_the_decode_thread(self):
+        """Test a final waits out an idle reload before its decode job is submitted"""
+        event = threading.Event()
+        with patch.object(whisper_service, 'model_reloading', True), \
+             patch.object(whisper_service, 'model_ready', False), \
+             patch.object(whisper_service, 'model_loaded_event', event), \
+             patch.object(whisper_service, 'stream_final', False), \
+             patch.object(whisper_service, 'cancelled_session', None), \
+             patch.object(whisper_service, 'finals_pending', 1), \
+             patch.object(whisper_service, 'emit_line'), \
+             patch.object(whisper_service, 'scheduled', return_value="") as mock_scheduled:
+            worker = threading.Thread(target=whisper_service.finalize_recording, args=([b'\x00\x00'], 0, 4))
+            worker.start()
+            time.sleep(0.05)
+            mock_scheduled.assert_not_called()
+            event.set()
+            worker.join(1)
+        mock_scheduled.assert_called_once()
+
+
 class TestAudioFunctions:
     """Test audio capture and processing functions"""
 
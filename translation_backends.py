@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Translation backends for SONU's translation service.
+
+Every backend translates lists of strings between SONU language codes ("en",
+"zh", ...) through translate_batch(texts, source_lang, target_lang), and
+keeps per-backend latency and throughput counters:
+
+    google   deep-translator's Google Translate client (network)
+    marian   offline CTranslate2 conversions of OPUS-MT (Marian) models
+    stub     deterministic "[es] text" output for tests and dry runs
+
+Usage: python translation_backends.py bench <locale.json|texts.txt> <target_lang> [backend ...]
+
+Marian models are looked up as <dir>/opus-mt-<src>-<tgt>/ (a CTranslate2
+model.bin plus source.spm / target.spm) in SONU_TRANSLATION_MODELS or the
+per-user Sonu translation_models folder.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+try:
+    from deep_translator import GoogleTranslator
+    GOOGLE_AVAILABLE = True
+except ImportError:
+    GOOGLE_AVAILABLE = False
+_google_warned = False  # the missing deep-translator is reported once, when google is selected
+
+# Language code mapping
+LANGUAGE_MAP = {
+    'en': 'en',
+    'es': 'es',
+    'fr': 'fr',
+    'de': 'de',
+    'zh': 'zh-CN',
+    'ja': 'ja',
+    'ko': 'ko',
+    'pt': 'pt',
+    'ru': 'ru',
+    'it': 'it',
+    'nl': 'nl',
+    'sv': 'sv',
+    'da': 'da',
+    'no': 'no',
+    'fi': 'fi',
+    'pl': 'pl',
+    'tr': 'tr',
+    'ar': 'ar',
+    'he': 'he',
+    'hi': 'hi',
+    'th': 'th',
+    'vi': 'vi',
+    'id': 'id',
+    'ms': 'ms',
+    'cs': 'cs',
+    'sk': 'sk',
+    'hu': 'hu',
+    'ro': 'ro',
+    'bg': 'bg',
+    'hr': 'hr',
+    'sr': 'sr',
+    'uk': 'uk',
+    'el': 'el',
+    'ca': 'ca',
+    'eu': 'eu',
+    'ga': 'ga',
+    'cy': 'cy'
+}
+
+DEFAULT_BACKEND = "google"
+
+_local = threading.local()
+stats_lock = threading.Lock()
+
+
+class TranslationBackend:
+    """Base class: subclasses implement _translate_batch and available()"""
+
+    name = None
+    batch_size = 25  # strings per call that suit this backend
+
+    def __init__(self):
+        self.stats = {"calls": 0, "strings": 0, "errors": 0, "seconds": 0.0}
+
+    def available(self, source_lang=None, target_lang=None):
+        return True
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        t0 = time.perf_counter()
+        try:
+            return self._translate_batch(list(texts), source_lang, target_lang)
+        except Exception:
+            with stats_lock:
+                self.stats["errors"] += 1
+            raise
+        finally:
+            with stats_lock:
+                self.stats["calls"] += 1
+                self.stats["strings"] += len(texts)
+                self.stats["seconds"] += time.perf_counter() - t0
+
+    def translate(self, text, source_lang, target_lang):
+        return self.translate_batch([text], source_lang, target_lang)[0]
+
+    def warm(self, source_lang, target_lang):
+        """Prepare a language pair on the calling thread so its first call pays no setup"""
+
+    def report(self):
+        with stats_lock:
+            s = dict(self.stats)
+        return {
+            "calls": s["calls"],
+            "strings": s["strings"],
+            "errors": s["errors"],
+            "avg_call_ms": round(s["seconds"] / s["calls"] * 1000, 2) if s["calls"] else None,
+            "strings_per_s": round(s["strings"] / s["seconds"], 1) if s["seconds"] else None,
+        }
+
+
+class _PooledRequests:
+    """Stand-in for the requests module inside deep_translator.google: GETs go
+    through one keep-alive Session per thread instead of a new connection each"""
+
+    def __init__(self, requests):
+        self._requests = requests
+
+    def __getattr__(self, name):
+        return getattr(self._requests, name)
+
+    def get(self, *args, **kwargs):
+        session = getattr(_local, "session", None)
+        if session is None:
+            session = _local.session = self._requests.Session()
+        return session.get(*args, **kwargs)
+
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate through deep-translator.
+
+    Translators are cached per thread and language pair: a GoogleTranslator
+    keeps its query parameters on the instance, so one instance must not be
+    shared by concurrent calls.
+    """
+
+    name = "google"
+
+    def __init__(self):
+        super().__init__()
+        self.translators_created = 0
+        self._http_pooled = False
+
+    def available(self, source_lang=None, target_lang=None):
+        return GOOGLE_AVAILABLE
+
+    def _pool_http(self):
+        if self._http_pooled:
+            return
+        self._http_pooled = True
+        try:
+            import requests
+            from deep_translator import google
+        except ImportError:
+            return
+        if getattr(google, "requests", None) is requests:
+            google.requests = _PooledRequests(requests)
+
+    def get_translator(self, source_lang, target_lang):
+        """GoogleTranslator for a language pair, reused by later calls on this thread"""
+        source_code = LANGUAGE_MAP.get(source_lang, 'auto')
+        target_code = LANGUAGE_MAP.get(target_lang, 'en')
+        translators = getattr(_local, "translators", None)
+        if translators is None:
+            translators = _local.translators = {}
+        translator = translators.get((source_code, target_code))
+        if translator is None:
+            self._pool_http()
+            translator = GoogleTranslator(source=source_code, target=target_code)
+            translators[(source_code, target_code)] = translator
+            with stats_lock:
+                self.translators_created += 1
+        return translator
+
+    def warm(self, source_lang, target_lang):
+        self.get_translator(source_lang, target_lang)
+
+    def _translate_batch(self, texts, source_lang, target_lang):
+        translator = self.get_translator(source_lang, target_lang)
+        if len(texts) == 1:
+            return [translator.translate(texts[0])]
+        return translator.translate_batch(texts)
+
+    def report(self):
+        report = super().report()
+        report["translators_created"] = self.translators_created
+        return report
+
+
+def default_model_dirs():
+    """Folders searched for offline translation models (SONU_TRANSLATION_MODELS overrides)"""
+    env_dirs = os.environ.get("SONU_TRANSLATION_MODELS")
+    if env_dirs:
+        return [d for d in env_dirs.split(os.pathsep) if d]
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        app_dir = os.path.join(home, "AppData", "Roaming", "Sonu")
+    elif sys.platform == "darwin":
+        app_dir = os.path.join(home, "Library", "Application Support", "Sonu")
+    else:
+        app_dir = os.path.join(home, ".local", "share", "Sonu")
+    return [os.path.join(app_dir, "translation_models"),
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "translation")]
+
+
+class MarianBackend(TranslationBackend):
+    """Offline OPUS-MT models converted for CTranslate2, one directory per language pair"""
+
+    name = "marian"
+    batch_size = 32
+
+    def __init__(self, model_dirs=None):
+        super().__init__()
+        self.model_dirs = model_dirs
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def model_path(self, source_lang, target_lang):
+        for folder in self.model_dirs or default_model_dirs():
+            path = os.path.join(folder, f"opus-mt-{source_lang}-{target_lang}")
+            if os.path.isfile(os.path.join(path, "model.bin")):
+                return path
+        return None
+
+    def available(self, source_lang=None, target_lang=None):
+        try:
+            import ctranslate2  # noqa: F401
+            import sentencepiece  # noqa: F401
+        except ImportError:
+            return False
+        if source_lang is None or target_lang is None:
+            return True
+        return self.model_path(source_lang, target_lang) is not None
+
+    def _load(self, source_lang, target_lang):
+        """(translator, source tokenizer, target tokenizer) for a pair, loaded once"""
+        with self._lock:
+            model = self._models.get((source_lang, target_lang))
+            if model is None:
+                import ctranslate2
+                import sentencepiece
+                path = self.model_path(source_lang, target_lang)
+                if path is None:
+                    raise FileNotFoundError(
+                        f"No offline model opus-mt-{source_lang}-{target_lang} in {self.model_dirs or default_model_dirs()}"
+                    )
+                threads = int(os.environ.get("SONU_TRANSLATION_THREADS", "0")) or max(1, (os.cpu_count() or 2) // 2)
+                model = (
+                    ctranslate2.Translator(path, device="cpu", intra_threads=threads),
+                    sentencepiece.SentencePieceProcessor(model_file=os.path.join(path, "source.spm")),
+                    sentencepiece.SentencePieceProcessor(model_file=os.path.join(path, "target.spm")),
+                )
+                self._models[(source_lang, target_lang)] = model
+            return model
+
+    def warm(self, source_lang, target_lang):
+        if self.available(source_lang, target_lang):
+            self._load(source_lang, target_lang)
+
+    def _translate_batch(self, texts, source_lang, target_lang):
+        translator, source_sp, target_sp = self._load(source_lang, target_lang)
+        tokens = [source_sp.encode(text, out_type=str) + ["</s>"] for text in texts]
+        results = translator.translate_batch(tokens, beam_size=2, max_batch_size=self.batch_size)
+        return [target_sp.decode(result.hypotheses[0]) for result in results]
+
+
+class StubBackend(TranslationBackend):
+    """Deterministic offline stand-in: "[<target>] <text>" with no model or network"""
+
+    name = "stub"
+    batch_size = 100
+
+    def _translate_batch(self, texts, source_lang, target_lang):
+        return [f"[{target_lang}] {text}" for text in texts]
+
+
+BACKENDS = {backend.name: backend for backend in (GoogleBackend(), MarianBackend(), StubBackend())}
+
+
+def get_backend(name=None, local_only=False):
+    """Backend by name; the default is SONU_TRANSLATION_BACKEND or google, or marian when local_only"""
+    if name is None:
+        name = "marian" if local_only else os.environ.get("SONU_TRANSLATION_BACKEND", DEFAULT_BACKEND)
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown translation backend: {name} (have {', '.join(BACKENDS)})")
+    if local_only and backend.name == "google":
+        raise ValueError("local_only excludes the google backend")
+    if backend.name == "google" and not GOOGLE_AVAILABLE and not _google_warned:
+        globals()['_google_warned'] = True
+        print(json.dumps({"error": "deep-translator not installed. Install with: pip install deep-translator"}), file=sys.stderr)
+    return backend
+
+
+def backend_stats():
+    return {name: backend.report() for name, backend in BACKENDS.items()}
+
+
+def benchmark(texts, target_lang, source_lang="en", names=None):
+    """Translate the same strings with each backend (no cache) and report latency and throughput"""
+    results = []
+    for name in names or list(BACKENDS):
+        backend = BACKENDS[name]
+        entry = {"backend": name, "strings": len(texts)}
+        if not backend.available(source_lang, target_lang):
+            entry["error"] = "not available"
+            results.append(entry)
+            continue
+        try:
+            t0 = time.perf_counter()
+            for i in range(0, len(texts), backend.batch_size):
+                backend.translate_batch(texts[i:i + backend.batch_size], source_lang, target_lang)
+            elapsed = time.perf_counter() - t0
+            entry.update({
+                "seconds": round(elapsed, 3),
+                "strings_per_s": round(len(texts) / elapsed, 1) if elapsed else None,
+                "avg_call_ms": backend.report()["avg_call_ms"],
+            })
+        except Exception as e:
+            entry["error"] = str(e)
+        results.append(entry)
+    return results
+
+
+def _load_texts(path):
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        texts = []
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            for value in node.values():
+                if isinstance(value, str) and value:
+                    texts.append(value)
+                elif isinstance(value, dict):
+                    stack.append(value)
+        return texts
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] != "bench":
+        sys.stderr.write("Usage: translation_backends.py bench <locale.json|texts.txt> <target_lang> [backend ...]\n")
+        sys.exit(1)
+    print(json.dumps(benchmark(_load_texts(sys.argv[2]), sys.argv[3], names=sys.argv[4:] or None), indent=2))
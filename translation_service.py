@@ -1,174 +1,701 @@
 #!/usr/bin/env python3
 """
 Translation Service for SONU
-Provides on-the-fly translation using deep-translator library
-No need to download translation files - translates dynamically
+Provides on-the-fly translation through pluggable backends (translation_backends.py):
+Google via deep-translator, offline Marian models, or a deterministic stub.
+Every call takes backend= (default SONU_TRANSLATION_BACKEND or google) and
+local_only= (never use the network).
+
+`python translation_service.py serve` keeps running and answers JSON-lines
+requests on stdin, reusing warm translators and HTTP connections:
+
+    {"id": 1, "op": "translate", "text": "Hello", "source_lang": "en", "target_lang": "es"}
+    -> {"id": 1, "result": {"translated": "Hola", "source": "Hello"}, "elapsed_ms": 180.2}
+
+SegmentTranslator is the in-process worker whisper_service feeds committed
+dictation segments to when pipeline translation is on.
 """
 
+import os
+import re
 import sys
 import json
+import time
+import sqlite3
+import hashlib
+import threading
 import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-try:
-    from deep_translator import GoogleTranslator
-    TRANSLATOR_AVAILABLE = True
-except ImportError:
-    TRANSLATOR_AVAILABLE = False
-    print(json.dumps({"error": "deep-translator not installed. Install with: pip install deep-translator"}), file=sys.stderr)
-
-# Language code mapping
-LANGUAGE_MAP = {
-    'en': 'en',
-    'es': 'es',
-    'fr': 'fr',
-    'de': 'de',
-    'zh': 'zh-CN',
-    'ja': 'ja',
-    'ko': 'ko',
-    'pt': 'pt',
-    'ru': 'ru',
-    'it': 'it',
-    'nl': 'nl',
-    'sv': 'sv',
-    'da': 'da',
-    'no': 'no',
-    'fi': 'fi',
-    'pl': 'pl',
-    'tr': 'tr',
-    'ar': 'ar',
-    'he': 'he',
-    'hi': 'hi',
-    'th': 'th',
-    'vi': 'vi',
-    'id': 'id',
-    'ms': 'ms',
-    'cs': 'cs',
-    'sk': 'sk',
-    'hu': 'hu',
-    'ro': 'ro',
-    'bg': 'bg',
-    'hr': 'hr',
-    'sr': 'sr',
-    'uk': 'uk',
-    'el': 'el',
-    'ca': 'ca',
-    'eu': 'eu',
-    'ga': 'ga',
-    'cy': 'cy'
-}
+from translation_backends import LANGUAGE_MAP, BACKENDS, get_backend, backend_stats
+
+stats_lock = threading.Lock()
+stats = {"requests": 0}
+
+
+def normalize_text(text):
+    """Cache key form of a string: surrounding whitespace stripped, inner runs collapsed"""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def default_cache_path():
+    """translation_cache.sqlite3 in the per-user Sonu data folder (SONU_TRANSLATION_CACHE overrides)"""
+    env_path = os.environ.get("SONU_TRANSLATION_CACHE")
+    if env_path:
+        return env_path
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        app_dir = os.path.join(home, "AppData", "Roaming", "Sonu")
+    elif sys.platform == "darwin":
+        app_dir = os.path.join(home, "Library", "Application Support", "Sonu")
+    else:
+        app_dir = os.path.join(home, ".local", "share", "Sonu")
+    return os.path.join(app_dir, "translation_cache.sqlite3")
+
+
+class TranslationCache:
+    """Translations kept in SQLite, with an in-memory LRU in front of it.
+
+    Entries are keyed by (source, target, backend, normalized text). Reads
+    that hit memory never touch the database; disk hits are promoted into
+    memory. max_rows bounds the database, evicting least recently written
+    rows. path None keeps the cache in memory only.
+    """
+
+    def __init__(self, path=None, memory_entries=5000, max_rows=100000):
+        self.memory_entries = memory_entries
+        self.max_rows = max_rows
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self._db = None
+        if path:
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations (source TEXT, target TEXT, backend TEXT, text TEXT,"
+                " translated TEXT, updated REAL, PRIMARY KEY (source, target, backend, text))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS translations_updated ON translations (updated)")
+            self._db.commit()
+
+    def _remember(self, key, translated):
+        self._memory[key] = translated
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, source, target, backend, text):
+        key = (source, target, backend, normalize_text(text))
+        with self._lock:
+            translated = self._memory.get(key)
+            if translated is not None:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return translated
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT translated FROM translations WHERE source=? AND target=? AND backend=? AND text=?", key
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.hits["disk"] += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put_many(self, source, target, backend, pairs):
+        """Store (text, translated) pairs; empty or failed translations are skipped"""
+        rows = [(source, target, backend, normalize_text(text), translated, time.time())
+                for text, translated in pairs if text and translated]
+        with self._lock:
+            for row in rows:
+                self._remember(row[:4], row[4])
+            if self._db is None or not rows:
+                return
+            self._db.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._writes += len(rows)
+            if self._writes >= 1000:
+                self._writes = 0
+                self._db.execute(
+                    "DELETE FROM translations WHERE rowid IN (SELECT rowid FROM translations"
+                    " ORDER BY updated DESC LIMIT -1 OFFSET ?)", (self.max_rows,)
+                )
+            self._db.commit()
+
+    def put(self, source, target, backend, text, translated):
+        self.put_many(source, target, backend, [(text, translated)])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+            rows = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0] if self._db else None
+            return {
+                "memory_entries": len(self._memory),
+                "disk_rows": rows,
+                "memory_hits": self.hits["memory"],
+                "disk_hits": self.hits["disk"],
+                "misses": self.misses,
+                "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else None,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The process-wide translation cache; falls back to memory only if the database cannot be opened"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = TranslationCache(default_cache_path())
+            except (OSError, sqlite3.Error) as e:
+                print(json.dumps({"warning": f"Translation cache on disk unavailable: {e}"}), file=sys.stderr)
+                _cache = TranslationCache(None)
+        return _cache
+
+
+def get_stats():
+    with stats_lock:
+        snapshot = dict(stats)
+    snapshot["cache"] = get_cache().stats()
+    snapshot["backends"] = backend_stats()
+    return snapshot
+
+
+def _unavailable(backend):
+    return {"error": "Translator not available", "backend": backend.name}
 
-def translate_text(text, target_lang='en', source_lang='en'):
+
+def translate_text(text, target_lang='en', source_lang='en', backend=None, local_only=False):
     """Translate a single text string"""
-    if not TRANSLATOR_AVAILABLE:
-        return {"error": "Translator not available"}
-    
     if target_lang == source_lang or not text:
         return {"translated": text}
+
+    try:
+        engine = get_backend(backend, local_only)
+    except ValueError as e:
+        return {"error": str(e), "translated": text}
+    with stats_lock:
+        stats["requests"] += 1
+    cache = get_cache()
+    cached = cache.get(source_lang, target_lang, engine.name, text)
+    if cached is not None:
+        return {"translated": cached, "source": text, "cached": True}
+
+    if not engine.available(source_lang, target_lang):
+        return _unavailable(engine)
     
     try:
-        target_code = LANGUAGE_MAP.get(target_lang, 'en')
-        source_code = LANGUAGE_MAP.get(source_lang, 'auto')
-        
-        translator = GoogleTranslator(source=source_code, target=target_code)
-        translated = translator.translate(text)
+        translated = engine.translate(text, source_lang, target_lang)
+        cache.put(source_lang, target_lang, engine.name, text, translated)
         
         return {"translated": translated, "source": text}
     except Exception as e:
         return {"error": str(e), "translated": text}
 
-def translate_batch(texts, target_lang='en', source_lang='en'):
+def translate_batch(texts, target_lang='en', source_lang='en', backend=None, local_only=False):
     """Translate multiple text strings"""
-    if not TRANSLATOR_AVAILABLE:
-        return {"error": "Translator not available"}
-    
     if target_lang == source_lang or not texts:
         return {"translated": texts}
     
     try:
-        target_code = LANGUAGE_MAP.get(target_lang, 'en')
-        source_code = LANGUAGE_MAP.get(source_lang, 'auto')
-        
-        translator = GoogleTranslator(source=source_code, target=target_code)
-        translated = translator.translate_batch(texts)
+        engine = get_backend(backend, local_only)
+        with stats_lock:
+            stats["requests"] += 1
+        cache = get_cache()
+        translated = [cache.get(source_lang, target_lang, engine.name, t) if t else t for t in texts]
+        missing = [i for i, t in enumerate(translated) if t is None]
+        if missing:
+            if not engine.available(source_lang, target_lang):
+                return _unavailable(engine)
+            fresh = engine.translate_batch([texts[i] for i in missing], source_lang, target_lang)
+            cache.put_many(source_lang, target_lang, engine.name, [(texts[i], t) for i, t in zip(missing, fresh)])
+            for i, t in zip(missing, fresh):
+                translated[i] = t
         
         return {"translated": translated, "source": texts}
     except Exception as e:
         return {"error": str(e), "translated": texts}
 
-def translate_dict(translations_dict, target_lang='en', source_lang='en'):
-    """Translate a dictionary of key-value pairs (like translation files)"""
-    if not TRANSLATOR_AVAILABLE:
-        return {"error": "Translator not available"}
-    
+DICT_BATCH_SIZE = 25  # strings per backend batch call
+DICT_WORKERS = 4  # concurrent batches; bounded to stay clear of rate limits
+
+
+def flatten_strings(tree, path=()):
+    """(key path, value) for every string leaf of a nested dict"""
+    for key, value in tree.items():
+        if isinstance(value, str):
+            yield path + (key,), value
+        elif isinstance(value, dict):
+            yield from flatten_strings(value, path + (key,))
+
+
+def map_strings(tree, translated):
+    """Copy of a nested dict with each string leaf replaced through the translated mapping"""
+    result = {}
+    for key, value in tree.items():
+        if isinstance(value, str):
+            result[key] = translated.get(value, value)
+        elif isinstance(value, dict):
+            result[key] = map_strings(value, translated)
+        else:
+            result[key] = value
+    return result
+
+
+def _translate_chunk(engine, chunk, source_lang, target_lang):
+    """Translate one batch; on failure retry its strings one by one, keeping the source for any that fail"""
+    try:
+        return engine.translate_batch(chunk, source_lang, target_lang), 1
+    except Exception:
+        out = []
+        for text in chunk:
+            try:
+                out.append(engine.translate(text, source_lang, target_lang))
+            except Exception:
+                out.append(None)
+        return out, 1 + len(chunk)
+
+
+def translate_dict(translations_dict, target_lang='en', source_lang='en',
+                   batch_size=None, workers=DICT_WORKERS, backend=None, local_only=False):
+    """Translate a dictionary of key-value pairs (like translation files).
+
+    All string leaves are flattened and deduplicated; cached strings are
+    reused and the rest go to the backend in batches of batch_size (default:
+    the backend's preferred size) on up to workers threads, then the nested
+    structure is rebuilt.
+    """
     if target_lang == source_lang:
         return {"translated": translations_dict}
     
+    t0 = time.perf_counter()
     try:
-        target_code = LANGUAGE_MAP.get(target_lang, 'en')
-        source_code = LANGUAGE_MAP.get(source_lang, 'auto')
-        
-        translator = GoogleTranslator(source=source_code, target=target_code)
-        
-        translated_dict = {}
-        for key, value in translations_dict.items():
-            if isinstance(value, str):
-                try:
-                    translated_dict[key] = translator.translate(value)
-                except:
-                    translated_dict[key] = value
-            elif isinstance(value, dict):
-                translated_dict[key] = translate_dict(value, target_lang, source_lang)["translated"]
+        engine = get_backend(backend, local_only)
+        batch_size = batch_size or engine.batch_size
+        with stats_lock:
+            stats["requests"] += 1
+        cache = get_cache()
+
+        leaves = list(flatten_strings(translations_dict))
+        unique = list(dict.fromkeys(value for _, value in leaves if value))
+        translated = {}
+        missing = []
+        for text in unique:
+            cached = cache.get(source_lang, target_lang, engine.name, text)
+            if cached is not None:
+                translated[text] = cached
             else:
-                translated_dict[key] = value
-        
-        return {"translated": translated_dict}
+                missing.append(text)
+
+        calls = 0
+        if missing:
+            if not engine.available(source_lang, target_lang):
+                return _unavailable(engine)
+            chunks = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+                results = list(pool.map(lambda chunk: _translate_chunk(engine, chunk, source_lang, target_lang), chunks))
+            fresh = []
+            for chunk, (out, chunk_calls) in zip(chunks, results):
+                calls += chunk_calls
+                fresh.extend((text, t) for text, t in zip(chunk, out) if t)
+            cache.put_many(source_lang, target_lang, engine.name, fresh)
+            translated.update(fresh)
+
+        return {
+            "translated": map_strings(translations_dict, translated),
+            # Strings that came back without a translation and were kept as the source
+            "untranslated": [text for text in unique if text not in translated],
+            "backend": engine.name,
+            "strings": len(leaves),
+            "unique": len(unique),
+            "cached": len(unique) - len(missing),
+            "requests": calls,
+            "wall_ms": round((time.perf_counter() - t0) * 1000, 1),
+        }
     except Exception as e:
         return {"error": str(e), "translated": translations_dict}
 
+def _source_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _write_json(path, data):
+    """Write JSON through a temporary file so readers never see a partial locale"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _nest(leaves):
+    """Nested dict from (key path, value) pairs"""
+    tree = {}
+    for path, value in leaves:
+        node = tree
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+    return tree
+
+
+def translate_locale(source_path, target_lang, out_dir=None, source_lang='en', backend=None, local_only=False):
+    """Bring <out_dir>/<target_lang>.json up to date with a source locale file.
+
+    A manifest in <out_dir>/.manifests/<target_lang>.json records a hash of
+    the source string each key was translated from, so only added or changed
+    keys are translated; removed keys are dropped. Keys whose translation
+    failed get no hash and are retried on the next run. A target file without
+    a manifest is adopted as up to date for the keys it has.
+    """
+    t0 = time.perf_counter()
+    try:
+        engine_name = get_backend(backend, local_only).name
+    except ValueError as e:
+        return {"target": target_lang, "error": str(e)}
+    out_dir = out_dir or os.path.dirname(os.path.abspath(source_path))
+    target_path = os.path.join(out_dir, f"{target_lang}.json")
+    manifest_path = os.path.join(out_dir, ".manifests", f"{target_lang}.json")
+
+    source = _read_json(source_path)
+    source_leaves = list(flatten_strings(source))
+    hashes = {json.dumps(path): _source_hash(text) for path, text in source_leaves}
+    existing = dict(flatten_strings(_read_json(target_path) or {}))
+    manifest = _read_json(manifest_path)
+    if manifest is None:
+        recorded = {json.dumps(path): hashes[json.dumps(path)] for path in existing if json.dumps(path) in hashes}
+    else:
+        recorded = manifest.get("keys", {})
+
+    stale = [(path, text) for path, text in source_leaves
+             if path not in existing or recorded.get(json.dumps(path)) != hashes[json.dumps(path)]]
+    fresh = {}
+    failed = set()
+    result = {}
+    if stale:
+        result = translate_dict(_nest(stale), target_lang, source_lang, backend=engine_name)
+        if "error" in result:
+            return {"target": target_lang, "error": result["error"]}
+        untranslated = set(result.get("untranslated", ()))
+        failed = {path for path, text in stale if text in untranslated}
+        fresh = {path: text for path, text in flatten_strings(result["translated"]) if path not in failed}
+
+    merged = {}
+    keys = {}
+    for path, text in source_leaves:
+        key = json.dumps(path)
+        if path in fresh:
+            merged[path], keys[key] = fresh[path], hashes[key]
+        elif path in failed:
+            # Keep the previous translation (and its hash) or the source text until a retry succeeds
+            merged[path] = existing.get(path, text)
+            if path in existing and key in recorded:
+                keys[key] = recorded[key]
+        else:
+            merged[path], keys[key] = existing[path], hashes[key]
+    # Non-string values (numbers, lists) are copied from the source as they are
+    output = map_strings(source, {})
+    for path, value in merged.items():
+        node = output
+        for key in path[:-1]:
+            node = node[key]
+        node[path[-1]] = value
+
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    _write_json(target_path, output)
+    _write_json(manifest_path, {"source_lang": source_lang, "keys": keys})
+    return {
+        "target": target_lang,
+        "path": target_path,
+        "translated_keys": len(stale) - len(failed),
+        "failed_keys": len(failed),
+        "reused_keys": len(source_leaves) - len(stale),
+        "removed_keys": len(set(existing) - set(merged)),
+        "requests": result.get("requests", 0),
+        "wall_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+
+
+def translate_locales(source_path, target_langs, out_dir=None, source_lang='en', backend=None):
+    """translate_locale for several targets, one after another"""
+    return [translate_locale(source_path, lang, out_dir, source_lang, backend) for lang in target_langs]
+
+
+def check_available(backend=None, local_only=False):
+    """Report whether translation is possible, which languages are mapped and which backends can run"""
+    try:
+        available = get_backend(backend, local_only).available()
+    except ValueError:
+        available = False
+    return {
+        "available": available,
+        "languages": list(LANGUAGE_MAP.keys()),
+        "backends": {name: engine.available() for name, engine in BACKENDS.items()},
+    }
+
+
+class SegmentTranslator:
+    """Warm worker translating committed dictation segments as they arrive.
+
+    submit() returns at once; one thread (whose translator stays warm)
+    translates queued segments in order, several per backend call when they
+    pile up, and hands each result to on_result. A segment whose normalized
+    text was already translated recently, or is queued in the same batch, is
+    answered without a backend call.
+    """
+
+    def __init__(self, target_lang, source_lang='en', on_result=None, backend=None, local_only=False,
+                 max_batch=8, remember=256):
+        self.target_lang = target_lang
+        self.source_lang = source_lang
+        self.on_result = on_result
+        self.engine = get_backend(backend, local_only)
+        self.max_batch = max(1, int(max_batch))
+        self.remember = remember
+        self._recent = OrderedDict()  # normalized source -> translation
+        self._queue = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._seq = 0
+        self._stats = {"segments": 0, "translated": 0, "deduplicated": 0, "errors": 0,
+                       "batches": 0, "latency_ms": 0.0, "max_latency_ms": 0.0}
+        self._thread = threading.Thread(target=self._run, name="segment-translator", daemon=True)
+        self._thread.start()
+
+    def submit(self, text, session=None):
+        """Queue one committed segment; returns its sequence number"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("segment translator is closed")
+            seq = self._seq
+            self._seq += 1
+            self._queue.append((seq, session, text, time.perf_counter()))
+            self._cond.notify()
+        return seq
+
+    def close(self, timeout=5):
+        """Finish queued segments, then stop the worker"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            s = dict(self._stats)
+            pending = len(self._queue)
+        done = s["translated"] + s["deduplicated"]
+        return {
+            "backend": self.engine.name,
+            "target_lang": self.target_lang,
+            "segments": s["segments"],
+            "translated": s["translated"],
+            "deduplicated": s["deduplicated"],
+            "errors": s["errors"],
+            "batches": s["batches"],
+            "pending": pending,
+            "avg_latency_ms": round(s["latency_ms"] / done, 1) if done else None,
+            "max_latency_ms": round(s["max_latency_ms"], 1),
+        }
+
+    def _run(self):
+        try:
+            self.engine.warm(self.source_lang, self.target_lang)
+        except Exception as e:
+            sys.stderr.write(f"Segment translator warm-up failed: {e}\n")
+            sys.stderr.flush()
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+            self._translate(batch)
+
+    def _translate(self, batch):
+        keys = [normalize_text(text) for _, _, text, _ in batch]
+        with self._cond:
+            known = {key: self._recent[key] for key in keys if key in self._recent}
+        fresh = [key for key in dict.fromkeys(keys) if key and key not in known]
+        error = None
+        if fresh:
+            result = translate_batch(fresh, self.target_lang, self.source_lang, backend=self.engine.name)
+            error = result.get("error")
+            if error is None:
+                known.update(zip(fresh, result["translated"]))
+        with self._cond:
+            self._stats["batches"] += 1 if fresh else 0
+            for key in fresh:
+                if key in known:
+                    self._recent[key] = known[key]
+            while len(self._recent) > self.remember:
+                self._recent.popitem(last=False)
+        translated_now = set()
+        for (seq, session, text, submitted), key in zip(batch, keys):
+            reply = {"seq": seq, "session": session, "source": text}
+            if key in known or not key:
+                reply["text"] = known.get(key, text)
+                reply["deduplicated"] = key not in fresh or key in translated_now
+                translated_now.add(key)
+            else:
+                reply["text"] = text  # keep the source when the backend fails
+                reply["error"] = error
+            latency_ms = (time.perf_counter() - submitted) * 1000
+            reply["latency_ms"] = round(latency_ms, 1)
+            with self._cond:
+                s = self._stats
+                s["segments"] += 1
+                if "error" in reply:
+                    s["errors"] += 1
+                else:
+                    s["deduplicated" if reply["deduplicated"] else "translated"] += 1
+                    s["latency_ms"] += latency_ms
+                    s["max_latency_ms"] = max(s["max_latency_ms"], latency_ms)
+            if self.on_result is not None:
+                try:
+                    self.on_result(reply)
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+
+
+SERVE_OPS = {
+    "translate": translate_text,
+    "translate_batch": translate_batch,
+    "translate_dict": translate_dict,
+    "translate_locale": translate_locale,
+    "check": check_available,
+    "stats": get_stats,
+}
+
+
+def handle_request(request):
+    """Run one serve-mode request; every field besides id and op is a keyword argument"""
+    response = {"id": request.get("id")}
+    op = SERVE_OPS.get(request.get("op"))
+    if op is None:
+        response["error"] = f"Unknown op: {request.get('op')}"
+        return response
+    params = {k: v for k, v in request.items() if k not in ("id", "op")}
+    t0 = time.perf_counter()
+    try:
+        response["result"] = op(**params)
+    except Exception as e:
+        response["error"] = str(e)
+    response["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    return response
+
+
+def serve(workers=4, stdin=None, stdout=None):
+    """Answer JSON-lines requests until stdin closes; replies may arrive out of order"""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    out_lock = threading.Lock()
+
+    def reply(message):
+        with out_lock:
+            stdout.write(json.dumps(message, ensure_ascii=False) + "\n")
+            stdout.flush()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                reply({"id": None, "error": f"Bad request: {e}"})
+                continue
+            pool.submit(lambda r: reply(handle_request(r)), request)
+
+
 def main():
     """Main entry point for translation service"""
     if len(sys.argv) < 2:
         print(json.dumps({"error": "No command specified"}), file=sys.stderr)
         sys.exit(1)
     
-    command = sys.argv[1]
+    argv = list(sys.argv)
+    backend = None
+    if "--backend" in argv:
+        # Any command: python translation_service.py <command> ... --backend marian
+        i = argv.index("--backend")
+        backend = argv[i + 1] if i + 1 < len(argv) else None
+        del argv[i:i + 2]
+    command = argv[1]
     
     try:
         if command == "translate":
             # Single text translation
             # Usage: python translation_service.py translate "Hello" en es
-            if len(sys.argv) < 5:
+            if len(argv) < 5:
                 print(json.dumps({"error": "Usage: translate <text> <source_lang> <target_lang>"}), file=sys.stderr)
                 sys.exit(1)
             
-            text = sys.argv[2]
-            source_lang = sys.argv[3]
-            target_lang = sys.argv[4]
+            text = argv[2]
+            source_lang = argv[3]
+            target_lang = argv[4]
             
-            result = translate_text(text, target_lang, source_lang)
+            result = translate_text(text, target_lang, source_lang, backend)
             print(json.dumps(result))
             
         elif command == "translate_dict":
             # Dictionary translation
             # Usage: python translation_service.py translate_dict <json_dict> <source_lang> <target_lang>
-            if len(sys.argv) < 5:
+            if len(argv) < 5:
                 print(json.dumps({"error": "Usage: translate_dict <json_dict> <source_lang> <target_lang>"}), file=sys.stderr)
                 sys.exit(1)
             
-            translations_json = sys.argv[2]
-            source_lang = sys.argv[3]
-            target_lang = sys.argv[4]
+            translations_json = argv[2]
+            source_lang = argv[3]
+            target_lang = argv[4]
             
             translations_dict = json.loads(translations_json)
-            result = translate_dict(translations_dict, target_lang, source_lang)
+            result = translate_dict(translations_dict, target_lang, source_lang, backend=backend)
             print(json.dumps(result))
             
+        elif command == "translate_locale":
+            # Incremental locale file translation
+            # Usage: python translation_service.py translate_locale <source.json> <target_lang>... [--out DIR]
+            args = argv[2:]
+            out_dir = None
+            if "--out" in args:
+                i = args.index("--out")
+                out_dir = args[i + 1]
+                args = args[:i] + args[i + 2:]
+            if len(args) < 2:
+                print(json.dumps({"error": "Usage: translate_locale <source.json> <target_lang>... [--out DIR]"}), file=sys.stderr)
+                sys.exit(1)
+            print(json.dumps(translate_locales(args[0], args[1:], out_dir, backend=backend), ensure_ascii=False))
+
+        elif command == "serve":
+            # Long-running JSON-lines mode
+            # Usage: python translation_service.py serve [workers]
+            serve(int(argv[2]) if len(argv) > 2 else 4)
+
         elif command == "check":
             # Check if translator is available
-            print(json.dumps({
-                "available": TRANSLATOR_AVAILABLE,
-                "languages": list(LANGUAGE_MAP.keys())
-            }))
+            print(json.dumps(check_available(backend)))
             
         else:
             print(json.dumps({"error": f"Unknown command: {command}"}), file=sys.stderr)
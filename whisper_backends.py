@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Speech-recognition backends for SONU's whisper service.
+
+Both backends expose the faster-whisper call shape, transcribe(audio) ->
+(segments, info), where audio is a 16 kHz mono WAV path or float32 array and
+segments is an iterable of objects with a .text attribute. faster-whisper
+also decodes several short clips in one pass with transcribe_batch(clips).
+The backend is picked from the model reference: GGML files (.bin / .gguf, as
+fetched by offline_model_downloader.py) go to whisper.cpp, everything else
+to faster-whisper.
+
+Usage: python whisper_backends.py bench <wav> [model ...]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import inspect
+import wave
+
+GGML_EXTENSIONS = (".bin", ".gguf")
+RATE = 16000
+BATCH_MAX_SECONDS = 30  # one Whisper window; longer clips need the segmenting transcribe()
+FEATURES_MIN_VERSION = (1, 1)  # older faster-whisper pads features to 30 s before decoding
+
+
+def is_ggml_file(model_ref):
+    return model_ref.lower().endswith(GGML_EXTENSIONS) and os.path.isfile(model_ref)
+
+
+def default_model_dirs():
+    """Folders the downloaders put GGML files in (WHISPER_MODEL_DIRS overrides)"""
+    env_dirs = os.environ.get("WHISPER_MODEL_DIRS")
+    if env_dirs:
+        return [d for d in env_dirs.split(os.pathsep) if d]
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        app_dir = os.path.join(home, "AppData", "Roaming", "Sonu", "models")
+    elif sys.platform == "darwin":
+        app_dir = os.path.join(home, "Library", "Application Support", "Sonu", "models")
+    else:
+        app_dir = os.path.join(home, ".local", "share", "Sonu", "models")
+    return [app_dir, os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")]
+
+
+def find_ggml_model(name, search_dirs=None):
+    """Path of a downloaded GGML model for a size name like "base", preferring quantized files"""
+    candidates = [f"ggml-{name}-q5_0.gguf", f"ggml-{name}.gguf", f"ggml-{name}.bin"]
+    for folder in search_dirs or default_model_dirs():
+        for filename in candidates:
+            path = os.path.join(folder, filename)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def read_wav(path):
+    """Load a 16-bit mono WAV as float32 samples in [-1, 1)"""
+    import numpy as np
+    with wave.open(path, "rb") as wf:
+        pcm = wf.readframes(wf.getnframes())
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+class PrecomputedFeatures:
+    """Stands in for faster-whisper's FeatureExtractor and returns features computed elsewhere"""
+
+    def __init__(self, extractor, features):
+        self._extractor = extractor
+        self._features = features
+
+    def __getattr__(self, name):
+        return getattr(self._extractor, name)
+
+    def expected_frames(self, waveform, kwargs):
+        """Frames the wrapped extractor would return for waveform, from its padding"""
+        padding = kwargs.get("padding")
+        if padding is None:
+            param = inspect.signature(self._extractor.__call__).parameters.get("padding")
+            padding = param.default if param is not None else self._extractor.hop_length
+        if padding is True:
+            padding = self._extractor.n_samples  # faster-whisper 1.0.x: pad to a 30 s window
+        return (len(waveform) + int(padding or 0)) // self._extractor.hop_length
+
+    def __call__(self, waveform, *args, **kwargs):
+        shape = (len(self._extractor.mel_filters), self.expected_frames(waveform, kwargs))
+        if self._features.shape != shape:
+            # Not the layout this faster-whisper decodes: compute the features normally
+            return self._extractor(waveform, *args, **kwargs)
+        return self._features
+
+
+class FasterWhisperBackend:
+    """CTranslate2 models via faster-whisper (model size name or converted model directory)"""
+
+    name = "faster-whisper"
+
+    def __init__(self, model_ref, device="cpu"):
+        from faster_whisper import WhisperModel
+        self.model_ref = model_ref
+        self.model = WhisperModel(model_ref, device=device)
+
+    def transcribe(self, audio, features=None):
+        """features, if given, are the log-mel frames of audio (see whisper_service.MelCache)"""
+        if features is None:
+            return self.model.transcribe(audio)
+        # transcribe() computes the spectrogram eagerly before returning the segment
+        # generator, so the extractor only needs swapping for the call itself
+        extractor = self.model.feature_extractor
+        self.model.feature_extractor = PrecomputedFeatures(extractor, features)
+        try:
+            return self.model.transcribe(audio)
+        finally:
+            self.model.feature_extractor = extractor
+
+    def feature_params(self):
+        """(mel filters, n_fft, hop) of the model's feature extractor.
+
+        Raises RuntimeError for faster-whisper before 1.1, which expects
+        features padded to 30 s rather than the span's own frames.
+        """
+        import faster_whisper
+        version = getattr(faster_whisper, "__version__", "0")
+        if tuple(int(part) for part in re.findall(r"\d+", version)[:2]) < FEATURES_MIN_VERSION:
+            raise RuntimeError(f"faster-whisper {version} pads features to 30 s (needs >= 1.1)")
+        extractor = self.model.feature_extractor
+        return extractor.mel_filters, extractor.n_fft, extractor.hop_length
+
+    def transcribe_batch(self, clips, beam_size=5):
+        """Decode several clips of at most 30 s in one encoder and one decoder pass.
+
+        clips are float32 sample arrays; returns one text per clip. Each clip
+        gets its own detected language, so mixed batches are fine.
+        """
+        import numpy as np
+        import ctranslate2
+        from faster_whisper.tokenizer import Tokenizer
+
+        extractor = self.model.feature_extractor
+        frames = extractor.nb_max_frames
+        mels = []
+        for clip in clips:
+            if len(clip) > BATCH_MAX_SECONDS * RATE:
+                raise ValueError(f"batched clips must be at most {BATCH_MAX_SECONDS} s")
+            mel = extractor(clip)[:, :frames]
+            mels.append(np.pad(mel, ((0, 0), (0, frames - mel.shape[1]))))
+        features = ctranslate2.StorageView.from_array(np.ascontiguousarray(np.stack(mels), dtype=np.float32))
+        ct2 = self.model.model
+        encoded = ct2.encode(features, to_cpu=False)
+
+        tokenizers = []
+        detected = ct2.detect_language(encoded) if ct2.is_multilingual else [None] * len(clips)
+        for languages in detected:
+            language = languages[0][0][2:-2] if languages else "en"  # "<|en|>" -> "en"
+            tokenizers.append(Tokenizer(self.model.hf_tokenizer, ct2.is_multilingual,
+                                        task="transcribe", language=language))
+        prompts = [self.model.get_prompt(tok, [], without_timestamps=True) for tok in tokenizers]
+        results = ct2.generate(encoded, prompts, beam_size=beam_size, max_length=448,
+                               suppress_blank=True, suppress_tokens=[-1])
+        return [tok.decode(result.sequences_ids[0]).strip() for tok, result in zip(tokenizers, results)]
+
+
+class WhisperCppBackend:
+    """GGML / GGUF models via whisper.cpp (pywhispercpp bindings)"""
+
+    name = "whisper.cpp"
+
+    def __init__(self, model_path, n_threads=None):
+        from pywhispercpp.model import Model
+        self.model_ref = model_path
+        threads = n_threads or int(os.environ.get("WHISPER_THREADS", "0")) or max(1, (os.cpu_count() or 2) - 1)
+        self.model = Model(model_path, n_threads=threads, print_realtime=False, print_progress=False)
+
+    def transcribe(self, audio):
+        # Pass samples rather than a path: pywhispercpp decodes paths through ffmpeg
+        if isinstance(audio, str):
+            audio = read_wav(audio)
+        return iter(self.model.transcribe(audio)), None
+
+
+def whisper_cpp_available():
+    try:
+        import pywhispercpp.model  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def resolve_backend(model_ref, preference="auto"):
+    """Pick (backend class, model reference) for WHISPER_MODEL and WHISPER_BACKEND.
+
+    preference is "auto", "faster-whisper" or "whisper.cpp". In auto mode a
+    GGML file path always uses whisper.cpp, and a size name uses a downloaded
+    GGML file when pywhispercpp is installed.
+    """
+    if preference == "faster-whisper":
+        return FasterWhisperBackend, model_ref
+    if is_ggml_file(model_ref):
+        return WhisperCppBackend, model_ref
+    if preference == "whisper.cpp" or whisper_cpp_available():
+        path = find_ggml_model(model_ref)
+        if path is not None:
+            return WhisperCppBackend, path
+        if preference == "whisper.cpp":
+            raise FileNotFoundError(f"No GGML model found for '{model_ref}' in {default_model_dirs()}")
+    return FasterWhisperBackend, model_ref
+
+
+def load_backend(model_ref, preference=None):
+    backend_cls, ref = resolve_backend(model_ref, preference or os.environ.get("WHISPER_BACKEND", "auto"))
+    return backend_cls(ref)
+
+
+def benchmark(wav_path, model_refs):
+    """Decode one recording with each model/backend and report load time and RTF"""
+    samples = read_wav(wav_path)
+    audio_s = len(samples) / RATE
+    results = []
+    for ref in model_refs:
+        for preference in ("faster-whisper", "whisper.cpp"):
+            entry = {"model": ref, "backend": preference}
+            try:
+                t0 = time.perf_counter()
+                backend = load_backend(ref, preference)
+                entry["model_ref"] = backend.model_ref
+                entry["load_ms"] = round((time.perf_counter() - t0) * 1000)
+                t0 = time.perf_counter()
+                segments, _ = backend.transcribe(samples)
+                text = "".join(seg.text for seg in segments).strip()
+                decode_s = time.perf_counter() - t0
+                entry.update({
+                    "decode_s": round(decode_s, 3),
+                    "audio_s": round(audio_s, 3),
+                    "rtf": round(decode_s / audio_s, 3) if audio_s else None,
+                    "text": text,
+                })
+            except Exception as e:
+                entry["error"] = str(e)
+            results.append(entry)
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "bench":
+        sys.stderr.write("Usage: whisper_backends.py bench <wav> [model ...]\n")
+        sys.exit(1)
+    print(json.dumps(benchmark(sys.argv[2], sys.argv[3:] or ["base"]), indent=2))
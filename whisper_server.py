@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Local transcription server for SONU.
+
+Keeps one Whisper model resident (loaded through whisper_service, so the same
+backend selection, dictionary, speech gate and decode cache apply) and lets
+several local tools share it over a Unix domain socket or localhost TCP.
+
+    python whisper_server.py --socket /tmp/sonu-whisper.sock
+    python whisper_server.py --port 8765
+
+Each connection is one client speaking JSON lines. Audio is 16 kHz mono
+int16 PCM, base64-encoded. Every request may carry an "id" that is echoed in
+its reply; decode replies can arrive out of order.
+
+    {"op": "transcribe", "id": 1, "audio": "<b64>"}      -> {"id": 1, "text": ...}
+    {"op": "transcribe", "id": 2, "path": "a.wav"}     (only with --audio-dir)
+    {"op": "stream_open", "stream": "s1"}
+    {"op": "stream_audio", "stream": "s1", "audio": "<b64>"}
+    {"op": "stream_partial", "id": 3, "stream": "s1", "seconds": 3}
+    {"op": "stream_close", "id": 4, "stream": "s1"}       -> final text
+    {"op": "stats"}                                      -> service + per-client stats
+    {"op": "ping"}
+
+Decodes run in priority classes: stream_close finals first, then
+stream_partial (a client's newer partial replaces its queued one), then
+transcribe requests. Those background decodes that arrive within
+--max-wait-ms of each other run as one batched pass of up to --max-batch
+spans; "interactive": true promotes a transcribe to the final class.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import wave
+import base64
+import argparse
+import itertools
+import threading
+import socketserver
+
+import whisper_service
+from decode_scheduler import DecodeScheduler, FINAL, PARTIAL, BACKGROUND
+
+scheduler = None
+client_ids = itertools.count(1)
+audio_dir = None  # the only directory "path" requests may read from (--audio-dir)
+MAX_STREAMS = int(os.environ.get("WHISPER_SERVER_MAX_STREAMS", "8"))  # open streams per client
+MAX_STREAM_SECONDS = float(os.environ.get("WHISPER_SERVER_MAX_STREAM_SECONDS", "300"))  # audio per stream
+
+
+def decode_chunks(chunks):
+    """Decode PCM chunks with the shared model; runs on the scheduler thread"""
+    if not chunks or whisper_service.gated(chunks):
+        return ""
+    return whisper_service.run_decode(chunks)
+
+
+def decode_batch(spans):
+    """Batch function for the scheduler: gate each span, decode the rest together"""
+    texts = [""] * len(spans)
+    live = [i for i, chunks in enumerate(spans) if chunks and not whisper_service.gated(chunks)]
+    for i, text in zip(live, whisper_service.run_decode_batch([spans[i] for i in live])):
+        texts[i] = text
+    return texts
+
+
+def resolve_audio_path(path):
+    """Real path of a client-named WAV file, refused outside audio_dir"""
+    if not audio_dir:
+        raise ValueError("path requests are disabled (start the server with --audio-dir)")
+    root = os.path.realpath(audio_dir)
+    full = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, full]) != root:
+        raise ValueError("path is outside the audio directory")
+    return full
+
+
+def read_wav_pcm(path):
+    with wave.open(path, "rb") as wf:
+        if wf.getframerate() != whisper_service.RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError("expected a 16 kHz mono 16-bit WAV file")
+        return wf.readframes(wf.getnframes())
+
+
+class ClientHandler(socketserver.StreamRequestHandler):
+    """One connected tool: its open audio streams and outstanding decodes"""
+
+    def setup(self):
+        super().setup()
+        self.client = f"client-{next(client_ids)}"
+        self.streams = {}
+        self.stream_bytes = {}
+        # Replies are written by this client's own thread: decode callbacks run on
+        # the scheduler thread and must never block on a client that stops reading
+        self.replies = queue.Queue()
+        self.writer = threading.Thread(target=self.write_replies, name=f"{self.client}-writer", daemon=True)
+        self.writer.start()
+
+    def send(self, message):
+        self.replies.put((json.dumps(message) + "\n").encode())
+
+    def write_replies(self):
+        while True:
+            line = self.replies.get()
+            if line is None:
+                return
+            try:
+                self.wfile.write(line)
+                self.wfile.flush()
+            except (OSError, ValueError):
+                return  # client went away (ValueError: its socket file is already closed); its queued jobs are dropped in finish()
+
+    def decode(self, request, chunks, priority=BACKGROUND):
+        """Queue a decode for this client; background decodes are batched"""
+        if request.get("interactive"):
+            priority = FINAL
+        if priority == BACKGROUND and scheduler.max_batch > 1:
+            future = scheduler.submit_batched(self.client, chunks)
+        else:
+            future = scheduler.submit(self.client, decode_chunks, chunks,
+                                      priority=priority, supersede=priority == PARTIAL)
+        self.reply_when_done(request.get("id"), future)
+
+    def reply_when_done(self, req_id, future):
+        submitted = time.perf_counter()
+
+        def done(f):
+            if f.cancelled():
+                return
+            reply = {"id": req_id, "elapsed_ms": round((time.perf_counter() - submitted) * 1000, 1)}
+            error = f.exception()
+            if error is not None:
+                reply["error"] = str(error)
+            else:
+                reply["text"] = f.result()
+            self.send(reply)
+
+        future.add_done_callback(done)
+
+    def handle(self):
+        self.send({"op": "hello", "client": self.client})
+        for raw in self.rfile:
+            line = raw.decode("utf-8", "replace").strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                self.send({"error": f"bad request: {e}"})
+                continue
+            try:
+                self.dispatch(request)
+            except Exception as e:
+                self.send({"id": request.get("id"), "error": str(e)})
+
+    def dispatch(self, request):
+        op = request.get("op")
+        req_id = request.get("id")
+        if op == "ping":
+            self.send({"id": req_id, "pong": True, "model_ready": whisper_service.decoder_ready()})
+        elif op == "transcribe":
+            if "path" in request:
+                pcm = read_wav_pcm(resolve_audio_path(request["path"]))
+            else:
+                pcm = base64.b64decode(request["audio"])
+            self.decode(request, [pcm])
+        elif op == "stream_open":
+            if request["stream"] not in self.streams and len(self.streams) >= MAX_STREAMS:
+                raise ValueError(f"too many open streams (limit {MAX_STREAMS})")
+            self.streams[request["stream"]] = []
+            self.stream_bytes[request["stream"]] = 0
+            self.send({"id": req_id, "stream": request["stream"], "ok": True})
+        elif op == "stream_audio":
+            # No reply unless refused: audio is fire-and-forget so clients can push at capture rate
+            pcm = base64.b64decode(request["audio"])
+            size = self.stream_bytes[request["stream"]] + len(pcm)
+            if size > MAX_STREAM_SECONDS * whisper_service.RATE * whisper_service.SAMPLE_WIDTH:
+                raise ValueError(f"stream audio over {MAX_STREAM_SECONDS:g} s")
+            self.streams[request["stream"]].append(pcm)
+            self.stream_bytes[request["stream"]] = size
+        elif op == "stream_partial":
+            chunks = self.streams[request["stream"]]
+            tail = tail_seconds(chunks, float(request.get("seconds", 3)))
+            self.decode(request, tail, PARTIAL)
+        elif op == "stream_close":
+            chunks = self.streams.pop(request["stream"])
+            self.stream_bytes.pop(request["stream"], None)
+            self.decode(request, chunks, FINAL)
+        elif op == "stats":
+            self.send({
+                "id": req_id,
+                "service": whisper_service.get_stats(),
+                "queue_depth": scheduler.pending(),
+                "clients": scheduler.client_stats(),
+                "batching": scheduler.batch_stats(),
+            })
+        else:
+            self.send({"id": req_id, "error": f"unknown op: {op}"})
+
+    def finish(self):
+        scheduler.forget(self.client)
+        self.replies.put(None)
+        self.writer.join(1.0)  # a client that stopped reading is cut off when its socket closes
+        super().finish()
+
+
+def tail_seconds(chunks, seconds):
+    """Copy of the last `seconds` of audio in chunks, as one chunk"""
+    pcm = b"".join(chunks)
+    keep = int(seconds * whisper_service.RATE) * whisper_service.SAMPLE_WIDTH
+    return [pcm[-keep:]] if keep else []
+
+
+class ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_server(socket_path=None, port=None):
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        # Local user only: the socket is created 0600 by bind itself, so there
+        # is no window in which another user can connect before a chmod
+        old_umask = os.umask(0o177)
+        try:
+            return ThreadingUnixServer(socket_path, ClientHandler)
+        finally:
+            os.umask(old_umask)
+    # Loopback only: the server has no authentication
+    return ThreadingTCPServer(("127.0.0.1", port), ClientHandler)
+
+
+def start_scheduler(max_batch=1, max_wait=0.0):
+    global scheduler
+    scheduler = DecodeScheduler(batch_fn=decode_batch, max_batch=max_batch, max_wait=max_wait,
+                                on_start=whisper_service.tune_decode_thread)
+    # Anything whisper_service schedules itself shares the same decode thread
+    whisper_service.decoder = scheduler
+    return scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Share one resident Whisper model between local clients")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--socket", help="Unix domain socket path")
+    group.add_argument("--port", type=int, help="TCP port on 127.0.0.1")
+    parser.add_argument("--max-batch", type=int, default=int(os.environ.get("WHISPER_MAX_BATCH", "4")),
+                        help="most spans decoded in one batched pass (1 disables batching)")
+    parser.add_argument("--max-wait-ms", type=float, default=float(os.environ.get("WHISPER_BATCH_WAIT_MS", "50")),
+                        help="longest a span waits for others to join its batch")
+    parser.add_argument("--audio-dir", help="directory \"path\" requests may read WAV files from (off by default)")
+    args = parser.parse_args()
+    globals()['audio_dir'] = args.audio_dir
+
+    # Clients send their own audio, so there is no shared capture ring to decode from
+    whisper_service.use_decode_worker = False
+    whisper_service.load_model()
+    whisper_service.get_postprocessor()  # compile the dictionary before the first client decode
+    start_scheduler(args.max_batch, args.max_wait_ms / 1000.0)
+    server = make_server(args.socket, args.port)
+    sys.stderr.write(f"Whisper server listening on {args.socket or f'127.0.0.1:{args.port}'}\n")
+    sys.stderr.flush()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -1,80 +1,678 @@
+import time
+
+IMPORT_STARTED = time.perf_counter()
+
 import sys
 import threading
-import time
 import wave
 import os
+import re
+import json
+import gc
+import hashlib
 import tempfile
+from collections import OrderedDict
+from concurrent.futures import CancelledError
+from contextlib import contextmanager
 
-import numpy as np
-import keyboard
-
-try:
-    import pyaudio
-except Exception as e:
-    sys.stderr.write(f"PyAudio import error: {e}\n")
-    sys.stderr.flush()
-    raise
-
-try:
-    from faster_whisper import WhisperModel
-except Exception as e:
-    sys.stderr.write(f"faster-whisper import error: {e}\n")
-    sys.stderr.flush()
-    raise
+from decode_scheduler import DecodeScheduler, FINAL, PARTIAL
 
+# pyaudio, keyboard and the speech backend (whisper_backends) are imported
+# lazily by init_audio(), init_keyboard() and load_model(), so importing this
+# module stays cheap and main() can overlap device setup with the model load.
+pyaudio = None
+keyboard = None
 
 CHUNK = 1024
-FORMAT = pyaudio.paInt16
+FORMAT = 8  # pyaudio.paInt16
+SAMPLE_WIDTH = 2  # bytes per paInt16 sample
 CHANNELS = 1
 RATE = 16000
+IMPORT_BUDGET_MS = 150  # module import should not pull in heavy dependencies
 
 recording_flag = False
 frames = []
-audio = pyaudio.PyAudio()
+audio = None  # pyaudio.PyAudio(), opened by init_audio()
 stream = None
 lock = threading.Lock()
+stdout_lock = threading.Lock()
 last_partial_text = ""
+session_id = 0  # incremented on every START
+cancelled_session = None  # session whose decodes must be abandoned (CANCEL)
+finals_pending = 0  # finals requested but not yet written; partials yield to them
+
+# Adaptive partial schedule: window and interval follow the measured partial RTF
+PARTIAL_MIN_WINDOW = 1.5
+PARTIAL_MAX_WINDOW = 5.0
+PARTIAL_MIN_INTERVAL = 0.25
+PARTIAL_MAX_INTERVAL = 2.0
+PARTIAL_TARGET_LATENCY = 0.6  # seconds one partial decode should take
+PARTIAL_POLL = 0.05
+ANCHOR_MIN_WORDS = 2  # window words that must match the hypothesis to splice it
+ANCHOR_MAX_SKIP = 2  # leading window words allowed to differ (cut off by the window edge)
+
+stats_lock = threading.Lock()
+stats = {
+    "decodes": 0,
+    "decode_seconds": 0.0,
+    "audio_seconds": 0.0,
+    "rtf": None,  # running real-time factor (decode time / audio time)
+    "partial_rtf": None,
+    "partial_window": None,
+    "partial_interval": None,
+    "partials_skipped": 0,
+    "partials_preempted": 0,
+    "cancelled_decodes": 0,
+    "decode_seconds_saved": 0.0,
+    "unloads": 0,
+    "reloads": 0,
+    "reload_ms_last": None,
+    "cache_hits": 0,
+    "cache_misses": 0,
+    "final_first_segment_ms": None,  # time-to-first-word of the last streamed final
+    "final_errors": 0,  # finals whose decode raised (FINAL_FAILED)
+    "capture_overflows": 0,  # reads after which the wall-clock sample deficit grew
+    "capture_dropped_ms": 0.0,  # audio PortAudio discarded while capture was starved
+    "capture_read_errors": 0,
+    "capture_late_reads": 0,
+    "last_capture": None,  # report of the most recent recording session
+    "gated_decodes": 0,  # decodes skipped as too short or silent
+    "gate_seconds_saved": 0.0,
+    "backend": None,  # "faster-whisper" or "whisper.cpp"; rtf is comparable across runs
+    "model_ref": None,
+    "batched_decodes": 0,  # batched encoder/decoder passes (server mode)
+    "batched_spans": 0,
+    "mel_frames_computed": 0,  # STFT frames computed for decodes
+    "mel_frames_reused": 0,  # frames served from the recording's mel cache
+}
 
 model_size = os.environ.get("WHISPER_MODEL", "base")
+backend_preference = os.environ.get("WHISPER_BACKEND", "auto")  # auto | faster-whisper | whisper.cpp
 model = None  # Initialize as None
 model_ready = False
 
-def load_model():
-    """Load the Whisper model - this can take a few seconds on first load"""
-    global model, model_ready
+# Optionally host the model in decode_worker.py so decoding never competes
+# with audio capture for this interpreter's GIL
+use_decode_worker = os.environ.get("WHISPER_DECODE_WORKER", "").lower() in ("1", "true", "yes")
+decode_worker = None
+session_start_pos = 0  # ring position of the first sample of the current recording
+
+# CPU placement: optionally reserve a core for the capture thread at raised
+# priority and keep decoding on the other cores (see cpu_affinity.py)
+capture_core_spec = os.environ.get("WHISPER_CAPTURE_CORE", "")  # "" off, "auto" = last core, or an index
+capture_boost = os.environ.get("WHISPER_CAPTURE_PRIORITY", "").lower() in ("1", "true", "yes")
+CAPTURE_NICE = -10
+DECODE_NICE = 5  # used for decode threads when the capture thread cannot be raised
+capture_cores = None
+decode_cores = None  # also pinned per decode thread where the process default does not reach
+decode_nice = None
+
+# Pre-decode gate: taps and silent holds never reach the model (Whisper tends
+# to hallucinate "Thank you." on them)
+MIN_DECODE_SECONDS = float(os.environ.get("WHISPER_MIN_DECODE_SECONDS", "0.3"))
+SILENCE_DB = float(os.environ.get("WHISPER_SILENCE_DB", "-45"))  # frame RMS below this is silence
+MIN_VOICED_SECONDS = 0.15  # voiced audio needed before a span is worth decoding
+GATE_FRAME_SECONDS = 0.03
+
+BATCH_MAX_SECONDS = 30  # spans longer than one Whisper window are never batched
+
+# Level meter for the widget waveform: RMS/peak of newly captured audio,
+# emitted as `EVENT: LEVEL {...}` at most level_hz times per second
+level_hz = float(os.environ.get("WHISPER_LEVEL_HZ", "20") or 0)  # 0 disables
+LEVEL_FLOOR_DB = -60.0  # maps to level 0; 0 dBFS maps to 1
+LEVEL_BARS = 8  # the widget draws eight bars
+
+# Partial deltas: instead of the whole hypothesis, send the edit that turns the
+# text already typed into the new one: `EDIT: {"bs": N, "text": "..."}`
+partial_deltas = os.environ.get("WHISPER_PARTIAL_DELTAS", "").lower() in ("1", "true", "yes")
+
+# Streaming finals: write each segment as `SEGMENT: text` the moment the
+# generator yields it, then `EVENT: COMMIT {...}` once the final is complete
+stream_final = os.environ.get("WHISPER_STREAM_FINAL", "").lower() in ("1", "true", "yes")
+
+# Incremental log-mel features: the STFT of each recording is extended only by
+# newly captured samples, and faster-whisper decodes take the cached frames
+# instead of recomputing the spectrogram of every overlapping partial window
+use_mel_cache = os.environ.get("WHISPER_MEL_CACHE", "1").lower() not in ("0", "false", "no")
+mel_cache = None  # MelCache for the loaded backend, when it accepts precomputed features
+
+# Pipeline translation: every committed segment (a SEGMENT line, or the whole
+# final when finals are not streamed) goes to a warm SegmentTranslator, and
+# its translation comes back as `TRANSLATION: {...}` about one segment later
+translate_to = os.environ.get("WHISPER_TRANSLATE_TO", "").strip().lower()  # "" = off
+translate_from = os.environ.get("WHISPER_TRANSLATE_FROM", "en").strip().lower()
+translate_backend = os.environ.get("WHISPER_TRANSLATE_BACKEND") or None  # translation_backends name
+segment_translator = None
+translator_lock = threading.Lock()
+
+# All decodes go through one DecodeScheduler thread: finals before partials
+# before background work, and a final drops partials still waiting to run
+DICTATION_CLIENT = "dictation"
+decoder = None  # created on first use by get_decoder(); the server installs its own
+decoder_lock = threading.Lock()
+
+# Idle policy: unload the model and close the stream after a quiet period (or
+# under memory pressure while idle); START or PRELOAD brings it back
+idle_unload_seconds = float(os.environ.get("WHISPER_IDLE_UNLOAD", "0") or 0)  # 0 = never
+min_available_mb = float(os.environ.get("WHISPER_MIN_AVAILABLE_MB", "0") or 0)  # 0 = ignore memory pressure
+PRESSURE_MIN_IDLE = 30.0  # never unload for memory pressure within this many seconds of use
+IDLE_CHECK_INTERVAL = 5.0
+RELOAD_WAIT_TIMEOUT = 60.0
+last_activity = time.monotonic()
+model_state_lock = threading.Lock()  # serialises unload against reload triggers
+model_unloaded = False
+model_reloading = False
+model_loaded_event = threading.Event()  # set whenever a load attempt has finished
+
+dictionary_path = os.environ.get(
+    "WHISPER_DICTIONARY",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "dictionary.json"),
+)
+
+
+class TextPostProcessor:
+    """Applies dictionary replacements and casing rules in a single regex pass.
+
+    All rule keys are folded into one trie-shaped pattern, so matching costs
+    O(len(text) * longest key) regardless of how many rules are loaded.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = {}
+        for source, target in (rules or {}).items():
+            key = source.strip().lower()
+            if key:
+                self.rules[key] = target
+        self.pattern = None
+        if self.rules:
+            body = self._trie_regex(self.rules.keys())
+            self.pattern = re.compile(r"(?<!\w)" + body + r"(?!\w)", re.IGNORECASE)
+
+    @staticmethod
+    def _trie_regex(keys):
+        trie = {}
+        for key in keys:
+            node = trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[""] = True
+
+        def build(node):
+            branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+            if not branches:
+                return ""
+            group = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            if "" in node:
+                # Key ends here but longer keys continue: greedy optional keeps longest match
+                return "(?:" + group + ")?"
+            return group
+
+        return build(trie)
+
+    def _replace(self, match):
+        found = match.group(0)
+        target = self.rules.get(found.lower())
+        if target is None:
+            return found
+        # Keep sentence-initial capitalisation for plain lowercase replacements
+        if found[:1].isupper() and target == target.lower():
+            return target[:1].upper() + target[1:]
+        return target
+
+    def apply(self, text):
+        if not text or self.pattern is None:
+            return text
+        return self.pattern.sub(self._replace, text)
+
+
+def parse_dictionary_rules(entries):
+    """Build a replacement table from dictionary.json entries.
+
+    - "btw => by the way" or {"from": "btw", "to": "by the way"}: replacement
+    - "iPhone": casing rule (only words with uppercase letters, plain
+      lowercase entries are vocabulary and left alone)
+    """
+    rules = {}
+    for entry in entries or []:
+        source = target = None
+        if isinstance(entry, dict):
+            source, target = entry.get("from"), entry.get("to")
+        elif isinstance(entry, str):
+            if "=>" in entry:
+                source, target = entry.split("=>", 1)
+            elif entry.strip() != entry.strip().lower():
+                source = target = entry
+        if isinstance(source, str) and isinstance(target, str) and source.strip():
+            rules[source.strip()] = target.strip()
+    return rules
+
+
+def load_dictionary():
+    """(Re)load the user dictionary and swap in a freshly compiled post-processor"""
+    global text_postprocessor
+    with dictionary_lock:
+        text_postprocessor = compile_dictionary()
+        return len(text_postprocessor.rules)
+
+
+def compile_dictionary():
+    entries = []
+    try:
+        if os.path.exists(dictionary_path):
+            with open(dictionary_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+    except Exception as e:
+        sys.stderr.write(f"Failed to load dictionary '{dictionary_path}': {e}\n")
+        sys.stderr.flush()
+    return TextPostProcessor(parse_dictionary_rules(entries))
+
+
+def get_postprocessor():
+    """The compiled dictionary, built on first use so importing this module stays cheap"""
+    global text_postprocessor
+    processor = text_postprocessor
+    if processor is None:
+        with dictionary_lock:
+            if text_postprocessor is None:
+                text_postprocessor = compile_dictionary()
+            processor = text_postprocessor
+    return processor
+
+
+def postprocess_text(text):
+    """Post-process a transcript. Used identically for partials and finals."""
+    try:
+        return get_postprocessor().apply(text)
+    except Exception as e:
+        sys.stderr.write(f"Post-processing error: {e}\n")
+        sys.stderr.flush()
+        return text
+
+
+text_postprocessor = None  # compiled on first use (see get_postprocessor)
+dictionary_lock = threading.Lock()
+
+
+class StartupProfiler:
+    """Per-phase startup timeline, reported with `--profile-startup`"""
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.phases = []
+        self._lock = threading.Lock()
+
+    def _ms(self, t):
+        return round((t - self.origin) * 1000, 1)
+
+    def add(self, name, start, end):
+        with self._lock:
+            self.phases.append({
+                "phase": name,
+                "thread": threading.current_thread().name,
+                "start_ms": self._ms(start),
+                "end_ms": self._ms(end),
+                "duration_ms": round((end - start) * 1000, 1),
+            })
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def report(self):
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p["start_ms"])
+        return {"phases": phases, "total_ms": max((p["end_ms"] for p in phases), default=0.0)}
+
+
+startup = StartupProfiler(IMPORT_STARTED)
+profile_startup = "--profile-startup" in sys.argv
+
+
+def load_model(trigger=None):
+    """Load the Whisper model - this can take a few seconds on first load.
+
+    trigger names what asked for a reload after an idle unload; the first
+    load (trigger None) announces READY, reloads announce MODEL_RELOADED.
+    """
+    global model, model_ready, decode_worker
+    t0 = time.perf_counter()
+    tune_decode_thread()
     try:
         sys.stderr.write(f"Loading Whisper model '{model_size}'...\n")
         sys.stderr.flush()
         
-        # Check if model_size is a path to a local directory (from offline downloader)
-        if os.path.isdir(model_size):
-            # Load model from local directory path
-            sys.stderr.write(f"Loading model from local directory: {model_size}\n")
+        if use_decode_worker and decode_worker is not None:
+            # Reload after an idle unload: the ring survived, only the process went away
+            decode_worker.start_worker()
+            decode_worker.wait_ready()
+        elif use_decode_worker:
+            from decode_worker import DecodeWorkerClient
+            sys.stderr.write("Hosting model in a separate decode worker process\n")
             sys.stderr.flush()
-            model = WhisperModel(model_size, device="cpu")
+            with startup.phase("decode_worker_load"):
+                worker = DecodeWorkerClient(model_size, rate=RATE)
+                worker.wait_ready()
+            decode_worker = worker
         else:
-            # Load model using faster-whisper's built-in Hugging Face cache
-            model = WhisperModel(model_size, device="cpu")
+            with startup.phase("import_backend"):
+                from whisper_backends import resolve_backend
+                backend_cls, model_ref = resolve_backend(model_size, backend_preference)
+            with startup.phase("model_load"):
+                # model_size may be a size name, a converted CTranslate2 directory
+                # or a GGML file from the offline downloader
+                if model_ref != model_size:
+                    sys.stderr.write(f"Using downloaded model file: {model_ref}\n")
+                    sys.stderr.flush()
+                try:
+                    model = backend_cls(model_ref)
+                except ImportError as e:
+                    sys.stderr.write(f"{backend_cls.name} import error: {e}\n")
+                    sys.stderr.flush()
+                    raise
+            if use_mel_cache and hasattr(model, "feature_params"):
+                try:
+                    globals()['mel_cache'] = MelCache(*model.feature_params())
+                except Exception as e:
+                    sys.stderr.write(f"Mel feature cache disabled: {e}\n")
+                    sys.stderr.flush()
+        backend = decode_worker.backend if model is None else (model.name, model.model_ref)
+        with stats_lock:
+            stats["backend"], stats["model_ref"] = backend
+        sys.stderr.write(f"Speech backend: {backend[0]}\n")
+        sys.stderr.flush()
         
         model_ready = True
+        model_loaded_event.set()
         sys.stderr.write(f"Whisper model loaded successfully\n")
         sys.stderr.flush()
+        if trigger is not None:
+            reload_ms = round((time.perf_counter() - t0) * 1000)
+            with stats_lock:
+                stats["reloads"] += 1
+                stats["reload_ms_last"] = reload_ms
+            emit_event("MODEL_RELOADED", {"ms": reload_ms, "trigger": trigger})
+            return
         # Send ready signal to Electron
-        print("EVENT: READY")
-        sys.stdout.flush()
+        now = time.perf_counter()
+        startup.add("ready", now, now)
+        emit_event("READY")
     except Exception as e:
         sys.stderr.write(f"Failed to load Whisper model: {e}\n")
         sys.stderr.write("Please ensure faster-whisper is installed: pip install faster-whisper\n")
         sys.stderr.flush()
         model_ready = False
+        model_loaded_event.set()
         # Send error signal
-        print("EVENT: ERROR")
-        sys.stdout.flush()
+        emit_event("ERROR")
         raise
 
-# Start loading model in background thread to not block
-model_load_thread = threading.Thread(target=load_model, daemon=True)
-model_load_thread.start()
+
+def init_audio():
+    """Import PyAudio and open the PortAudio host (done while the model loads)"""
+    global pyaudio, audio
+    if audio is not None:
+        return
+    try:
+        import pyaudio as _pyaudio
+    except Exception as e:
+        sys.stderr.write(f"PyAudio import error: {e}\n")
+        sys.stderr.flush()
+        raise
+    pyaudio = _pyaudio
+    audio = pyaudio.PyAudio()
+
+
+def init_keyboard():
+    """Import keyboard and start its key-state listener before the first hold"""
+    global keyboard
+    if keyboard is not None:
+        return
+    import keyboard as _keyboard
+    keyboard = _keyboard
+    try:
+        # The first is_pressed() installs the OS hook; do it now rather than on first release check
+        keyboard.is_pressed("shift")
+    except Exception as e:
+        sys.stderr.write(f"Keyboard hook init error: {e}\n")
+        sys.stderr.flush()
+
+
+def shutdown_audio():
+    stop_stream()
+    if audio is not None:
+        audio.terminate()
+
+
+def emit_startup_profile(model_load_thread):
+    model_load_thread.join()
+    report = startup.report()
+    for p in report["phases"]:
+        sys.stderr.write(
+            f"[startup] {p['start_ms']:>8.1f} -> {p['end_ms']:>8.1f} ms  {p['phase']} ({p['thread']})\n"
+        )
+    sys.stderr.flush()
+    emit_event("STARTUP", report)
+
+def decoder_ready():
+    """True once either the in-process model or the decode worker can serve requests"""
+    return model_ready and (model is not None or decode_worker is not None)
+
+
+def touch_activity():
+    global last_activity
+    last_activity = time.monotonic()
+
+
+def unload_model(reason, min_idle):
+    """Release the model (and close the stream) unless it was used within min_idle seconds"""
+    global model, model_ready, model_unloaded
+    with model_state_lock:
+        idle = time.monotonic() - last_activity
+        with lock:
+            busy = recording_flag or finals_pending > 0
+        if busy or model_reloading or not model_ready or idle < min_idle:
+            return False
+        model_ready = False
+        model_unloaded = True
+        model_loaded_event.clear()
+        model = None
+        globals()['mel_cache'] = None
+        if decode_worker is not None:
+            decode_worker.stop_worker()
+        stop_stream()
+    gc.collect()
+    with stats_lock:
+        stats["unloads"] += 1
+    sys.stderr.write(f"Unloaded Whisper model ({reason}, idle {idle:.0f}s)\n")
+    sys.stderr.flush()
+    emit_event("MODEL_UNLOADED", {"reason": reason, "idle_s": round(idle)})
+    return True
+
+
+def reload_model(trigger):
+    global model_reloading, model_unloaded
+    try:
+        load_model(trigger)
+    except Exception:
+        # load_model already reported ERROR; let the next START try again
+        with model_state_lock:
+            model_unloaded = True
+    finally:
+        with model_state_lock:
+            model_reloading = False
+
+
+def ensure_model_loaded(trigger):
+    """Mark activity and, if the idle policy unloaded the model, start reloading it.
+
+    Returns immediately; decodes wait on model_loaded_event while the reload runs.
+    """
+    global model_unloaded, model_reloading
+    with model_state_lock:
+        touch_activity()
+        if not model_unloaded:
+            return
+        model_unloaded = False
+        model_reloading = True
+    sys.stderr.write(f"Reloading Whisper model ({trigger})\n")
+    sys.stderr.flush()
+    threading.Thread(target=reload_model, args=(trigger,), name="model-reload", daemon=True).start()
+
+
+def available_memory_mb(psutil):
+    try:
+        return psutil.virtual_memory().available / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def idle_monitor_loop():
+    """Unload the model after idle_unload_seconds, or sooner when memory runs low"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    while True:
+        time.sleep(IDLE_CHECK_INTERVAL)
+        if not model_ready:
+            continue
+        idle = time.monotonic() - last_activity
+        if idle_unload_seconds > 0 and idle >= idle_unload_seconds:
+            unload_model("idle", idle_unload_seconds)
+        elif psutil is not None and min_available_mb > 0 and idle >= PRESSURE_MIN_IDLE:
+            available = available_memory_mb(psutil)
+            if available is not None and available < min_available_mb:
+                unload_model("memory_pressure", PRESSURE_MIN_IDLE)
+
+
+def configure_cpu_placement():
+    """Called from main() before any thread starts: decode cores become the process default"""
+    global capture_cores, decode_cores, decode_nice
+    if not (capture_core_spec or capture_boost):
+        return
+    import cpu_affinity
+    if capture_core_spec:
+        try:
+            capture, decode = cpu_affinity.plan_cores(capture_core_spec)
+        except ValueError as e:
+            sys.stderr.write(f"Ignoring WHISPER_CAPTURE_CORE: {e}\n")
+            sys.stderr.flush()
+            capture, decode = None, None
+        if capture and cpu_affinity.set_default_affinity(decode):
+            capture_cores = capture
+            decode_cores = decode
+            os.environ["WHISPER_DECODE_CORES"] = ",".join(str(core) for core in sorted(decode))  # for decode_worker
+            sys.stderr.write(f"Capture pinned to core(s) {sorted(capture)}, decoding on {sorted(decode)}\n")
+            sys.stderr.flush()
+    if capture_boost and not cpu_affinity.can_raise_priority(CAPTURE_NICE):
+        # Unprivileged: lowering the decode side is the next best thing
+        decode_nice = DECODE_NICE
+        sys.stderr.write("Cannot raise capture priority; lowering decode thread priority instead\n")
+        sys.stderr.flush()
+
+
+def tune_capture_thread():
+    if capture_cores is None and not capture_boost:
+        return
+    import cpu_affinity
+    if capture_cores is not None:
+        cpu_affinity.set_thread_affinity(capture_cores)
+    if capture_boost and decode_nice is None:
+        cpu_affinity.set_thread_nice(CAPTURE_NICE)
+
+
+def tune_decode_thread():
+    """Keep the calling decode thread off the capture core and lower it when needed"""
+    if decode_cores is None and decode_nice is None:
+        return
+    import cpu_affinity
+    if decode_cores is not None:
+        cpu_affinity.set_thread_affinity(decode_cores)
+    if decode_nice is not None:
+        cpu_affinity.set_thread_nice(decode_nice)
+
+
+class CaptureMonitor:
+    """Per-session capture accounting.
+
+    exception_on_overflow=False hides PortAudio overflows, but audio that was
+    dropped never arrives: the samples read fall behind the wall clock. The
+    deficit is measured against its lowest point so the backlog buffered
+    before START (which reads back instantly) is not counted. A read that
+    returns more than LATE_READ_FACTOR chunk periods after the previous one
+    is a late read.
+    """
+
+    LATE_READ_FACTOR = 2.0
+
+    def __init__(self, rate=RATE, chunk=CHUNK):
+        self.rate = rate
+        self.chunk = chunk
+        self.session = None
+
+    def start(self, session, now):
+        self.session = session
+        self.t0 = now
+        self.last_read = now
+        self.captured = 0
+        self.min_deficit = None
+        self.dropped = 0
+        self.overflows = 0
+        self.read_errors = 0
+        self.late_reads = 0
+        self.max_gap = 0.0
+
+    def on_error(self):
+        self.read_errors += 1
+
+    def on_read(self, samples, now):
+        gap = now - self.last_read
+        self.last_read = now
+        self.max_gap = max(self.max_gap, gap)
+        if gap > self.LATE_READ_FACTOR * self.chunk / self.rate:
+            self.late_reads += 1
+        self.captured += samples
+        deficit = (now - self.t0) * self.rate - self.captured
+        if self.min_deficit is None or deficit < self.min_deficit:
+            self.min_deficit = deficit
+        # One chunk of slack absorbs scheduling jitter between reads
+        dropped = max(0, int(deficit - self.min_deficit) - self.chunk)
+        if dropped > self.dropped + self.chunk:
+            self.overflows += 1
+        self.dropped = max(self.dropped, dropped)
+
+    def finish(self, now):
+        """Fold the session into stats and return its report"""
+        expected = int((now - self.t0) * self.rate)
+        report = {
+            "session": self.session,
+            "duration_ms": round((now - self.t0) * 1000),
+            "captured_samples": self.captured,
+            "expected_samples": expected,
+            "overflows": self.overflows,
+            "dropped_ms": round(self.dropped * 1000 / self.rate, 1),
+            "read_errors": self.read_errors,
+            "late_reads": self.late_reads,
+            "max_gap_ms": round(self.max_gap * 1000, 1),
+        }
+        with stats_lock:
+            stats["capture_overflows"] += self.overflows
+            stats["capture_dropped_ms"] += report["dropped_ms"]
+            stats["capture_read_errors"] += self.read_errors
+            stats["capture_late_reads"] += self.late_reads
+            stats["last_capture"] = report
+        self.session = None
+        return report
+
+
+def close_decode_worker():
+    if decode_worker is not None:
+        decode_worker.close()
+
 
 hold_mode = False
 hold_keys_combo = "ctrl+shift+space"  # python keyboard combo string
@@ -134,170 +732,934 @@ def stop_stream():
         stream = None
 
 
+def emit_line(text):
+    """Write one protocol line to Electron; several threads produce output"""
+    with stdout_lock:
+        sys.stdout.write(text + "\n")
+        sys.stdout.flush()
+
+
+def emit_event(name, payload=None):
+    """Emit `EVENT: NAME` with an optional compact JSON payload"""
+    if payload is None:
+        emit_line(f"EVENT: {name}")
+    else:
+        emit_line(f"EVENT: {name} {json.dumps(payload, separators=(',', ':'))}")
+
+
+def emit_translation(reply):
+    """SegmentTranslator callback: stream one translated segment unless its recording was cancelled"""
+    if is_cancelled(reply.get("session")):
+        return
+    emit_line("TRANSLATION: " + json.dumps(reply, ensure_ascii=False, separators=(',', ':')))
+
+
+def set_translation(target_lang):
+    """Start (or with "" stop) pipeline translation of committed segments into target_lang"""
+    global segment_translator, translate_to
+    with translator_lock:
+        old, segment_translator = segment_translator, None
+        translate_to = (target_lang or "").strip().lower()
+        if translate_to and translate_to != translate_from:
+            try:
+                from translation_service import SegmentTranslator
+                segment_translator = SegmentTranslator(
+                    translate_to, translate_from, on_result=emit_translation, backend=translate_backend
+                )
+            except Exception as e:
+                sys.stderr.write(f"Segment translation unavailable: {e}\n")
+                sys.stderr.flush()
+    if old is not None:
+        old.close()
+
+
+def translate_segment(text, session):
+    translator = segment_translator
+    if translator is not None and text:
+        try:
+            translator.submit(text, session)
+        except RuntimeError:
+            pass  # replaced by SET_TRANSLATE while this segment was being committed
+
+
+class DecodeCancelled(Exception):
+    """Raised inside a decode when its recording session was cancelled"""
+
+
+def is_cancelled(session):
+    return session is not None and session == cancelled_session
+
+
+def should_abort(session, partial=False):
+    """Cancelled sessions abort every decode; a pending final also preempts partials"""
+    return is_cancelled(session) or (partial and finals_pending > 0)
+
+
+def _ema(prev, value):
+    return value if prev is None else 0.7 * prev + 0.3 * value
+
+
+def record_decode(audio_seconds, elapsed, partial=False):
+    """Fold a completed decode into the stats and the running real-time factor"""
+    with stats_lock:
+        stats["decodes"] += 1
+        stats["decode_seconds"] += elapsed
+        stats["audio_seconds"] += audio_seconds
+        if audio_seconds > 0:
+            rtf = elapsed / audio_seconds
+            stats["rtf"] = _ema(stats["rtf"], rtf)
+            if partial:
+                stats["partial_rtf"] = _ema(stats["partial_rtf"], rtf)
+
+
+def record_cancel(audio_seconds, elapsed=0.0):
+    """Account a cancelled (or never started) decode; savings are estimated from the RTF"""
+    with stats_lock:
+        stats["cancelled_decodes"] += 1
+        rtf = stats["rtf"]
+        saved = max(0.0, audio_seconds * rtf - elapsed) if rtf is not None else 0.0
+        stats["decode_seconds_saved"] += saved
+    return saved
+
+
+def get_stats():
+    with stats_lock:
+        snapshot = dict(stats)
+    snapshot["queue_wait"] = decoder.class_stats() if decoder is not None else None
+    snapshot["worker_restarts"] = decode_worker.restarts if decode_worker is not None else 0
+    snapshot["worker_ring_overruns"] = decode_worker.overruns if decode_worker is not None else 0
+    translator = segment_translator
+    snapshot["translation"] = translator.stats() if translator is not None else None
+    lookups = snapshot["cache_hits"] + snapshot["cache_misses"]
+    snapshot["cache_hit_rate"] = round(snapshot["cache_hits"] / lookups, 3) if lookups else None
+    return snapshot
+
+
+class MelCache:
+    """Log-mel frames of the current recording, extended only by newly captured samples.
+
+    Frame k is centred on recording sample k * hop, as in Whisper's centred
+    STFT, so a window starting on a hop boundary reuses the frames computed
+    for earlier windows. Frames reaching past the captured audio are computed
+    per read and not stored. Stored values are raw log10 mel energies; reads
+    apply Whisper's per-window normalisation.
+    """
+
+    def __init__(self, filters, n_fft=400, hop=160):
+        import numpy as np
+        self.filters = np.asarray(filters, dtype=np.float32)
+        self.n_fft = n_fft
+        self.hop = hop
+        self.window = np.hanning(n_fft + 1)[:-1].astype(np.float32)  # periodic Hann
+        self.lock = threading.Lock()
+        self.reset(None)
+
+    def reset(self, session):
+        import numpy as np
+        self.session = session
+        self.chunks = 0  # chunks of the recording folded in so far
+        self.total = 0  # samples captured so far
+        self.samples = np.zeros(0, dtype=np.float32)  # audio still needed by frames not yet stored
+        self.samples_start = 0  # recording index of samples[0]; negative once reflect-padded
+        self.mel = np.zeros((len(self.filters), 0), dtype=np.float32)
+        self.frames = 0  # frames stored in mel[:, :frames]
+
+    def _compute(self, first, last):
+        """Log-mel of frames first..last-1 from the retained samples (zero beyond the end)"""
+        import numpy as np
+        half = self.n_fft // 2
+        starts = np.arange(first, last) * self.hop - half - self.samples_start
+        need = int(starts[-1]) + self.n_fft if len(starts) else 0
+        audio = self.samples if need <= len(self.samples) else np.pad(self.samples, (0, need - len(self.samples)))
+        windows = audio[starts[:, None] + np.arange(self.n_fft)] * self.window
+        power = np.abs(np.fft.rfft(windows, axis=1)) ** 2
+        return np.log10(np.maximum(self.filters @ power.T, 1e-10)).astype(np.float32)
+
+    def _extend(self, chunks):
+        import numpy as np
+        if not chunks:
+            return
+        new = np.frombuffer(b"".join(chunks), dtype=np.int16).astype(np.float32) / 32768.0
+        self.samples = np.concatenate([self.samples, new])
+        self.total += len(new)
+        half = self.n_fft // 2
+        if self.samples_start == 0 and self.frames == 0:
+            if len(self.samples) <= half:
+                return
+            # Reflect-pad the start of the recording like a centred STFT
+            self.samples = np.concatenate([self.samples[1:half + 1][::-1], self.samples])
+            self.samples_start = -half
+        ready = max(0, (self.total - half) // self.hop + 1)  # frames whose window is fully captured
+        if ready > self.frames:
+            block = self._compute(self.frames, ready)
+            if self.mel.shape[1] < ready:
+                grown = np.zeros((self.mel.shape[0], max(ready, 2 * self.mel.shape[1])), dtype=np.float32)
+                grown[:, :self.frames] = self.mel[:, :self.frames]
+                self.mel = grown
+            self.mel[:, self.frames:ready] = block
+            self.frames = ready
+            with stats_lock:
+                stats["mel_frames_computed"] += block.shape[1]
+        keep = self.frames * self.hop - half - self.samples_start
+        if keep > 0:
+            self.samples = self.samples[keep:]
+            self.samples_start += keep
+
+    def features(self, local_frames, session, start, end):
+        """Normalised log-mel for recording samples start..end, shaped like faster-whisper's.
+
+        local_frames is the whole recording so far; start must be a multiple of hop.
+        """
+        import numpy as np
+        with self.lock:
+            if session != self.session or len(local_frames) < self.chunks:
+                self.reset(session)
+            self._extend(local_frames[self.chunks:])
+            self.chunks = len(local_frames)
+            if self.samples_start == 0 and self.frames == 0:
+                return None  # not even one STFT window captured yet
+            first = start // self.hop
+            last = first + (end - start) // self.hop + 1  # faster-whisper pads one hop, drops the last frame
+            stored = min(last, self.frames)
+            parts = [self.mel[:, first:stored]] if stored > first else []
+            if last > max(first, self.frames):
+                parts.append(self._compute(max(first, self.frames), last))
+            with stats_lock:
+                stats["mel_frames_reused"] += max(0, stored - first)
+                stats["mel_frames_computed"] += last - max(first, stored)
+        if not parts:
+            return None
+        log_spec = np.concatenate(parts, axis=1)
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+
+def window_features(local_frames, chunks, session):
+    """Cached features for chunks (the tail of local_frames), or None when unavailable"""
+    cache = mel_cache
+    if cache is None or session is None or not chunks:
+        return None
+    end = samples_in(local_frames)
+    start = end - samples_in(chunks)
+    if start % cache.hop:
+        return None
+    return cache.features(local_frames, session, start, end)
+
+
+class DecodeCache:
+    """Small LRU of raw decode results keyed by a hash of the audio span and decode options"""
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(pcm, options):
+        digest = hashlib.blake2b(pcm, digest_size=16)
+        digest.update(repr(options).encode())
+        return digest.digest()
+
+    def get(self, key):
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+            return text
+
+    def put(self, key, text):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+
+# Pauses make the partial loop decode an unchanged tail again, and short
+# recordings finalize on exactly the audio the last partial covered
+decode_cache = DecodeCache(int(os.environ.get("WHISPER_DECODE_CACHE", "64")))
+
+
+def decode_options():
+    """Everything besides the audio that can change a decode's raw text"""
+    return (model_size, "worker" if decode_worker is not None else "in_process")
+
+
+def collect_segments(segments, session=None, partial=False, on_segment=None):
+    """Consume the lazy segment generator, stopping early if the decode must be abandoned.
+
+    on_segment, if given, is called with each segment's text as soon as it is yielded.
+    """
+    parts = []
+    try:
+        for seg in segments:
+            if should_abort(session, partial):
+                raise DecodeCancelled()
+            parts.append(seg.text)
+            if on_segment is not None:
+                on_segment(seg.text)
+    finally:
+        # Stop the generator so no further windows are decoded
+        close = getattr(segments, "close", None)
+        if callable(close):
+            close()
+    if should_abort(session, partial):
+        raise DecodeCancelled()
+    return "".join(parts).strip()
+
+
+def samples_in(chunks):
+    return sum(len(c) for c in chunks) // 2
+
+
+def run_decode(chunks, span_start=0, session=None, partial=False, on_segment=None, features=None):
+    """Decode captured chunks and post-process the text; returns "" when abandoned.
+
+    span_start is the ring position of chunks[0] and is only used when the
+    model lives in the decode worker. on_segment streams raw segment texts
+    when the in-process model decodes (cache hits and worker decodes do not
+    stream; callers emit their whole text instead). features are precomputed
+    log-mel frames for the chunks (see MelCache).
+    """
+    audio_seconds = samples_in(chunks) / RATE
+    pcm = b''.join(chunks)
+    cache_key = decode_cache.key(pcm, decode_options())
+    cached = decode_cache.get(cache_key)
+    with stats_lock:
+        stats["cache_hits" if cached is not None else "cache_misses"] += 1
+    if cached is not None:
+        return postprocess_text(cached)
+    t0 = time.perf_counter()
+    try:
+        if should_abort(session, partial):
+            raise DecodeCancelled()
+        if decode_worker is not None:
+            try:
+                text, _ = decode_worker.decode(span_start, span_start + samples_in(chunks), session, partial, pcm)
+            except RuntimeError as e:
+                from decode_worker import WorkerExited
+                if isinstance(e, WorkerExited):
+                    # Died and could not be restarted: tell Electron instead of failing silently
+                    sys.stderr.write(f"{e}\n")
+                    sys.stderr.flush()
+                    emit_event("ERROR")
+                raise
+            if text is None or should_abort(session, partial):
+                raise DecodeCancelled()
+        elif features is not None:
+            import numpy as np
+            samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+            segments, _ = model.transcribe(samples, features=features)
+            text = collect_segments(segments, session, partial, on_segment)
+        else:
+            # Write to temp wav
+            fd, tmp_path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            try:
+                wf = wave.open(tmp_path, 'wb')
+                wf.setnchannels(CHANNELS)
+                wf.setsampwidth(SAMPLE_WIDTH)
+                wf.setframerate(RATE)
+                wf.writeframes(pcm)
+                wf.close()
+
+                segments, _ = model.transcribe(tmp_path)
+                text = collect_segments(segments, session, partial, on_segment)
+            finally:
+                try:
+                    os.remove(tmp_path)
+                except Exception:
+                    pass
+    except DecodeCancelled:
+        if not is_cancelled(session):
+            # Partial made obsolete by a final: hand the decoder over immediately
+            with stats_lock:
+                stats["partials_preempted"] += 1
+            return ""
+        saved = record_cancel(audio_seconds, time.perf_counter() - t0)
+        sys.stderr.write(f"Decode cancelled, saved ~{saved * 1000:.0f} ms of decoding\n")
+        sys.stderr.flush()
+        return ""
+    record_decode(audio_seconds, time.perf_counter() - t0, partial)
+    decode_cache.put(cache_key, text)
+    return postprocess_text(text)
+
+
+def run_decode_batch(spans):
+    """Decode independent audio spans (lists of chunks) together; returns one text per span.
+
+    Cache hits are answered directly. The remaining spans of at most one
+    Whisper window go through the backend's batched pass when it has one;
+    everything else falls back to run_decode one span at a time.
+    """
+    texts = [None] * len(spans)
+    misses = []
+    batched = model is not None and decode_worker is None and hasattr(model, "transcribe_batch")
+    for i, chunks in enumerate(spans):
+        if not batched or len(spans) == 1 or samples_in(chunks) > BATCH_MAX_SECONDS * RATE:
+            texts[i] = run_decode(chunks)
+            continue
+        pcm = b''.join(chunks)
+        key = decode_cache.key(pcm, decode_options())
+        cached = decode_cache.get(key)
+        with stats_lock:
+            stats["cache_hits" if cached is not None else "cache_misses"] += 1
+        if cached is not None:
+            texts[i] = postprocess_text(cached)
+        else:
+            misses.append((i, pcm, key))
+    if misses:
+        import numpy as np
+        clips = [np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0 for _, pcm, _ in misses]
+        t0 = time.perf_counter()
+        try:
+            raw = model.transcribe_batch(clips)
+        except Exception as e:
+            sys.stderr.write(f"Batched decode failed ({e}); decoding spans one by one\n")
+            sys.stderr.flush()
+            for i, _, _ in misses:
+                texts[i] = run_decode(spans[i])
+            return texts
+        record_decode(sum(len(c) for c in clips) / RATE, time.perf_counter() - t0)
+        with stats_lock:
+            stats["batched_decodes"] += 1
+            stats["batched_spans"] += len(misses)
+        for (i, _, key), text in zip(misses, raw):
+            decode_cache.put(key, text)
+            texts[i] = postprocess_text(text)
+    return texts
+
+
+def get_decoder():
+    global decoder
+    with decoder_lock:
+        if decoder is None:
+            decoder = DecodeScheduler(name="decoder", on_start=tune_decode_thread)
+        return decoder
+
+
+def scheduled(priority, fn, *args, supersede=False):
+    """Run fn(*args) on the decode thread at a priority class and wait; None if it was dropped"""
+    future = get_decoder().submit(DICTATION_CLIENT, fn, *args, priority=priority, supersede=supersede)
+    try:
+        return future.result()
+    except CancelledError:
+        return None
+
+
+def snapshot_session():
+    """Copy the current recording so a decode is unaffected by the next START"""
+    with lock:
+        return list(frames), session_start_pos, session_id
+
+
+def claim_final():
+    """End the current recording for exactly one caller (STOP or hold release).
+
+    Clears recording_flag and reserves the final in finals_pending in one
+    critical section; False means the other path already finalized it.
+    """
+    global finals_pending
+    with lock:
+        if not recording_flag:
+            return False
+        globals()['recording_flag'] = False
+        finals_pending += 1
+        return True
+
+
+def request_final(reserved=False):
+    """Stop recording and start its final decode; partials in flight are preempted.
+
+    reserved=True means the caller already counted this final in finals_pending.
+    """
+    global finals_pending
+    with lock:
+        globals()['recording_flag'] = False
+        if not reserved:
+            finals_pending += 1
+        local_frames, start_pos, session = list(frames), session_start_pos, session_id
+    if decoder is not None:
+        # Partials still queued would only describe a prefix of this final
+        decoder.drop(PARTIAL, DICTATION_CLIENT)
+    if decode_worker is not None:
+        decode_worker.cancel(session, partial_only=True)
+    # Decode off the calling thread so CANCEL and the next START are never stuck behind it
+    threading.Thread(
+        target=finalize_recording, args=(local_frames, start_pos, session), daemon=True
+    ).start()
+
+
+def finalize_recording(local_frames, start_pos, session):
+    """Final decode of a finished recording (STOP or hold release)"""
+    global finals_pending
+    try:
+        # This thread is the final's own, so it can wait out an idle reload
+        # without holding up the decode thread; the first load is never waited on
+        if model_reloading and not decoder_ready():
+            model_loaded_event.wait(RELOAD_WAIT_TIMEOUT)
+        if stream_final:
+            stream_final_recording(local_frames, start_pos, session)
+            return
+        failed = None
+        try:
+            text = scheduled(FINAL, transcribe_frames, local_frames, start_pos, session) or ""
+        except Exception as e:
+            failed, text = e, ""
+        with lock:
+            if is_cancelled(session):
+                return
+            # What the partials of this recording already typed
+            typed = last_partial_text if session == session_id else ""
+            # Fallback to last partial if final transcription is empty
+            if not text:
+                text = last_partial_text
+            if session == session_id:
+                globals()['frames'] = []
+                globals()['last_partial_text'] = ""
+        if partial_deltas and (text or failed is not None):
+            # A failed final still closes the typed hypothesis so Electron finishes the recording
+            emit_edit(typed, text, final=True)
+        elif text:
+            # Send to Electron
+            emit_line(text)
+        translate_segment(text, session)
+        if failed is not None:
+            final_failed(session, failed)
+    finally:
+        with lock:
+            finals_pending -= 1
+        touch_activity()
+
+
+def text_edit(prev, new):
+    """(backspaces, text) turning prev into new.
+
+    A pure extension is a plain append; a change inside a word restarts the
+    edit at that word so no fragment of a word is retyped.
+    """
+    common = len(os.path.commonprefix([prev, new]))
+    mid_word = common < len(prev) and common > 0 and prev[common - 1] != " " and not (
+        prev[common] == " " and (common == len(new) or new[common] == " ")
+    )
+    if mid_word:
+        common = max(prev.rfind(" ", 0, common), 0)
+    return len(prev) - common, new[common:]
+
+
+def anchor_partial(prev, window_text, covers_recording):
+    """Whole-recording hypothesis from a sliding-window partial.
+
+    Once the recording outgrows the window, its text only covers the tail: it
+    is spliced onto prev where their words line up. Without an alignment prev
+    is kept, so words already typed are never erased for a shorter window.
+    """
+    if covers_recording or not prev:
+        return window_text
+    if not window_text:
+        return prev
+    prev_words, window_words = prev.split(), window_text.split()
+    norm = lambda w: w.strip(".,!?;:\"'").lower()
+    prev_keys = [norm(w) for w in prev_words]
+    window_keys = [norm(w) for w in window_words]
+    for skip in range(min(ANCHOR_MAX_SKIP, len(window_keys) - ANCHOR_MIN_WORDS) + 1):
+        key = window_keys[skip:skip + ANCHOR_MIN_WORDS]
+        # Latest match: the window overlaps the end of the hypothesis
+        for i in range(len(prev_keys) - ANCHOR_MIN_WORDS, -1, -1):
+            if prev_keys[i:i + ANCHOR_MIN_WORDS] == key:
+                return " ".join(prev_words[:i] + window_words[skip:])
+    return prev
+
+
+def emit_edit(prev, new, final=False):
+    backspaces, text = text_edit(prev, new)
+    payload = {"bs": backspaces, "text": text}
+    if final:
+        payload["final"] = True
+    emit_line("EDIT: " + json.dumps(payload, separators=(',', ':')))
+
+
+def stream_final_recording(local_frames, start_pos, session):
+    """Streaming final: one SEGMENT line per decoded segment, then EVENT: COMMIT"""
+    t0 = time.perf_counter()
+    streamed = []
+    raw_segments = []
+    first_ms = None
+
+    def segment_text(raw):
+        """Post-processed text for the next segment, from the transcript so far.
+
+        Rules are applied to the joined raw segments, so the typed (and
+        translated) text matches a whole-final decode. If a rule rewrote text
+        already typed, the segment is post-processed on its own instead.
+        """
+        raw_segments.append(raw.strip())
+        whole = postprocess_text(" ".join(raw_segments))
+        sent = " ".join(streamed)
+        if whole.startswith(sent) and (len(whole) == len(sent) or not sent or whole[len(sent)] == " "):
+            return whole[len(sent):].strip()
+        return postprocess_text(raw.strip())
+
+    def send_segment(text):
+        nonlocal first_ms
+        if not text or is_cancelled(session):
+            return
+        if first_ms is None:
+            first_ms = round((time.perf_counter() - t0) * 1000)
+        streamed.append(text)
+        emit_line("SEGMENT: " + text)
+        translate_segment(text, session)
+
+    failed = None
+    try:
+        text = scheduled(FINAL, lambda: transcribe_frames(
+            local_frames, start_pos, session, on_segment=lambda raw: send_segment(segment_text(raw))
+        )) or ""
+    except Exception as e:
+        failed, text = e, ""
+    with lock:
+        if is_cancelled(session):
+            return
+        fallback = last_partial_text
+        if session == session_id:
+            globals()['frames'] = []
+            globals()['last_partial_text'] = ""
+    if not streamed:
+        # Cache hit, decode worker, empty or failed decode: send the whole text as one segment
+        send_segment(text or fallback)
+    if streamed:
+        with stats_lock:
+            stats["final_first_segment_ms"] = first_ms
+        emit_event("COMMIT", {
+            "segments": len(streamed),
+            "first_segment_ms": first_ms,
+            "total_ms": round((time.perf_counter() - t0) * 1000),
+        })
+    if failed is not None:
+        final_failed(session, failed)
+
+
+def final_failed(session, error):
+    """Report a final decode that raised; whatever the partials typed was kept as the text"""
+    sys.stderr.write(f"Final transcription error: {error}\n")
+    sys.stderr.flush()
+    with stats_lock:
+        stats["final_errors"] += 1
+    emit_event("FINAL_FAILED", {"session": session, "error": str(error)})
+
+
+def plan_partial(rtf):
+    """Pick (window, interval) seconds for the next partial from the measured partial RTF.
+
+    Slow decoders get a shorter window and a longer interval so partials never
+    queue behind each other; fast ones get more context and quicker updates.
+    """
+    if rtf is None:
+        return 3.0, 0.8  # fixed schedule until the first partial has been timed
+    window = min(PARTIAL_MAX_WINDOW, max(PARTIAL_MIN_WINDOW, PARTIAL_TARGET_LATENCY / max(rtf, 1e-3)))
+    interval = min(PARTIAL_MAX_INTERVAL, max(PARTIAL_MIN_INTERVAL, 1.5 * rtf * window))
+    return window, interval
+
+
+def live_transcribe_loop():
+    last_start = 0.0
+    while True:
+        time.sleep(PARTIAL_POLL)
+        try:
+            with stats_lock:
+                window, interval = plan_partial(stats["partial_rtf"])
+                stats["partial_window"], stats["partial_interval"] = window, interval
+            if time.perf_counter() - last_start < interval:
+                continue
+            with lock:
+                active = recording_flag
+                hm = hold_mode
+                local_frames = list(frames)
+                prev = last_partial_text
+                start_pos = session_start_pos
+                session = session_id
+                busy = finals_pending > 0
+            if not (hm and active and len(local_frames) > 10):
+                continue
+            if busy:
+                # A final owns the decoder; newer audio is picked up by the next tick
+                with stats_lock:
+                    stats["partials_skipped"] += 1
+                continue
+            last_start = time.perf_counter()
+            text = scheduled(PARTIAL, lambda: transcribe_recent_seconds(
+                local_frames, seconds=window, start_pos=start_pos, session=session, partial=True
+            ), supersede=True)
+            covers = len(local_frames) <= int(round(window * int(RATE / CHUNK)))
+            text = anchor_partial(prev, text, covers)
+            with lock:
+                # Drop results that went stale while decoding
+                current = recording_flag and session == session_id and finals_pending == 0
+                if current and text and text != prev:
+                    globals()['last_partial_text'] = text
+                    if partial_deltas:
+                        # Emitted under the lock so a final's edit can never overtake it
+                        emit_edit(prev, text)
+            if current and text and text != prev and not partial_deltas:
+                emit_line("PARTIAL: " + text)
+        except Exception:
+            pass
+
+
+def speech_gate(chunks):
+    """Reason to skip decoding these chunks ("too_short" / "silent"), or None to decode"""
+    import numpy as np
+    samples = np.frombuffer(b"".join(chunks), dtype=np.int16)
+    if len(samples) < MIN_DECODE_SECONDS * RATE:
+        return "too_short"
+    frame = int(GATE_FRAME_SECONDS * RATE)
+    framed = samples[:len(samples) - len(samples) % frame].astype(np.float32).reshape(-1, frame) / 32768.0
+    rms = np.sqrt(np.mean(np.square(framed), axis=1))
+    voiced = np.count_nonzero(rms > 10 ** (SILENCE_DB / 20.0))
+    if voiced * GATE_FRAME_SECONDS < MIN_VOICED_SECONDS:
+        return "silent"
+    return None
+
+
+def gated(chunks, partial=False):
+    """True (and accounted in stats) when chunks should not be decoded"""
+    try:
+        reason = speech_gate(chunks)
+    except Exception as e:
+        sys.stderr.write(f"Speech gate error: {e}\n")
+        sys.stderr.flush()
+        return False
+    if reason is None:
+        return False
+    audio_seconds = samples_in(chunks) / RATE
+    with stats_lock:
+        stats["gated_decodes"] += 1
+        rtf = stats["partial_rtf" if partial else "rtf"] or stats["rtf"]
+        if rtf is not None:
+            stats["gate_seconds_saved"] += audio_seconds * rtf
+    if not partial:
+        sys.stderr.write(f"Skipping decode of {audio_seconds:.2f}s recording ({reason})\n")
+        sys.stderr.flush()
+    return True
+
+
+def normalize_db(value):
+    """Map a linear amplitude (0..1 of full scale) onto 0..1 over LEVEL_FLOOR_DB..0 dBFS"""
+    import numpy as np
+    db = 20.0 * np.log10(np.maximum(value, 1e-9))
+    return np.clip(1.0 - db / LEVEL_FLOOR_DB, 0.0, 1.0)
+
+
+def measure_levels(pcm, bars=LEVEL_BARS):
+    """RMS, peak and per-bar RMS of int16 PCM, each normalised to 0..1"""
+    import numpy as np
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    if not len(samples):
+        return None
+    usable = len(samples) - len(samples) % bars if len(samples) >= bars else 0
+    bar_rms = (
+        np.sqrt(np.mean(np.square(samples[:usable].reshape(bars, -1)), axis=1))
+        if usable else np.full(bars, np.sqrt(np.mean(np.square(samples))))
+    )
+    return {
+        "rms": round(float(normalize_db(np.sqrt(np.mean(np.square(samples))))), 3),
+        "peak": round(float(normalize_db(np.max(np.abs(samples)))), 3),
+        "bars": [round(float(v), 2) for v in normalize_db(bar_rms)],
+    }
+
+
+def level_meter_loop():
+    """Emit levels for audio captured since the previous tick; runs beside, never inside, capture"""
+    seen_session, seen = None, 0
+    last_error = None
+    while True:
+        if level_hz <= 0:
+            time.sleep(0.25)  # off until SET_LEVEL_HZ turns it back on
+            continue
+        time.sleep(1.0 / min(level_hz, 60.0))
+        with lock:
+            if not recording_flag:
+                continue
+            if session_id != seen_session:
+                seen_session, seen = session_id, 0
+            # Only references are copied under the lock; the maths runs outside it
+            new_chunks = frames[seen:]
+            seen = len(frames)
+        if not new_chunks:
+            continue
+        try:
+            levels = measure_levels(b"".join(new_chunks))
+            if levels is not None:
+                emit_event("LEVEL", levels)
+        except Exception as e:
+            # Skip this tick; log each distinct error once rather than at the tick rate
+            if str(e) != last_error:
+                last_error = str(e)
+                sys.stderr.write(f"Level meter error: {e}\n")
+                sys.stderr.flush()
+
+
+def cancel_recording():
+    """CANCEL: stop capture, drop the buffer and abort in-flight decodes of this session"""
+    global frames
+    with lock:
+        was_recording = recording_flag
+        globals()['recording_flag'] = False
+        globals()['cancelled_session'] = session_id
+        audio_seconds = samples_in(frames) / RATE
+        frames = []
+        globals()['last_partial_text'] = ""
+    if decode_worker is not None:
+        # A decode already running in the worker stops at its next segment
+        decode_worker.cancel(cancelled_session)
+    saved = 0.0
+    if was_recording and audio_seconds > 0:
+        # The final decode for this recording will never run at all
+        saved = record_cancel(audio_seconds)
+    emit_event("CANCELLED", {"audio_ms": round(audio_seconds * 1000), "saved_ms": round(saved * 1000)})
+
+
 def audio_capture_loop():
   global frames
+  tune_capture_thread()
+  monitor = CaptureMonitor()
   while True:
         with lock:
             active = recording_flag
+            session = session_id
+        if monitor.session is not None and (not active or monitor.session != session):
+            emit_event("CAPTURE", monitor.finish(time.perf_counter()))
         if not active:
             time.sleep(0.001)  # Minimal sleep for fastest response
             continue
+        if monitor.session is None:
+            monitor.start(session, time.perf_counter())
         try:
             data = stream.read(CHUNK, exception_on_overflow=False)
+            monitor.on_read(len(data) // SAMPLE_WIDTH, time.perf_counter())
         except Exception as e:
+            monitor.on_error()
             sys.stderr.write(f"Audio read error: {e}\n")
             sys.stderr.flush()
             time.sleep(0.05)
             continue
         with lock:
             frames.append(data)
+            if decode_worker is not None:
+                decode_worker.write(data)
 
         # If in hold mode, stop when key combo is released
         try:
             with lock:
                 hm = hold_mode
             if hm and active:
-                if not combo_pressed():
-                    # Release detected -> stop immediately
-                    with lock:
-                        globals()['recording_flag'] = False
+                # Release detected -> stop immediately, unless a STOP already finalized it
+                if not combo_pressed() and claim_final():
                     # Notify Electron IMMEDIATELY so UI can hide instantly on release
                     # This must happen BEFORE any transcription delay
                     try:
-                        sys.stdout.write("EVENT: RELEASE\n")
-                        sys.stdout.flush()
+                        emit_event("RELEASE")
                     except Exception:
                         pass
-                    # Minimal delay to capture final audio chunk (reduced from 0.1s to 0.05s)
+                    # Minimal delay to capture final audio chunk (reduced from 0.1s to 0.05s);
+                    # the trailing chunk is still appended before the final is taken
                     time.sleep(0.05)
-                    text = transcribe_frames()
-                    # Fallback to last partial if final transcription is empty
-                    if not text:
-                        try:
-                            with lock:
-                                text = last_partial_text
-                        except Exception:
-                            pass
-                    with lock:
-                        frames = []
-                        globals()['frames'] = frames
-                        globals()['last_partial_text'] = ""
-                    if text:
-                        sys.stdout.write(text + "\n")
-                        sys.stdout.flush()
+                    request_final(reserved=True)
         except Exception as e:
             sys.stderr.write(f"Release detection error: {e}\n")
             sys.stderr.flush()
 
 
-def transcribe_frames():
+def transcribe_frames(local_frames=None, start_pos=None, session=None, on_segment=None):
     global frames, model_ready
     
-    # CRITICAL: Don't wait here - just check readiness
-    # Waiting here blocks the main thread and causes issues
-    if not model_ready or model is None:
+    # Runs on the shared decode thread: an idle reload is waited out by the
+    # caller (finalize_recording) before the job is submitted, never here
+    if not decoder_ready():
         sys.stderr.write("Model not ready yet, ignoring transcription request\n")
         sys.stderr.flush()
         # Send event to notify user to wait
-        print("EVENT: MODEL_NOT_READY")
-        sys.stdout.flush()
+        emit_event("MODEL_NOT_READY")
         return ""
     
-    if not frames:
+    if local_frames is None:
+        local_frames, start_pos, _ = snapshot_session()
+    if not local_frames or gated(local_frames):
         return ""
-    # Write to temp wav
-    fd, tmp_path = tempfile.mkstemp(suffix=".wav")
-    os.close(fd)
-    try:
-        wf = wave.open(tmp_path, 'wb')
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(audio.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(frames))
-        wf.close()
-
-        segments, _ = model.transcribe(tmp_path)
-        text = "".join([seg.text for seg in segments]).strip()
-        return text
-    finally:
-        try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
+    features = window_features(local_frames, local_frames, session)
+    return run_decode(local_frames, start_pos or 0, session, on_segment=on_segment, features=features)
 
-def transcribe_recent_seconds(local_frames, seconds=3):
+def transcribe_recent_seconds(local_frames, seconds=3, start_pos=0, session=None, partial=False):
     global model_ready
     
     # Check if model is ready
-    if not model_ready or model is None:
+    if not decoder_ready():
         return ""
     
     if not local_frames:
         return ""
     # number of chunks to use from tail
     chunks_per_sec = int(RATE / CHUNK)  # ~15
-    use_chunks = max(1, min(len(local_frames), seconds * chunks_per_sec))
+    use_chunks = max(1, min(len(local_frames), int(round(seconds * chunks_per_sec))))
     tail = local_frames[-use_chunks:]
-    fd, tmp_path = tempfile.mkstemp(suffix=".wav")
-    os.close(fd)
-    try:
-        wf = wave.open(tmp_path, 'wb')
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(audio.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(tail))
-        wf.close()
-        segments, _ = model.transcribe(tmp_path)
-        text = "".join([seg.text for seg in segments]).strip()
-        return text
-    finally:
-        try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
+    if gated(tail, partial=partial):
+        return ""
+    offset = samples_in(local_frames) - samples_in(tail)
+    if mel_cache is not None and offset % mel_cache.hop:
+        # Start the window on a hop boundary so it reuses the recording's mel frames
+        extra = offset % mel_cache.hop
+        tail = [local_frames[-use_chunks - 1][-extra * SAMPLE_WIDTH:]] + tail
+    span_start = start_pos + samples_in(local_frames) - samples_in(tail)
+    features = window_features(local_frames, tail, session)
+    return run_decode(tail, span_start, session, partial, features=features)
 
 
 def main():
+    configure_cpu_placement()
+    # Start loading model in background thread to not block; device and
+    # keyboard setup below overlap with the CTranslate2 load
+    model_load_thread = threading.Thread(target=load_model, name="model-load", daemon=True)
+    model_load_thread.start()
+    # The dictionary regex compiles alongside the model load, not on the first decode
+    threading.Thread(target=get_postprocessor, name="dictionary-load", daemon=True).start()
     try:
-        start_stream()
+        with startup.phase("audio_init"):
+            init_audio()
+        with startup.phase("stream_open"):
+            start_stream()
         t = threading.Thread(target=audio_capture_loop, daemon=True)
         t.start()
     except Exception as e:
         sys.stderr.write(f"Failed to start audio stream: {e}\n")
         sys.stderr.flush()
         return
-
-    def live_transcribe_loop():
-        while True:
-            time.sleep(0.8)  # Reduced from 1.2s to 0.8s for faster partial updates
-            try:
-                with lock:
-                    active = recording_flag
-                    hm = hold_mode
-                    local_frames = list(frames)
-                    prev = last_partial_text
-                if hm and active and len(local_frames) > 10:
-                    text = transcribe_recent_seconds(local_frames, seconds=3)
-                    if text and text != prev:
-                        with lock:
-                            globals()['last_partial_text'] = text
-                        sys.stdout.write("PARTIAL: " + text + "\n")
-                        sys.stdout.flush()
-            except Exception:
-                pass
+    try:
+        with startup.phase("keyboard_init"):
+            init_keyboard()
+    except Exception as e:
+        sys.stderr.write(f"Keyboard import error: {e}\n")
+        sys.stderr.flush()
+    if profile_startup:
+        threading.Thread(target=emit_startup_profile, args=(model_load_thread,), daemon=True).start()
 
     threading.Thread(target=live_transcribe_loop, daemon=True).start()
+    threading.Thread(target=idle_monitor_loop, name="idle-monitor", daemon=True).start()
+    threading.Thread(target=level_meter_loop, name="level-meter", daemon=True).start()
+    if translate_to:
+        set_translation(translate_to)
 
     for line in sys.stdin:
         cmd = line.strip().upper()
         if cmd == "START":
+            # Reload an idle-unloaded model; capture starts right away and the
+            # final waits for the reload
+            ensure_model_loaded("start")
             # CRITICAL: Check if model is ready before starting recording
-            if not model_ready or model is None:
+            if not decoder_ready() and not model_reloading:
                 sys.stderr.write("Cannot start recording: Model not ready yet\n")
                 sys.stderr.flush()
                 # Send event to Electron to show "Please wait" message
-                print("EVENT: MODEL_NOT_READY")
-                sys.stdout.flush()
+                emit_event("MODEL_NOT_READY")
                 continue
             
             # Ensure stream is started
@@ -305,29 +1667,49 @@ def main():
             with lock:
                 frames = []
                 globals()['frames'] = frames
+                globals()['session_id'] = session_id + 1
+                globals()['session_start_pos'] = decode_worker.position if decode_worker is not None else 0
                 globals()['recording_flag'] = True
                 globals()['last_partial_text'] = ""
             continue
         if cmd == "STOP":
-            with lock:
-                globals()['recording_flag'] = False
-            # Transcribe
-            text = transcribe_frames()
-            # Fallback to last partial if final transcription is empty
-            if not text:
-                try:
-                    with lock:
-                        text = last_partial_text
-                except Exception:
-                    pass
-            with lock:
-                frames = []
-                globals()['frames'] = frames
-                globals()['last_partial_text'] = ""
-            if text:
-                # Send to Electron
-                sys.stdout.write(text + "\n")
-                sys.stdout.flush()
+            # A hold release may already have finalized this recording
+            if claim_final():
+                request_final(reserved=True)
+            continue
+        if cmd == "CANCEL":
+            cancel_recording()
+            continue
+        if cmd == "STATS":
+            emit_event("STATS", get_stats())
+            continue
+        if cmd == "PRELOAD":
+            # Hotkey-down pre-signal: get the model and stream back before START
+            ensure_model_loaded("preload")
+            try:
+                start_stream()
+            except Exception as e:
+                sys.stderr.write(f"Failed to reopen audio stream: {e}\n")
+                sys.stderr.flush()
+            continue
+        if cmd.startswith("SET_LEVEL_HZ"):
+            # e.g., SET_LEVEL_HZ 20 (0 turns level events off)
+            try:
+                globals()['level_hz'] = max(0.0, float(line.strip().split(" ", 1)[1]))
+            except Exception:
+                pass
+            continue
+        if cmd.startswith("SET_IDLE_UNLOAD"):
+            # e.g., SET_IDLE_UNLOAD 600 (seconds, 0 disables)
+            try:
+                globals()['idle_unload_seconds'] = max(0.0, float(line.strip().split(" ", 1)[1]))
+            except Exception:
+                pass
+            continue
+        if cmd.startswith("SET_TRANSLATE"):
+            # e.g., SET_TRANSLATE es, or SET_TRANSLATE OFF
+            value = line.strip().split(" ", 1)[1].strip() if " " in line.strip() else ""
+            set_translation("" if value.lower() == "off" else value)
             continue
         if cmd.startswith("SET_MODE"):
             # e.g., SET_MODE HOLD or SET_MODE TOGGLE
@@ -338,6 +1720,11 @@ def main():
             except Exception:
                 pass
             continue
+        if cmd == "RELOAD_DICTIONARY":
+            count = load_dictionary()
+            sys.stderr.write(f"Dictionary reloaded: {count} replacement rules\n")
+            sys.stderr.flush()
+            continue
         if cmd.startswith("SET_HOLD_KEYS"):
             try:
                 keys_val = line.strip().split(" ", 1)[1].strip()
@@ -348,16 +1735,23 @@ def main():
                 pass
             continue
 
-    stop_stream()
-    audio.terminate()
+    shutdown_audio()
+    close_decode_worker()
+
+
+startup.add("import", IMPORT_STARTED, time.perf_counter())
+IMPORT_MS = (time.perf_counter() - IMPORT_STARTED) * 1000
+if IMPORT_MS > IMPORT_BUDGET_MS:
+    sys.stderr.write(f"whisper_service import took {IMPORT_MS:.0f} ms (budget {IMPORT_BUDGET_MS} ms)\n")
+    sys.stderr.flush()
 
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        stop_stream()
-        audio.terminate()
+        shutdown_audio()
+        close_decode_worker()
     except Exception as e:
         sys.stderr.write(f"Fatal error: {e}\n")
         sys.stderr.flush()
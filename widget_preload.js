@@ -2,6 +2,7 @@ const { contextBridge, ipcRenderer } = require('electron');
 
 contextBridge.exposeInMainWorld('widgetApp', {
   stopRecording: () => ipcRenderer.send('widget-stop-recording'),
-  cancelRecording: () => ipcRenderer.send('widget-cancel-recording')
+  cancelRecording: () => ipcRenderer.send('widget-cancel-recording'),
+  onAudioLevel: (callback) => ipcRenderer.on('audio-level', (_, levels) => callback(levels))
 });
 